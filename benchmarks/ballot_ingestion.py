@@ -0,0 +1,100 @@
+# vim: ts=4:sw=4:expandtabs
+
+"""
+Compare casting votes one INSERT at a time with buffering them and flushing in bulk.
+
+    python -m benchmarks.ballot_ingestion --votes 20000 --users 500 --snacks 20
+
+Seeds a fresh SQLite database (see benchmarks.settings) with --users users, then
+casts --votes votes for --snacks snacks each way, timing each:
+
+    direct     Ballot.cast as usual: spend the user's quota, insert the Ballot and
+               update its snack's VoteTally, one transaction per vote.
+    buffered   Ballot.cast with VOTE_BUFFER_ENABLED: spend the user's quota and
+               append the vote to the ballot buffer; then flush the buffer with
+               bulk_create, --batch-size Ballots per transaction.
+
+'accept' is the time voters wait; 'flush' is the flusher's, off the request path.
+Set --fsync to sync each buffered vote to disk, as VOTE_BUFFER_FSYNC does.
+"""
+
+__author__ = 'zach.mott@gmail.com'
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+
+def setup(args):
+    import django
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0, interactive=False)
+
+    User = get_user_model()
+    User.objects.bulk_create([User(username='voter-{}'.format(i)) for i in range(args.users)])
+    return list(User.objects.all())
+
+
+def cast_votes(users, args, buffered):
+    from django.conf import settings
+
+    from snacksdb.models import Ballot, VoteQuota, VoteTally
+    from snacksdb.utils import ballot_buffer
+
+    Ballot.objects.all().delete()
+    VoteQuota.objects.all().delete()
+    VoteTally.objects.all().delete()
+
+    settings.VOTE_BUFFER_ENABLED = buffered
+    settings.VOTE_BUFFER_FSYNC = args.fsync
+
+    snack_ids = list(range(1000, 1000 + args.snacks))
+    votes = [(random.choice(users), random.choice(snack_ids)) for i in range(args.votes)]
+
+    started = time.perf_counter()
+    for user, snack_id in votes:
+        Ballot.cast(user, snack_id)
+    accepted = time.perf_counter()
+
+    if buffered:
+        ballot_buffer.flush(args.batch_size)
+    flushed = time.perf_counter()
+
+    assert Ballot.objects.count() == args.votes
+    return accepted - started, flushed - accepted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--votes', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--snacks', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--fsync', action='store_true')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCHMARK_DB_NAME'] = os.path.join(directory, 'ingestion.sqlite3')
+
+    users = setup(args)
+
+    from django.conf import settings
+    settings.VOTE_BUFFER_PATH = os.path.join(directory, 'ballots.jsonl')
+
+    for label, buffered in [('direct', False), ('buffered', True)]:
+        accept, flush = cast_votes(users, args, buffered)
+        print("{label:>9}: accept {accept:7.2f} s ({rate:8.0f} votes/s)  "
+              "flush {flush:6.2f} s".format(
+                  label=label, accept=accept, rate=args.votes / accept, flush=flush
+              ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# vim: ts=4:sw=4:expandtabs
+
+"""
+Compare the time and peak memory it takes to decode snack catalogs of various sizes.
+
+    python -m benchmarks.catalog_decoding --sizes 1000 10000 100000
+
+Each installed parser ('orjson', 'ujson', 'json') decodes the whole response
+body at once, as SnackCatalogDecoder does by default; 'ijson-stream' decodes it
+incrementally, as it does with settings.SNACK_BACKEND_STREAM_CATALOG. Every
+combination runs in a fresh process, so that its peak RSS (resident set size)
+reflects only that parser and catalog. Peak RSS includes the interpreter and
+Django (see the 'baseline' row), and, for whole-body parsers, the body itself.
+"""
+
+__author__ = 'zach.mott@gmail.com'
+
+import argparse
+import io
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_kb():
+    # ru_maxrss is in kilobytes on Linux, but bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def measure(mode, path, repeat):
+    """
+    Decode the catalog in the file at 'path' 'repeat' times in this process, and print
+    the parse times (in milliseconds) and peak RSS as JSON. Run in a child process.
+    """
+    from django.conf import settings
+    settings.configure()
+
+    from snacksdb.utils.SnackCatalogDecoder import SnackCatalogDecoder
+
+    with open(path, 'rb') as f:
+        body = f.read()
+
+    if mode == 'baseline':
+        decode = None
+    elif mode == 'ijson-stream':
+        decoder = SnackCatalogDecoder(stream=True)
+        decode = lambda: decoder.decode_catalog_stream(io.BytesIO(body))  # NOQA
+    else:
+        decoder = SnackCatalogDecoder(parser=mode)
+        decode = lambda: decoder.decode_catalog_body(body)  # NOQA
+
+    samples = []
+    for i in range(repeat if decode else 0):
+        started = time.perf_counter()
+        decode()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    print(json.dumps({'samples': samples, 'peak_rss_kb': peak_rss_kb()}))
+
+
+def run(mode, size, path, repeat):
+    output = subprocess.check_output([
+        sys.executable, '-m', 'benchmarks.catalog_decoding', '--measure', mode,
+        '--catalog', path, '--repeat', str(repeat),
+    ])
+    result = json.loads(output.decode())
+    samples = result['samples'] or [0]
+
+    print("{size:>8} {mode:>13}: mean {mean:9.2f} ms  p95 {p95:9.2f} ms  "
+          "peak RSS {rss:8.1f} MB".format(
+              size=size, mode=mode, mean=statistics.mean(samples),
+              p95=percentile(samples, 95), rss=result['peak_rss_kb'] / 1024,
+          ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    parser.add_argument('--catalog', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        return measure(args.measure, args.catalog, args.repeat)
+
+    from benchmarks.stub_snack_api import make_catalog
+    from snacksdb.utils.SnackCatalogDecoder import SnackCatalogDecoder
+
+    modes = [p for p in SnackCatalogDecoder.PARSERS if SnackCatalogDecoder.is_available(p)]
+    if SnackCatalogDecoder.is_available('ijson'):
+        modes.append('ijson-stream')
+
+    for size in args.sizes:
+        with tempfile.NamedTemporaryFile(suffix='.json') as f:
+            f.write(json.dumps(make_catalog(size)).encode())
+            f.flush()
+
+            for mode in ['baseline'] + modes:
+                run(mode, size, f.name, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# vim: ts=4:sw=4:expandtabs
+
+"""
+Compare SnackAPISource.list() latency with and without connection reuse.
+
+    python -m benchmarks.connection_reuse --requests 500
+
+'per-request' calls requests.get() for every list, which is how SnackAPISource
+worked before it had a pooled session: every call opens a new connection.
+'pooled' calls SnackAPISource.list(), which reuses the per-process session.
+Against a TLS upstream, the difference is larger still, since every new
+connection also pays for a TLS handshake.
+"""
+
+__author__ = 'zach.mott@gmail.com'
+
+import argparse
+import statistics
+import time
+
+import requests
+
+from django.conf import settings
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(label, fn, n):
+    samples = []
+    started = time.perf_counter()
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+
+    print("{label:>12}: mean {mean:6.2f} ms  p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  "
+          "{rps:8.1f} req/s".format(
+              label=label, mean=statistics.mean(samples), p50=percentile(samples, 50),
+              p95=percentile(samples, 95), rps=n / elapsed,
+          ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--catalog-size', type=int, default=50)
+    args = parser.parse_args()
+
+    from benchmarks.stub_snack_api import start_stub_server
+    server = start_stub_server(catalog_size=args.catalog_size)
+
+    settings.configure(SNACK_BACKEND_API_KEY='benchmark', SNACK_BACKEND_API_BASE=server.url)
+
+    from snacksdb.utils.SnackAPISource import SnackAPISource
+    source = SnackAPISource()
+    url = source.api_base + source.LIST_PATH
+
+    def per_request():
+        requests.get(url, headers=source.headers, timeout=source.timeout).json()
+
+    # Warm up both paths (imports, the pooled connection) before measuring.
+    per_request()
+    source.list()
+
+    run('per-request', per_request, args.requests)
+    run('pooled', source.list, args.requests)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
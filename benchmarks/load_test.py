@@ -0,0 +1,385 @@
+# vim: ts=4:sw=4:expandtabs
+
+"""
+End-to-end load test of the voting and nomination pages.
+
+    python -m benchmarks.load_test --workers 5 --users 20 --duration 30 --output run.json
+
+Starts a stub Snack API (see benchmarks.stub_snack_api) with the given latency,
+error rate and catalog size; seeds a fresh database with synthetic users,
+nominations and ballots; starts the app under gunicorn with benchmarks.settings;
+then has --users concurrent clients drive a mix of vote page views, votes,
+nomination page views and nominations for --duration seconds.
+
+Reports p50, p95 and p99 latency and requests per second for each operation and
+overall. --output writes the report as JSON, and --compare prints the change
+from an earlier report, so runs can be compared across commits. Requests made
+during the first --warmup seconds aren't counted. --local-catalog copies the
+stub's catalog into the database and serves it with LocalSnackSource instead,
+taking the Snack API out of the picture.
+
+The clients are threads in this process, so on small machines they can become
+the bottleneck before the app does; compare runs made on the same machine.
+"""
+
+__author__ = 'zach.mott@gmail.com'
+
+import argparse
+import datetime
+import io
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.stub_snack_api import start_stub_server
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASSWORD = 'load-test'
+
+DEFAULT_MIX = 'vote_page=60,vote=20,nominate_page=12,nominate=8'
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples, errors, elapsed):
+    """
+    Return a dictionary of statistics for a list of latencies, in milliseconds.
+    """
+    summary = {'requests': len(samples), 'errors': errors, 'rps': len(samples) / elapsed}
+
+    if samples:
+        summary.update({
+            'mean_ms': statistics.mean(samples),
+            'p50_ms': percentile(samples, 50),
+            'p95_ms': percentile(samples, 95),
+            'p99_ms': percentile(samples, 99),
+            'max_ms': max(samples),
+        })
+
+    return summary
+
+
+def parse_mix(mix):
+    """
+    Parse 'operation=weight,...' into a dictionary of {operation: weight, ...}.
+    """
+    weights = {}
+    for item in mix.split(','):
+        name, weight = item.split('=')
+        if name not in LoadTestClient.OPERATIONS:
+            raise argparse.ArgumentTypeError("Unknown operation: {}".format(name))
+        weights[name] = float(weight)
+
+    return weights
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed(args, catalog):
+    """
+    Create the database and fill it with synthetic users, nominations and ballots.
+    Return a list of the nominated snacks.
+    """
+    import django
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+
+    from snacksdb.models import Ballot, Nomination
+
+    call_command('migrate', verbosity=0, interactive=False)
+    call_command('flush', verbosity=0, interactive=False)
+
+    User = get_user_model()
+    password = make_password(PASSWORD)
+    User.objects.bulk_create([
+        User(username='load-test-{}'.format(i), password=password) for i in range(args.users)
+    ])
+    users = list(User.objects.all())
+
+    optional_snacks = [s for s in catalog if s['optional']]
+    nominated = random.sample(optional_snacks, min(args.nominations, len(optional_snacks)))
+
+    Nomination.objects.bulk_create([
+        Nomination(user=random.choice(users), snack_id=snack['id']) for snack in nominated
+    ])
+    Ballot.objects.bulk_create([
+        Ballot(user=random.choice(users), snack_id=random.choice(nominated)['id'])
+        for i in range(args.ballots if nominated else 0)
+    ], batch_size=500)
+
+    # bulk_create doesn't maintain the running tallies.
+    call_command('rebuild_vote_tallies', stdout=io.StringIO())
+
+    if args.local_catalog:
+        call_command('snack_catalog', 'import', from_api=True, stdout=io.StringIO())
+
+    return nominated
+
+
+def start_app(args, env):
+    """
+    Start the app under gunicorn (or runserver) and return (process, base_url).
+    """
+    port = get_free_port()
+    bind = '127.0.0.1:{}'.format(port)
+
+    if args.server == 'gunicorn':
+        command = [
+            'gunicorn', 'snafoo.wsgi:application', '--bind', bind, '--log-level', 'warning',
+            '--workers', str(args.workers), '--worker-class', args.worker_class,
+        ]
+        if args.threads:
+            command += ['--threads', str(args.threads)]
+    else:
+        command = [sys.executable, 'manage.py', 'runserver', '--noreload', bind]
+
+    # Keep the app's access log out of the report.
+    with open(args.app_log, 'w') as log:
+        process = subprocess.Popen(
+            command, cwd=BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    base_url = 'http://' + bind
+
+    # Wait for the app to start answering.
+    for i in range(100):
+        if process.poll() is not None:
+            raise SystemExit("The app exited with status {}. See {}.".format(
+                process.returncode, args.app_log
+            ))
+        try:
+            requests.get(base_url + '/accounts/login/', timeout=1)
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+
+    process.terminate()
+    raise SystemExit("The app didn't start answering requests. See {}.".format(args.app_log))
+
+
+class LoadTestClient(threading.Thread):
+    """
+    One synthetic user, logged in with its own session, performing randomly chosen
+    operations until the run's deadline.
+    """
+    OPERATIONS = ['vote_page', 'vote', 'nominate_page', 'nominate']
+
+    def __init__(self, base_url, username, weights, catalog, nominated, warm_at, deadline):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.username = username
+        self.operations = list(weights)
+        self.weights = [weights[name] for name in self.operations]
+        self.catalog = [s for s in catalog if s['optional']]
+        self.nominated = nominated
+        self.warm_at = warm_at
+        self.deadline = deadline
+
+        self.session = requests.Session()
+        self.samples = {name: [] for name in self.OPERATIONS}
+        self.errors = {name: 0 for name in self.OPERATIONS}
+
+    def login(self):
+        url = self.base_url + '/accounts/login/'
+        self.session.get(url)
+        response = self.session.post(url, allow_redirects=False, data={
+            'username': self.username,
+            'password': PASSWORD,
+            'csrfmiddlewaretoken': self.session.cookies['csrftoken'],
+        })
+        if response.status_code != 302:
+            raise RuntimeError("{} couldn't log in.".format(self.username))
+
+    def post(self, path, data):
+        data['csrfmiddlewaretoken'] = self.session.cookies['csrftoken']
+        return self.session.post(self.base_url + path, data=data, allow_redirects=False)
+
+    def vote_page(self):
+        return self.session.get(self.base_url + '/snacks/vote')
+
+    def vote(self):
+        snack = random.choice(self.nominated)
+        return self.post('/snacks/vote', {'snack_id': snack['id'], 'snack_name': snack['name']})
+
+    def nominate_page(self):
+        return self.session.get(self.base_url + '/snacks/nominate')
+
+    def nominate(self):
+        snack = random.choice(self.catalog)
+        snack_id = '{}--DELIM--{}'.format(snack['id'], snack['name'])
+        return self.post('/snacks/nominate', {'snack_id': snack_id})
+
+    def run(self):
+        self.login()
+
+        while True:
+            name = random.choices(self.operations, self.weights)[0]
+
+            started = time.monotonic()
+            if started >= self.deadline:
+                return
+
+            try:
+                failed = getattr(self, name)().status_code >= 400
+            except requests.RequestException:
+                failed = True
+            finished = time.monotonic()
+
+            if started >= self.warm_at:
+                self.samples[name].append((finished - started) * 1000)
+                self.errors[name] += failed
+
+
+def run_load(args, base_url, catalog, nominated):
+    """
+    Drive the app with args.users clients and return the report.
+    """
+    weights = parse_mix(args.mix)
+    warm_at = time.monotonic() + args.warmup
+    deadline = warm_at + args.duration
+
+    clients = [
+        LoadTestClient(base_url, 'load-test-{}'.format(i), weights, catalog, nominated,
+                       warm_at, deadline)
+        for i in range(args.users)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    operations = {}
+    all_samples, all_errors = [], 0
+    for name in weights:
+        samples = [s for client in clients for s in client.samples[name]]
+        errors = sum(client.errors[name] for client in clients)
+        operations[name] = summarize(samples, errors, args.duration)
+        all_samples += samples
+        all_errors += errors
+
+    config = {k: v for k, v in vars(args).items() if k not in ('output', 'compare')}
+    return {
+        'commit': get_commit(),
+        'started_at': datetime.datetime.utcnow().isoformat() + 'Z',
+        'config': config,
+        'operations': operations,
+        'total': summarize(all_samples, all_errors, args.duration),
+    }
+
+
+def print_report(report, baseline=None):
+    rows = list(report['operations'].items()) + [('total', report['total'])]
+
+    for name, stats in rows:
+        line = "{name:>14}: {requests:6d} req  {errors:4d} err  {rps:8.1f} req/s".format(
+            name=name, **stats
+        )
+        if stats['requests']:
+            line += "  p50 {p50_ms:7.1f} ms  p95 {p95_ms:7.1f} ms  p99 {p99_ms:7.1f} ms".format(
+                **stats
+            )
+        print(line)
+
+        old = baseline and (baseline['total'] if name == 'total'
+                            else baseline['operations'].get(name))
+        if old and old.get('requests') and stats['requests']:
+            print("{:>14}  {}".format('', "  ".join(
+                "{key} {change:+.1f}%".format(key=key, change=(stats[key] / old[key] - 1) * 100)
+                for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms') if old[key]
+            )))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20, help='Concurrent clients.')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to measure for.')
+    parser.add_argument('--warmup', type=float, default=5, help="Seconds not to measure.")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='operation=weight,...')
+    parser.add_argument('--server', choices=['gunicorn', 'runserver'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=(os.cpu_count() or 1) * 2 + 1)
+    parser.add_argument('--worker-class', default='sync')
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument('--api-latency', type=float, default=0.05)
+    parser.add_argument('--api-error-rate', type=float, default=0.0)
+    parser.add_argument('--catalog-size', type=int, default=200)
+    parser.add_argument('--local-catalog', action='store_true',
+                        help="Serve the stub's catalog from the database, with LocalSnackSource.")
+    parser.add_argument('--request-timing', action='store_true',
+                        help='Enable ServerTimingMiddleware, to measure its overhead.')
+    parser.add_argument('--nominations', type=int, default=50)
+    parser.add_argument('--ballots', type=int, default=2000)
+    parser.add_argument('--app-log',
+                        default=os.path.join(tempfile.gettempdir(), 'snafoo-load-test.log'))
+    parser.add_argument('--output', help='Write the report to this JSON file.')
+    parser.add_argument('--compare', help='Compare with the report in this JSON file.')
+    args = parser.parse_args()
+
+    server = start_stub_server(
+        latency=args.api_latency, error_rate=args.api_error_rate, catalog_size=args.catalog_size
+    )
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='benchmarks.settings')
+    env['BENCHMARK_SNACK_API_BASE'] = server.url
+    if args.request_timing:
+        env['BENCHMARK_REQUEST_TIMING'] = '1'
+    if args.local_catalog:
+        env['BENCHMARK_SNACK_SOURCE'] = 'snacksdb.utils.LocalSnackSource.LocalSnackSource'
+    if 'BENCHMARK_DB_ENGINE' not in env:
+        env['BENCHMARK_DB_NAME'] = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+    os.environ.update(env)
+
+    with server.lock:
+        catalog = list(server.catalog)
+    nominated = seed(args, catalog)
+
+    process, base_url = start_app(args, env)
+    try:
+        report = run_load(args, base_url, catalog, nominated)
+    finally:
+        process.terminate()
+        process.wait()
+        server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
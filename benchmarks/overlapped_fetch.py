@@ -0,0 +1,114 @@
+# vim: ts=4:sw=4:expandtabs
+
+"""
+Compare Vote.get_board() latency with and without overlapped catalog fetches.
+
+    python -m benchmarks.overlapped_fetch --api-latency 0.15 --query-latency 0.02
+
+The snack catalog comes from a stub Snack API that sleeps --api-latency seconds
+per request, and every SQL query sleeps --query-latency seconds, to stand in
+for a database across the network. 'sequential' fetches the catalog and then
+queries the database; 'overlapped' queries the database while the catalog is
+fetched in the background, so the board should take roughly as long as the
+slower of the two rather than their sum.
+"""
+
+__author__ = 'zach.mott@gmail.com'
+
+import argparse
+import statistics
+import time
+
+import django
+from django.conf import settings
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(label, fn, n):
+    samples = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    print("{label:>12}: mean {mean:7.2f} ms  p50 {p50:7.2f} ms  p95 {p95:7.2f} ms".format(
+        label=label, mean=statistics.mean(samples), p50=percentile(samples, 50),
+        p95=percentile(samples, 95),
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--catalog-size', type=int, default=50)
+    parser.add_argument('--api-latency', type=float, default=0.15)
+    parser.add_argument('--query-latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    from benchmarks.stub_snack_api import start_stub_server
+    server = start_stub_server(catalog_size=args.catalog_size, latency=args.api_latency)
+
+    settings.configure(
+        SNACK_BACKEND_API_KEY='benchmark',
+        SNACK_BACKEND_API_BASE=server.url,
+        SNACK_SOURCE_CLASS='snacksdb.utils.SnackAPISource.SnackAPISource',
+        SNACK_SOURCE_CONCURRENT_FETCH=True,
+        SNACK_SOURCE_FETCH_THREADS=4,
+        VOTES_PER_MONTH=3,
+        NOMINATIONS_PER_MONTH=1,
+        INSTALLED_APPS=[
+            'django.contrib.auth',
+            'django.contrib.contenttypes',
+            'django.contrib.messages',
+            'snacksdb',
+        ],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        TIME_ZONE='America/Los_Angeles',
+        USE_TZ=True,
+    )
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import RequestFactory, override_settings
+
+    from snacksdb.models import Ballot, Nomination
+    from snacksdb.utils import get_snack_source
+    from snacksdb.views import Vote
+
+    call_command('migrate', verbosity=0)
+
+    # Nominate and vote for a handful of optional snacks, so the board has work to do.
+    user = get_user_model().objects.create_user('benchmark')
+    optional_ids = [s.id for s in get_snack_source().list() if s.optional]
+    for snack_id in optional_ids[:10]:
+        Nomination.objects.create(user=user, snack_id=snack_id)
+        Ballot.objects.create(user=user, snack_id=snack_id)
+
+    view = Vote()
+    view.request = RequestFactory().get('/')
+    view.request.user = user
+
+    def slow_query(execute, sql, params, many, context):
+        time.sleep(args.query_latency)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(slow_query):
+        # Warm up (imports, the pooled connection, the thread pool) before measuring.
+        view.get_board()
+
+        with override_settings(SNACK_SOURCE_CONCURRENT_FETCH=False):
+            run('sequential', view.get_board, args.requests)
+        with override_settings(SNACK_SOURCE_CONCURRENT_FETCH=True):
+            run('overlapped', view.get_board, args.requests)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# vim: ts=4:sw=4:expandtabs
+
+"""
+Django settings for load tests. See benchmarks.load_test, which sets the
+environment variables below before it starts the app.
+
+    BENCHMARK_SNACK_API_BASE  URL of the (stub) Snack API.
+    BENCHMARK_SNACK_SOURCE    Dotted path to the snack source, if not SnackAPISource.
+    BENCHMARK_REQUEST_TIMING  Set to 1 to enable ServerTimingMiddleware.
+    BENCHMARK_DB_NAME         Path to the SQLite database, or the database name.
+    BENCHMARK_DB_ENGINE       Database backend, if not SQLite. BENCHMARK_DB_HOST,
+                              BENCHMARK_DB_USER and BENCHMARK_DB_PASSWORD apply to it.
+
+Everything else comes from snafoo.settings, so results reflect the settings the
+app is deployed with, except that quotas are raised so that synthetic users can
+keep voting and nominating for the length of a run.
+"""
+
+__author__ = 'zach.mott@gmail.com'
+
+import os
+
+from snafoo.settings import *  # NOQA
+
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+SECRET_KEY = SECRET_KEY or 'benchmark'  # NOQA
+
+SNACK_BACKEND_API_KEY = 'benchmark'
+SNACK_BACKEND_API_BASE = os.environ.get('BENCHMARK_SNACK_API_BASE', 'http://127.0.0.1:8001')
+SNACK_SOURCE_CLASS = os.environ.get('BENCHMARK_SNACK_SOURCE', SNACK_SOURCE_CLASS)  # NOQA
+
+REQUEST_TIMING_ENABLED = os.environ.get('BENCHMARK_REQUEST_TIMING') == '1'
+
+DATABASES = {
+    'default': {
+        'ENGINE': os.environ.get('BENCHMARK_DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ.get('BENCHMARK_DB_NAME', '/tmp/snafoo-benchmark.sqlite3'),
+        'HOST': os.environ.get('BENCHMARK_DB_HOST', ''),
+        'USER': os.environ.get('BENCHMARK_DB_USER', ''),
+        'PASSWORD': os.environ.get('BENCHMARK_DB_PASSWORD', ''),
+    },
+}
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Several workers write to one file; wait for its lock rather than failing.
+    DATABASES['default']['OPTIONS'] = {'timeout': 30}
+
+# Synthetic users log in once per run; don't let password hashing skew the results.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+VOTES_PER_MONTH = 10 ** 6
+NOMINATIONS_PER_MONTH = 10 ** 6
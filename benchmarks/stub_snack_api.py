@@ -0,0 +1,151 @@
+# vim: ts=4:sw=4:expandtabs
+
+"""
+A local stand-in for the Snack Food API, for benchmarks and load tests.
+
+    python -m benchmarks.stub_snack_api --port 8001 --latency 0.05 --catalog-size 500
+
+The stub speaks HTTP/1.1, so clients can keep connections alive. It implements
+GET /snacks and POST /snacks, as described in snacksdb.utils.AbstractSnackSource,
+with configurable latency, error rate and catalog size.
+"""
+
+__author__ = 'zach.mott@gmail.com'
+
+import argparse
+import json
+import random
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+
+def make_catalog(size, mandatory_fraction=0.1):
+    """
+    Return a list of 'size' snack dictionaries in the Snack Food API format.
+    """
+    return [
+        {
+            'id': 1000 + i,
+            'name': "Snack #{i}".format(i=i),
+            'optional': i >= size * mandatory_fraction,
+            'purchaseLocations': 'Stub Mart',
+            'purchaseCount': i % 7,
+            'lastPurchaseDate': '5/{day}/2018'.format(day=1 + i % 28) if i % 3 else None,
+        }
+        for i in range(size)
+    ]
+
+
+class StubSnackAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body go out in separate writes. Without this, keep-alive
+    # clients would stall on delayed ACKs and make connection reuse look slow.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *pos):
+        pass  # Keep benchmark output clean.
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def simulate_upstream(self):
+        """
+        Sleep for the configured latency and return True if this request should fail.
+        """
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        return random.random() < self.server.error_rate
+
+    def do_GET(self):
+        if self.path.rstrip('/') != '/snacks':
+            return self.send_json(404, {})
+        if self.simulate_upstream():
+            return self.send_json(503, {})
+
+        with self.server.lock:
+            catalog = list(self.server.catalog)
+
+        self.send_json(200, catalog)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            data = json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            return self.send_json(400, {})
+
+        if self.path.rstrip('/') != '/snacks':
+            return self.send_json(404, {})
+        if self.simulate_upstream():
+            return self.send_json(503, {})
+        if not data.get('name') or not data.get('location'):
+            return self.send_json(400, {})
+
+        with self.server.lock:
+            if any(s['name'] == data['name'] for s in self.server.catalog):
+                return self.send_json(409, {})
+
+            snack = {
+                'id': max([s['id'] for s in self.server.catalog] or [999]) + 1,
+                'name': data['name'],
+                'optional': True,
+                'purchaseLocations': data['location'],
+                'purchaseCount': 0,
+                'lastPurchaseDate': None,
+            }
+            self.server.catalog.append(snack)
+
+        self.send_json(200, snack)
+
+
+class StubSnackAPIServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, error_rate=0.0, catalog_size=50):
+        super().__init__(address, StubSnackAPIHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.catalog = make_catalog(catalog_size)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return "http://{host}:{port}".format(host=host, port=port)
+
+
+def start_stub_server(host='127.0.0.1', port=0, **kw):
+    """
+    Start a StubSnackAPIServer in a daemon thread and return it.
+    Call server.shutdown() to stop it.
+    """
+    server = StubSnackAPIServer((host, port), **kw)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds per request.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of 503s.')
+    parser.add_argument('--catalog-size', type=int, default=50)
+    args = parser.parse_args()
+
+    server = StubSnackAPIServer(
+        (args.host, args.port), latency=args.latency,
+        error_rate=args.error_rate, catalog_size=args.catalog_size
+    )
+    print("Stub Snack API listening on {url}".format(url=server.url))
+    server.serve_forever()
@@ -0,0 +1,168 @@
+# vim: ts=4:sw=4:expandtabs
+
+"""
+Compare vote trend reports computed with Python loops and with VoteAnalytics.
+
+    python -m benchmarks.vote_analytics --ballots 3000000 --months 36 --snacks 200
+
+Seeds a fresh SQLite database (see benchmarks.settings) with synthetic ballots and
+nominations spread over --months months, then times each way of computing votes
+per snack per month and win rates:
+
+    python   Reads rows from values_list() into a list, counts them with a
+             collections.Counter and finds each month's winners with dictionaries.
+    numpy    VoteAnalytics: streams the same rows into NumPy arrays and groups
+             them with vectorized operations.
+
+Both read the same rows, so 'load' is mostly the database and the driver; the
+difference is in 'compute'. Peak RSS is this process's, after both have run.
+"""
+
+__author__ = 'zach.mott@gmail.com'
+
+import argparse
+import collections
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux, but bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def seed(args):
+    """
+    Create the database and fill it with synthetic ballots and nominations.
+    """
+    import django
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from snacksdb.models import Ballot, Nomination
+
+    call_command('migrate', verbosity=0, interactive=False)
+
+    User = get_user_model()
+    User.objects.bulk_create([User(username='analytics-{}'.format(i)) for i in range(100)])
+    user_ids = list(User.objects.values_list('id', flat=True))
+
+    periods = []
+    year, month = 2015, 1
+    for i in range(args.months):
+        periods.append(year * 100 + month)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    now = timezone.now()
+    snack_ids = list(range(1000, 1000 + args.snacks))
+    nominated = {period: random.sample(snack_ids, min(20, args.snacks)) for period in periods}
+
+    Nomination.objects.bulk_create([
+        Nomination(user_id=random.choice(user_ids), snack_id=snack_id, period=period)
+        for period, snacks in nominated.items() for snack_id in snacks
+    ])
+
+    # Model instances are far too slow to create by the million; insert rows directly.
+    sql = 'INSERT INTO {table} (created, modified, period, user_id, snack_id) ' \
+          'VALUES (%s, %s, %s, %s, %s)'.format(table=Ballot._meta.db_table)
+    batch = 100000
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, args.ballots, batch):
+            rows = []
+            for i in range(start, min(start + batch, args.ballots)):
+                period = periods[i % len(periods)]
+                rows.append((
+                    now, now, period, random.choice(user_ids), random.choice(nominated[period])
+                ))
+            cursor.executemany(sql, rows)
+
+
+def python_reports():
+    from snacksdb.models import Ballot, Nomination
+
+    started = time.perf_counter()
+    ballots = list(
+        Ballot.objects.order_by().values_list('period', 'snack_id').iterator(chunk_size=10000)
+    )
+    up_for = set(Nomination.objects.order_by().values_list('period', 'snack_id'))
+    loaded = time.perf_counter()
+
+    votes = collections.Counter(ballots)
+    most_votes = {}
+    for (period, snack_id), total in votes.items():
+        most_votes[period] = max(most_votes.get(period, 0), total)
+
+    months, wins = collections.Counter(), collections.Counter()
+    for period, snack_id in up_for | set(votes):
+        months[snack_id] += 1
+    for (period, snack_id), total in votes.items():
+        if total == most_votes[period]:
+            wins[snack_id] += 1
+
+    votes_by_month = sorted((period, snack_id, n) for (period, snack_id), n in votes.items())
+    win_rates = sorted((s, months[s], wins[s], round(wins[s] / months[s], 4)) for s in months)
+
+    return loaded - started, time.perf_counter() - loaded, votes_by_month, win_rates
+
+
+def numpy_reports():
+    from snacksdb.utils.VoteAnalytics import VoteAnalytics
+
+    analytics = VoteAnalytics()
+
+    started = time.perf_counter()
+    ballots = analytics.load_ballots()
+    nominations = analytics.load_nominations()
+    loaded = time.perf_counter()
+
+    # Reuse the loaded columns, so that 'compute' times only the group-bys.
+    analytics.load_ballots = lambda: ballots
+    analytics.load_nominations = lambda: nominations
+    votes_by_month = analytics.votes_by_month()[1]
+    win_rates = analytics.win_rates()[1]
+
+    return loaded - started, time.perf_counter() - loaded, votes_by_month, win_rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ballots', type=int, default=3000000)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--snacks', type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCHMARK_DB_NAME'] = os.path.join(tempfile.mkdtemp(), 'analytics.sqlite3')
+
+    started = time.perf_counter()
+    seed(args)
+    print("Seeded {n} ballots in {s:.1f} s.".format(
+        n=args.ballots, s=time.perf_counter() - started
+    ))
+
+    results = {}
+    for label, fn in [('python', python_reports), ('numpy', numpy_reports)]:
+        load, compute, votes_by_month, win_rates = fn()
+        results[label] = (votes_by_month, win_rates)
+        print("{label:>8}: load {load:7.2f} s  compute {compute:7.3f} s  "
+              "total {total:7.2f} s".format(
+                  label=label, load=load, compute=compute, total=load + compute
+              ))
+
+    if results['python'] != results['numpy']:
+        print('Warning: the reports differ!')
+
+    print("Peak RSS: {rss:.1f} MB".format(rss=peak_rss_mb()))
+
+
+if __name__ == '__main__':
+    main()
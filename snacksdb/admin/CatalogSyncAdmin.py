@@ -0,0 +1,15 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.contrib import admin
+
+from snacksdb.models import CatalogSync
+
+
+class CatalogSyncAdmin(admin.ModelAdmin):
+    list_display = ['id', 'last_success', 'last_attempt', 'failures', 'snacks']
+    readonly_fields = [
+        'last_attempt', 'last_success', 'last_error', 'failures',
+        'snacks', 'created', 'updated', 'removed',
+    ]
@@ -0,0 +1,21 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.contrib import admin
+
+from snacksdb.models import MonthSummary, SnackSummary
+
+
+class SnackSummaryInline(admin.TabularInline):
+    model = SnackSummary
+    fields = ['rank', 'snack_id', 'name', 'votes', 'nominations']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+class MonthSummaryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'period', 'votes', 'voters', 'nominations', 'closed']
+    readonly_fields = ['period', 'closed', 'votes', 'voters', 'nominations']
+    inlines = [SnackSummaryInline]
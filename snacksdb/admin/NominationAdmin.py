@@ -8,7 +8,7 @@ from snacksdb.models import Nomination
 
 
 class NominationAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'snack_id', 'created']
-    list_filter = ['created']
+    list_display = ['id', 'user', 'snack_id', 'period', 'created']
+    list_filter = ['period', 'created']
     raw_id_fields = ['user']
     search_fields = ['user__username']
@@ -0,0 +1,13 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.contrib import admin
+
+from snacksdb.models import Snack
+
+
+class SnackAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'optional', 'purchase_count', 'last_purchase_date']
+    list_filter = ['optional']
+    search_fields = ['name', 'purchase_locations']
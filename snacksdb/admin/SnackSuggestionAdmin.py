@@ -0,0 +1,14 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.contrib import admin
+
+from snacksdb.models import SnackSuggestion
+
+
+class SnackSuggestionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'name', 'status', 'attempts', 'snack_id', 'created']
+    list_filter = ['status', 'created']
+    raw_id_fields = ['user', 'nomination']
+    search_fields = ['user__username', 'name']
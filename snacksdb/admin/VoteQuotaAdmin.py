@@ -0,0 +1,14 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.contrib import admin
+
+from snacksdb.models import VoteQuota
+
+
+class VoteQuotaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'period', 'remaining']
+    list_filter = ['period']
+    raw_id_fields = ['user']
+    search_fields = ['user__username']
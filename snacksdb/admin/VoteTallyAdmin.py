@@ -0,0 +1,13 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.contrib import admin
+
+from snacksdb.models import VoteTally
+
+
+class VoteTallyAdmin(admin.ModelAdmin):
+    list_display = ['id', 'period', 'snack_id', 'total']
+    list_filter = ['period']
+    search_fields = ['snack_id']
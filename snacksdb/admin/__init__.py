@@ -6,11 +6,23 @@ from django.contrib import admin
 
 from .NominationAdmin import Nomination, NominationAdmin
 from .BallotAdmin import Ballot, BallotAdmin
+from .CatalogSyncAdmin import CatalogSync, CatalogSyncAdmin
+from .MonthSummaryAdmin import MonthSummary, MonthSummaryAdmin
+from .SnackAdmin import Snack, SnackAdmin
+from .SnackSuggestionAdmin import SnackSuggestion, SnackSuggestionAdmin
+from .VoteQuotaAdmin import VoteQuota, VoteQuotaAdmin
+from .VoteTallyAdmin import VoteTally, VoteTallyAdmin
 
 
 models_to_register = [
     (Nomination, NominationAdmin),
     (Ballot, BallotAdmin),
+    (CatalogSync, CatalogSyncAdmin),
+    (MonthSummary, MonthSummaryAdmin),
+    (Snack, SnackAdmin),
+    (SnackSuggestion, SnackSuggestionAdmin),
+    (VoteQuota, VoteQuotaAdmin),
+    (VoteTally, VoteTallyAdmin),
 ]
 
 
@@ -1,20 +1,122 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_save
-
-from django.core.cache import cache
+from django.conf import settings
+from django.db import transaction
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
 
 
 class SnacksDBConfig(AppConfig):
     name = 'snacksdb'
 
     def ready(self):
-        post_save.connect(clear_cache, sender=self.get_model('Nomination'))
+        from snacksdb.utils import get_snack_source_class
+
+        # Fail at startup, not on the first request, if SNACK_SOURCE_CLASS is wrong.
+        get_snack_source_class()
+        setting_changed.connect(reset_snack_source)
+
+        for model_name in ['Ballot', 'Nomination']:
+            post_save.connect(spend_quota, sender=self.get_model(model_name))
+            post_delete.connect(refund_quota, sender=self.get_model(model_name))
+            post_save.connect(bump_board_version, sender=self.get_model(model_name))
+            post_delete.connect(bump_board_version, sender=self.get_model(model_name))
 
+        post_save.connect(record_nomination, sender=self.get_model('Nomination'))
+        post_delete.connect(discard_nomination, sender=self.get_model('Nomination'))
+        post_delete.connect(release_ballot, sender=self.get_model('Ballot'))
+        post_save.connect(publish_tally, sender=self.get_model('Ballot'))
+        post_delete.connect(publish_tally, sender=self.get_model('Ballot'))
 
-def clear_cache(sender, instance, created, **kw):
+
+def reset_snack_source(setting, **kw):
     """
-    Each time we save a new Nomination, clear that user's monthly nomination
-    count from the cache so that it can be recalculated.
+    Each time a snack source setting changes (as in tests), discard
+    the process's snack source, which may have read the old value.
+    """
+    from snacksdb import utils
+
+    if setting.startswith(('SNACK_SOURCE_', 'SNACK_CACHE_', 'SNACK_BACKEND_', 'SNACK_MIRROR_')):
+        utils.reset_snack_source()
+
+
+def bump_board_version(sender, instance, **kw):
+    """
+    Each time we save or delete a Ballot or Nomination, record that the
+    vote board changed, once the transaction that changed it commits.
+    """
+    from snacksdb.utils import board_version
+
+    transaction.on_commit(lambda: board_version.bump(instance.period))
+
+
+def publish_tally(sender, instance, created=True, **kw):
+    """
+    Each time we save a new Ballot or delete one, publish its snack's new total
+    to the vote tally stream, once the transaction that changed it commits.
+    """
+    from snacksdb.utils import tally_channel
+
+    if created and settings.VOTE_STREAM_ENABLED:
+        period, snack_id = instance.period, instance.snack_id
+        transaction.on_commit(lambda: tally_channel.publish_tally(period, snack_id))
+
+
+def record_nomination(sender, instance, **kw):
+    """
+    Each time we save a Nomination of a snack (a new one, or a pending one that
+    has been given its snack), add the snack to the period's cached set of
+    nominated snacks, once the transaction that saved it commits.
+    """
+    from snacksdb.utils import nominated_snacks
+
+    if instance.snack_id is not None:
+        # Views may save snack IDs as they were posted, i.e. as strings.
+        period, snack_id = instance.period, int(instance.snack_id)
+        transaction.on_commit(lambda: nominated_snacks.add(snack_id, period))
+
+
+def discard_nomination(sender, instance, **kw):
+    """
+    Each time we delete a Nomination, drop the period's cached set of nominated
+    snacks (the snack may have been nominated more than once), once the
+    transaction that deleted it commits.
+    """
+    from snacksdb.utils import nominated_snacks
+
+    transaction.on_commit(lambda: nominated_snacks.discard(instance.period))
+
+
+def get_quota_ledger(sender):
+    from snacksdb.utils import nomination_ledger, vote_ledger
+
+    return vote_ledger if sender._meta.model_name == 'ballot' else nomination_ledger
+
+
+def spend_quota(sender, instance, created, **kw):
+    """
+    Each time we save a new Ballot or Nomination, take it out of that user's
+    cached monthly balance, once the transaction that saved it commits.
     """
     if created:
-        cache.delete(sender.get_monthly_nomination_cache_key(instance.user.pk))
+        ledger = get_quota_ledger(sender)
+        transaction.on_commit(lambda: ledger.spend(instance.user_id, instance.period))
+
+
+def refund_quota(sender, instance, **kw):
+    """
+    Each time we delete a Ballot or Nomination, give it back to that user's
+    cached monthly balance, once the transaction that deleted it commits.
+    """
+    ledger = get_quota_ledger(sender)
+    transaction.on_commit(lambda: ledger.refund(instance.user_id, instance.period))
+
+
+def release_ballot(sender, instance, **kw):
+    """
+    Each time we delete a Ballot, remove its vote from its snack's VoteTally,
+    and give the vote back to the user who cast it.
+    """
+    from snacksdb.models import VoteQuota, VoteTally
+
+    VoteTally.decrement(instance.period, instance.snack_id)
+    VoteQuota.refund(instance.user_id, instance.period)
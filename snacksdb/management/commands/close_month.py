@@ -0,0 +1,84 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from snacksdb.models import BallotReceipt, MonthSummary
+from snacksdb.utils import ballot_buffer, get_period, get_snack_source, SnackSourceException
+
+
+class Command(BaseCommand):
+    help = (
+        "Close a month: snapshot its final vote totals and nominations into a MonthSummary, "
+        "which the results history page reads. Closes last month by default, and does "
+        "nothing if it's already closed, so it's safe to run on a schedule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period', type=int, help='Close this YYYYMM period, rather than last month.'
+        )
+        parser.add_argument(
+            '--replace', action='store_true',
+            help='Close the month again if it has already been closed, replacing its results.'
+        )
+
+    def handle(self, *pos, **options):
+        period = options['period'] or self.previous_period(get_period())
+
+        if period % 100 not in range(1, 13):
+            raise CommandError("{period} isn't a YYYYMM period.".format(period=period))
+        if period >= get_period():
+            raise CommandError("{period} hasn't ended yet.".format(period=period))
+
+        if not options['replace'] and MonthSummary.objects.filter(period=period).exists():
+            self.stdout.write("{period} is already closed.".format(period=period))
+            return
+
+        if settings.VOTE_BUFFER_ENABLED:
+            self.flush_buffered_votes(period)
+
+        summary = MonthSummary.close(period, self.get_snack_names())
+
+        self.stdout.write(
+            "Closed {s.period}: {s.votes} vote(s) by {s.voters} user(s), "
+            "{s.nominations} nomination(s), {n} snack(s).".format(
+                s=summary, n=summary.snacks.count()
+            )
+        )
+
+    def flush_buffered_votes(self, period):
+        """
+        Write this machine's buffered votes to the database, so that they're counted.
+        Raise CommandError if the period still has votes waiting in a buffer, e.g.
+        on another app server, rather than close it without them.
+        """
+        ballot_buffer.flush()
+
+        waiting = BallotReceipt.objects.filter(period=period).count()
+        if waiting:
+            raise CommandError(
+                "{period} has {waiting} buffered vote(s) that haven't been flushed yet. "
+                "Close it once they have.".format(period=period, waiting=waiting)
+            )
+
+    def get_snack_names(self):
+        """
+        Return a dictionary of {snack_id: name, ...} from the snack source. If the source
+        fails, warn and return an empty dictionary: the results are still worth keeping,
+        and closing the month again with --replace fills in the names.
+        """
+        try:
+            return {snack.id: snack.name for snack in get_snack_source().list()}
+        except SnackSourceException as sse:
+            self.stderr.write("Couldn't fetch snack names: {msg}".format(msg=sse.msg))
+            return {}
+
+    def previous_period(self, period):
+        """
+        Return the YYYYMM period before the given one.
+        """
+        year, month = divmod(period, 100)
+        return (year - 1) * 100 + 12 if month == 1 else period - 1
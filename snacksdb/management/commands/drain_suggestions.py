@@ -0,0 +1,69 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from snacksdb.utils import SuggestionOutbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Submit the snack suggestions queued by nominations (see SNACK_SUGGESTION_OUTBOX) '
+        'to the snack source, once or, with --loop, forever.'
+    )
+
+    DEFAULT_INTERVAL = 5
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep draining every --interval seconds until interrupted.'
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            help='Seconds between drains with --loop. Defaults to '
+                 'SNACK_SUGGESTION_DRAIN_INTERVAL.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int,
+            help='Suggestions to submit at once. Defaults to SNACK_SUGGESTION_CONCURRENCY.'
+        )
+
+    def handle(self, *pos, **options):
+        outbox = SuggestionOutbox(concurrency=options['concurrency'])
+
+        if not options['loop']:
+            self.drain(outbox)
+            return
+
+        interval = options['interval']
+        if interval is None:
+            interval = getattr(settings, 'SNACK_SUGGESTION_DRAIN_INTERVAL', self.DEFAULT_INTERVAL)
+
+        while True:
+            started = time.monotonic()
+            try:
+                self.drain(outbox, quiet=True)
+            finally:
+                # Don't hold a database connection open between drains.
+                connections.close_all()
+
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+
+    def drain(self, outbox, quiet=False):
+        outcomes = outbox.drain()
+        if quiet and not outcomes:
+            return
+
+        self.stdout.write("Drained {n} suggestion(s): {outcomes}.".format(
+            n=sum(outcomes.values()),
+            outcomes=', '.join(
+                "{count} {outcome}".format(count=count, outcome=outcome)
+                for outcome, count in sorted(outcomes.items())
+            ) or 'none due',
+        ))
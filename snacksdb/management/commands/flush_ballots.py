@@ -0,0 +1,56 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from snacksdb.utils import ballot_buffer
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the votes waiting in the ballot buffer (see VOTE_BUFFER_ENABLED) to the '
+        'database, once or, with --loop, forever. Safe to run again after a crash.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep flushing every --interval seconds until interrupted.'
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            help='Seconds between flushes with --loop. Defaults to VOTE_BUFFER_FLUSH_INTERVAL.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Ballots to insert per transaction. Defaults to VOTE_BUFFER_BATCH_SIZE.'
+        )
+
+    def handle(self, *pos, **options):
+        if not options['loop']:
+            self.flush(options['batch_size'])
+            return
+
+        interval = options['interval']
+        if interval is None:
+            interval = settings.VOTE_BUFFER_FLUSH_INTERVAL
+
+        while True:
+            started = time.monotonic()
+            try:
+                self.flush(options['batch_size'], quiet=True)
+            finally:
+                # Don't hold a database connection open between flushes.
+                connections.close_all()
+
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+
+    def flush(self, batch_size, quiet=False):
+        flushed = ballot_buffer.flush(batch_size)
+        if flushed or not quiet:
+            self.stdout.write("Flushed {n} ballot(s).".format(n=flushed))
@@ -0,0 +1,96 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from snacksdb.models import Ballot, VoteTally
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or, with --verify, check) vote tallies from the raw Ballots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period', type=int, action='append', dest='periods',
+            help='Only consider this YYYYMM period. May be given more than once.'
+        )
+        parser.add_argument(
+            '--verify', action='store_true',
+            help="Report tallies that don't match the Ballots, but don't change them."
+        )
+
+    def handle(self, *pos, **options):
+        periods = options['periods']
+
+        with transaction.atomic():
+            expected = self.count_ballots(periods)
+            actual = self.read_tallies(periods)
+            drift = {
+                key: (actual.get(key, 0), expected.get(key, 0))
+                for key in set(expected) | set(actual)
+                if actual.get(key, 0) != expected.get(key, 0)
+            }
+
+            tmpl = "{period} snack {snack_id}: tally {found}, ballots {counted}"
+            for (period, snack_id), (found, counted) in sorted(drift.items()):
+                self.stdout.write(tmpl.format(
+                    period=period, snack_id=snack_id, found=found, counted=counted
+                ))
+
+            if options['verify']:
+                if drift:
+                    raise CommandError("{n} tally(ies) drifted.".format(n=len(drift)))
+                self.stdout.write('All tallies match.')
+                return
+
+            tallies = VoteTally.objects.all()
+            if periods:
+                tallies = tallies.filter(period__in=periods)
+
+            # Rebuilt tallies carry on from their old versions, which clients may have seen.
+            versions = {
+                (period, snack_id): version for period, snack_id, version
+                in tallies.values_list('period', 'snack_id', 'version')
+            }
+            tallies.delete()
+
+            VoteTally.objects.bulk_create([
+                VoteTally(
+                    period=period, snack_id=snack_id, total=total,
+                    version=versions.get((period, snack_id), 0) + 1
+                )
+                for (period, snack_id), total in expected.items()
+            ], batch_size=500)
+
+        self.stdout.write("Rebuilt {n} tally(ies); {d} had drifted.".format(
+            n=len(expected), d=len(drift)
+        ))
+
+    def count_ballots(self, periods=None):
+        """
+        Return a dictionary of {(period, snack_id): total_votes, ...} computed from the Ballots.
+        """
+        ballots = Ballot.objects.all()
+        if periods:
+            ballots = ballots.filter(period__in=periods)
+
+        return {
+            (item['period'], item['snack_id']): item['total']
+            for item in ballots.values('period', 'snack_id').annotate(total=Count('id'))
+        }
+
+    def read_tallies(self, periods=None):
+        """
+        Return a dictionary of {(period, snack_id): total_votes, ...} read from VoteTally.
+        """
+        tallies = VoteTally.objects.all()
+        if periods:
+            tallies = tallies.filter(period__in=periods)
+
+        return {
+            (period, snack_id): total
+            for period, snack_id, total in tallies.values_list('period', 'snack_id', 'total')
+        }
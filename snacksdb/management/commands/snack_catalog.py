@@ -0,0 +1,113 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, IntegrityError, transaction
+from django.utils import timezone
+
+from snacksdb.models import Snack
+from snacksdb.utils import SnackAPISource, SnackSourceException
+
+
+class Command(BaseCommand):
+    help = (
+        'Import the local snack catalog (used by LocalSnackSource) from, or export it '
+        'to, a JSON file of snacks in the format described in AbstractSnackSource.list.'
+    )
+
+    # The Snack fields that snack dictionaries carry.
+    IMPORTED_FIELDS = [
+        'name', 'optional', 'purchase_locations', 'purchase_count', 'last_purchase_date'
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['import', 'export'])
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='JSON file to read or write. Defaults to stdin or stdout.'
+        )
+        parser.add_argument(
+            '--from-api', action='store_true',
+            help='Import the catalog from the Snack Food API, rather than from a file.'
+        )
+        parser.add_argument(
+            '--replace', action='store_true',
+            help='Remove snacks that are missing from the imported catalog.'
+        )
+
+    def handle(self, *pos, **options):
+        if options['action'] == 'export':
+            return self.export_catalog(options['path'])
+
+        self.import_catalog(self.read_catalog(options), options['replace'])
+
+    def read_catalog(self, options):
+        """
+        Return a list of snack dictionaries from the Snack Food API or a JSON file.
+        """
+        if options['from_api']:
+            try:
+                return [snack.to_dict() for snack in SnackAPISource().list()]
+            except SnackSourceException as sse:
+                raise CommandError(sse.msg)
+
+        try:
+            if options['path'] == '-':
+                return json.load(sys.stdin)
+            with open(options['path']) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError("Couldn't read {path}: {e}".format(path=options['path'], e=e))
+
+    def import_catalog(self, catalog, replace=False):
+        try:
+            snacks = [Snack.from_dict(snack) for snack in catalog]
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        created = updated = removed = 0
+
+        try:
+            with transaction.atomic():
+                if replace:
+                    removed = Snack.objects.exclude(id__in=[s.id for s in snacks]).delete()[0]
+
+                existing_ids = set(Snack.objects.values_list('id', flat=True))
+                for snack in snacks:
+                    if snack.id in existing_ids:
+                        Snack.objects.filter(id=snack.id).update(modified=timezone.now(), **{
+                            field: getattr(snack, field) for field in self.IMPORTED_FIELDS
+                        })
+                        updated += 1
+
+                new_snacks = [s for s in snacks if s.id not in existing_ids]
+                Snack.objects.bulk_create(new_snacks, batch_size=500)
+                created = len(new_snacks)
+
+                # Snacks keep their IDs, so make sure suggestions don't reuse them.
+                with connection.cursor() as cursor:
+                    for sql in connection.ops.sequence_reset_sql(no_style(), [Snack]):
+                        cursor.execute(sql)
+        except IntegrityError as e:
+            raise CommandError("Couldn't import the catalog: {e}".format(e=e))
+
+        self.stdout.write("Imported {n} snack(s): {c} new, {u} updated, {r} removed.".format(
+            n=len(snacks), c=created, u=updated, r=removed
+        ))
+
+    def export_catalog(self, path):
+        catalog = [snack.to_dict() for snack in Snack.objects.all()]
+
+        if path == '-':
+            self.stdout.write(json.dumps(catalog, indent=2))
+            return
+
+        with open(path, 'w') as f:
+            json.dump(catalog, f, indent=2)
+
+        self.stdout.write("Exported {n} snack(s) to {path}.".format(n=len(catalog), path=path))
@@ -0,0 +1,95 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from snacksdb.models import CatalogSync
+from snacksdb.utils import CatalogMirror, MirrorSnackSource, SnackSourceException
+
+
+class Command(BaseCommand):
+    help = (
+        'Sync the local snack catalog mirror (used by MirrorSnackSource) with the '
+        'Snack Food API, once or, with --loop, forever. With --check, report whether '
+        'the mirror is up to date instead, for monitoring.'
+    )
+
+    DEFAULT_INTERVAL = 60
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep syncing every --interval seconds until interrupted.'
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            help='Seconds between syncs with --loop. Defaults to SNACK_MIRROR_SYNC_INTERVAL.'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Don't sync. Exit with an error if the mirror is older than "
+                 "SNACK_MIRROR_MAX_STALENESS seconds, or has never been synced."
+        )
+
+    def handle(self, *pos, **options):
+        if options['check']:
+            return self.check_mirror()
+
+        mirror = CatalogMirror()
+
+        if not options['loop']:
+            try:
+                self.sync(mirror)
+            except SnackSourceException as sse:
+                raise CommandError(sse.msg)
+            return
+
+        interval = options['interval']
+        if interval is None:
+            interval = getattr(settings, 'SNACK_MIRROR_SYNC_INTERVAL', self.DEFAULT_INTERVAL)
+
+        while True:
+            started = time.monotonic()
+            try:
+                self.sync(mirror)
+            except SnackSourceException as sse:
+                # The failure is recorded in CatalogSync; try again next time.
+                self.stderr.write("Sync failed: {msg}".format(msg=sse.msg))
+            finally:
+                # Don't hold a database connection open between syncs.
+                connections.close_all()
+
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+
+    def sync(self, mirror):
+        status = mirror.sync()
+        self.stdout.write("Synced {n} snack(s): {c} new, {u} updated, {r} removed.".format(
+            n=status.snacks, c=status.created, u=status.updated, r=status.removed
+        ))
+
+    def check_mirror(self):
+        status = CatalogSync.get()
+        max_staleness = datetime.timedelta(seconds=getattr(
+            settings, 'SNACK_MIRROR_MAX_STALENESS', MirrorSnackSource.DEFAULT_MAX_STALENESS
+        ))
+        lag = status.get_lag()
+
+        if lag is None:
+            raise CommandError('The snack catalog mirror has never been synced.')
+
+        msg = "Last synced {lag:.0f} second(s) ago; {f} failure(s) since.".format(
+            lag=lag.total_seconds(), f=status.failures
+        )
+        if status.last_error:
+            msg += " Last error: {error}".format(error=status.last_error)
+
+        if lag > max_staleness:
+            raise CommandError('The snack catalog mirror is stale. ' + msg)
+
+        self.stdout.write('The snack catalog mirror is up to date. ' + msg)
@@ -0,0 +1,78 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import csv
+import datetime
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from snacksdb.utils import get_snack_source, SnackSourceException
+
+
+class Command(BaseCommand):
+    help = (
+        'Write a trend report over past months of votes and nominations, as CSV or JSON: '
+        "'votes' (votes per snack per month), 'wins' (how often each snack won the months "
+        "it was up for) or 'purchases' (days from each snack's first nomination to its "
+        'last purchase).'
+    )
+
+    REPORTS = {
+        'votes': 'votes_by_month',
+        'wins': 'win_rates',
+        'purchases': 'time_to_purchase',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('report', choices=sorted(self.REPORTS))
+        parser.add_argument(
+            'path', nargs='?', default='-', help='File to write. Defaults to stdout.'
+        )
+        parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+        parser.add_argument('--since', type=int, help='First YYYYMM period to include.')
+        parser.add_argument('--until', type=int, help='Last YYYYMM period to include.')
+
+    def handle(self, *pos, **options):
+        # VoteAnalytics needs NumPy, which only this command uses, so it isn't
+        # exported from snacksdb.utils for every process to load.
+        from snacksdb.utils.VoteAnalytics import VoteAnalytics
+
+        analytics = VoteAnalytics(since=options['since'], until=options['until'])
+        report = getattr(analytics, self.REPORTS[options['report']])
+
+        if options['report'] == 'purchases':
+            try:
+                header, rows = report(get_snack_source().list())
+            except SnackSourceException as sse:
+                raise CommandError(sse.msg)
+        else:
+            header, rows = report()
+
+        if options['path'] == '-':
+            self.write_report(self.stdout, header, rows, options['format'])
+            return
+
+        with open(options['path'], 'w', newline='') as f:
+            self.write_report(f, header, rows, options['format'])
+
+        self.stdout.write("Wrote {n} row(s) to {path}.".format(n=len(rows), path=options['path']))
+
+    def write_report(self, f, header, rows, format):
+        if format == 'json':
+            json.dump([dict(zip(header, row)) for row in rows], f, default=self.encode, indent=2)
+            return
+
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    @staticmethod
+    def encode(value):
+        """
+        Encode the values json can't: dates, in ISO 8601 format.
+        """
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        raise TypeError("{value!r} isn't JSON serializable".format(value=value))
@@ -0,0 +1,119 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import json
+import logging
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from snacksdb.utils import RequestTimer, deactivate_request_timer, get_request_timer
+
+
+logger = logging.getLogger('snacksdb.timing')
+
+
+class ServerTimingMiddleware(object):
+    """
+    Times the phases of each request (SQL, the Snack API, waiting for the snack
+    catalog, template rendering) and reports them in a Server-Timing header and
+    a JSON log line on the 'snacksdb.timing' logger, along with the request's ID
+    and number of queries.
+
+    Enabled by settings.REQUEST_TIMING_ENABLED. When it's off, the middleware
+    removes itself from the chain, and the phase hooks in the snack sources and
+    views reduce to a thread-local lookup.
+    """
+    # Phases, in the order they're reported, with their descriptions.
+    PHASES = [
+        ('db', 'SQL'),
+        ('snack-api', 'Snack API'),
+        ('catalog', 'Waiting for catalog'),
+        ('render', 'Templates'),
+    ]
+
+    # Incoming request IDs are logged verbatim, so only accept tame ones.
+    REQUEST_ID_RE = re.compile(r'^[\w.-]{1,64}$')
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.id = self.get_request_id(request)
+
+        timer = RequestTimer()
+        previous = timer.activate()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer.time_query))
+                response = self.get_response(request)
+        finally:
+            deactivate_request_timer(previous)
+
+        total = timer.elapsed()
+        response['Server-Timing'] = self.format_header(timer, total)
+        response['X-Request-ID'] = request.id
+        self.log(request, response, timer, total)
+
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        Time the rendering of TemplateResponses, which happens after the view returns.
+        """
+        timer = get_request_timer()
+        started = time.perf_counter()
+
+        def rendered(response):
+            timer.add('render', time.perf_counter() - started)
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def get_request_id(self, request):
+        """
+        Return the request's ID, from the front end's request ID header if it sent
+        one (see settings.REQUEST_ID_HEADER), or a new one otherwise.
+        """
+        request_id = request.META.get(settings.REQUEST_ID_HEADER, '')
+
+        if self.REQUEST_ID_RE.match(request_id):
+            return request_id
+
+        return uuid.uuid4().hex
+
+    def format_header(self, timer, total):
+        metrics = []
+        for name, desc in self.PHASES:
+            if name in timer.phases:
+                if name == 'db':
+                    desc = "{desc} ({n} queries)".format(desc=desc, n=timer.queries)
+                metrics.append('{name};dur={dur:.1f};desc="{desc}"'.format(
+                    name=name, dur=timer.phases[name] * 1000, desc=desc
+                ))
+
+        metrics.append('total;dur={dur:.1f}'.format(dur=total * 1000))
+        return ', '.join(metrics)
+
+    def log(self, request, response, timer, total):
+        logger.info(json.dumps({
+            'request_id': request.id,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'queries': timer.queries,
+            'phases_ms': {
+                name: round(seconds * 1000, 1) for name, seconds in timer.phases.items()
+            },
+        }, sort_keys=True))
@@ -0,0 +1,5 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from .ServerTimingMiddleware import ServerTimingMiddleware
@@ -0,0 +1,56 @@
+# Generated by Django 2.0.5 on 2026-10-17 07:37
+
+from collections import Counter
+
+import pytz
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def get_period(when):
+    """
+    Return the YYYYMM period that contains the given datetime in the configured
+    local time zone. A frozen copy of snacksdb.utils.get_period, so that this
+    migration doesn't change along with the app.
+    """
+    when = timezone.localtime(when, pytz.timezone(settings.TIME_ZONE))
+    return when.year * 100 + when.month
+
+
+def tally_existing_ballots(apps, schema_editor):
+    Ballot = apps.get_model('snacksdb', 'Ballot')
+    VoteTally = apps.get_model('snacksdb', 'VoteTally')
+
+    counts = Counter(
+        (get_period(created), snack_id)
+        for created, snack_id in Ballot.objects.values_list('created', 'snack_id').iterator()
+    )
+
+    VoteTally.objects.bulk_create([
+        VoteTally(period=period, snack_id=snack_id, total=total)
+        for (period, snack_id), total in counts.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snacksdb', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteTally',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.PositiveIntegerField(help_text='Year and month of the tally, as YYYYMM.')),
+                ('snack_id', models.PositiveIntegerField(help_text='ID of the snack being tallied.', verbose_name='Snack ID')),
+                ('total', models.PositiveIntegerField(default=0, help_text='Number of votes the snack received during the period.')),
+            ],
+            options={
+                'unique_together': {('period', 'snack_id')},
+            },
+        ),
+        migrations.RunPython(tally_existing_ballots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 2.0.5 on 2026-10-17 07:38
+
+from collections import defaultdict
+
+import pytz
+from django.conf import settings
+from django.db import migrations, models, transaction
+from django.utils import timezone
+import snacksdb.utils
+
+
+# Backfill this many rows per transaction, so that large
+# tables aren't locked for the duration of the migration.
+BACKFILL_BATCH_SIZE = 1000
+
+
+def get_period(when):
+    """
+    Return the YYYYMM period that contains the given datetime in the configured
+    local time zone. A frozen copy of snacksdb.utils.get_period, so that this
+    migration doesn't change along with the app.
+    """
+    when = timezone.localtime(when, pytz.timezone(settings.TIME_ZONE))
+    return when.year * 100 + when.month
+
+
+def backfill_periods(apps, schema_editor):
+    for model_name in ['Ballot', 'Nomination']:
+        model = apps.get_model('snacksdb', model_name)
+        last_pk = 0
+
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk, period__isnull=True)
+                .order_by('pk').values_list('pk', 'created')[:BACKFILL_BATCH_SIZE]
+            )
+            if not batch:
+                break
+
+            pks_by_period = defaultdict(list)
+            for pk, created in batch:
+                pks_by_period[get_period(created)].append(pk)
+
+            with transaction.atomic():
+                for period, pks in pks_by_period.items():
+                    model.objects.filter(pk__in=pks).update(period=period)
+
+            last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    # Each backfill batch commits on its own. See backfill_periods.
+    atomic = False
+
+    dependencies = [
+        ('snacksdb', '0002_votetally'),
+    ]
+
+    operations = [
+        # Add 'period' as a nullable column first, so that existing rows
+        # aren't all stamped with the period in which the migration ran.
+        migrations.AddField(
+            model_name='ballot',
+            name='period',
+            field=models.PositiveIntegerField(editable=False, null=True, help_text='Year and month of creation in local time, as YYYYMM.'),
+        ),
+        migrations.AddField(
+            model_name='nomination',
+            name='period',
+            field=models.PositiveIntegerField(editable=False, null=True, help_text='Year and month of creation in local time, as YYYYMM.'),
+        ),
+        migrations.RunPython(backfill_periods, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ballot',
+            name='period',
+            field=models.PositiveIntegerField(default=snacksdb.utils.get_period, editable=False, help_text='Year and month of creation in local time, as YYYYMM.'),
+        ),
+        migrations.AlterField(
+            model_name='nomination',
+            name='period',
+            field=models.PositiveIntegerField(default=snacksdb.utils.get_period, editable=False, help_text='Year and month of creation in local time, as YYYYMM.'),
+        ),
+        migrations.AddIndex(
+            model_name='ballot',
+            index=models.Index(fields=['period', 'user'], name='ballot_period_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ballot',
+            index=models.Index(fields=['period', 'snack_id'], name='ballot_period_snack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nomination',
+            index=models.Index(fields=['period', 'user'], name='nomination_period_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nomination',
+            index=models.Index(fields=['period', 'snack_id'], name='nomination_period_snack_idx'),
+        ),
+    ]
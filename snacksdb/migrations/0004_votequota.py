@@ -0,0 +1,28 @@
+# Generated by Django 2.0.5 on 2026-10-17 07:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('snacksdb', '0003_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteQuota',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.PositiveIntegerField(help_text='Year and month of the quota, as YYYYMM.')),
+                ('remaining', models.PositiveIntegerField(help_text='Number of votes the user has left to cast during the period.')),
+                ('user', models.ForeignKey(help_text='User whose votes are counted.', on_delete=django.db.models.deletion.CASCADE, related_name='vote_quotas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snacksdb', '0004_votequota'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Snack',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='The name of the snack.', max_length=200, unique=True)),
+                ('optional', models.BooleanField(default=True, help_text='Whether the snack must be voted for to be purchased.')),
+                ('purchase_locations', models.CharField(blank=True, help_text='Where the snack can be purchased.', max_length=500)),
+                ('purchase_count', models.PositiveIntegerField(default=0, help_text='The number of times the snack has been purchased.')),
+                ('last_purchase_date', models.DateField(blank=True, help_text='When the snack was last purchased.', null=True)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=8, help_text='The latitude, in degrees, of the purchase location.', max_digits=10, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=8, help_text='The longitude, in degrees, of the purchase location.', max_digits=11, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snacksdb', '0005_snack'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSync',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_attempt', models.DateTimeField(blank=True, help_text='When the mirror last tried to sync.', null=True)),
+                ('last_success', models.DateTimeField(blank=True, help_text='When the mirror last synced successfully.', null=True)),
+                ('last_error', models.TextField(blank=True, help_text='Why the last sync failed, if it did.')),
+                ('failures', models.PositiveIntegerField(default=0, help_text='The number of syncs that have failed since the last success.')),
+                ('snacks', models.PositiveIntegerField(default=0, help_text='The number of snacks in the catalog at the last success.')),
+                ('created', models.PositiveIntegerField(default=0, help_text='The number of snacks the last success added.')),
+                ('updated', models.PositiveIntegerField(default=0, help_text='The number of snacks the last success changed.')),
+                ('removed', models.PositiveIntegerField(default=0, help_text='The number of snacks the last success removed.')),
+            ],
+        ),
+    ]
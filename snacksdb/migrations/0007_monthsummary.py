@@ -0,0 +1,44 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snacksdb', '0006_catalogsync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.PositiveIntegerField(help_text='Year and month of the results, as YYYYMM.', unique=True)),
+                ('closed', models.DateTimeField(auto_now=True, help_text='When the month was closed.')),
+                ('votes', models.PositiveIntegerField(default=0, help_text='The number of votes cast during the month.')),
+                ('voters', models.PositiveIntegerField(default=0, help_text='The number of users who voted during the month.')),
+                ('nominations', models.PositiveIntegerField(default=0, help_text='The number of nominations made during the month.')),
+            ],
+            options={
+                'verbose_name_plural': 'month summaries',
+                'ordering': ['-period'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnackSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snack_id', models.PositiveIntegerField(help_text='ID of the snack being summarized.', verbose_name='Snack ID')),
+                ('name', models.CharField(blank=True, help_text='The name of the snack when the month closed.', max_length=200)),
+                ('votes', models.PositiveIntegerField(default=0, help_text='The number of votes the snack received during the month.')),
+                ('nominations', models.PositiveIntegerField(default=0, help_text='The number of times the snack was nominated during the month.')),
+                ('rank', models.PositiveIntegerField(help_text="The snack's place by votes, starting at 1. Snacks with equal votes tie.")),
+                ('month', models.ForeignKey(help_text='The month these results belong to.', on_delete=django.db.models.deletion.CASCADE, related_name='snacks', to='snacksdb.MonthSummary')),
+            ],
+            options={
+                'verbose_name_plural': 'snack summaries',
+                'ordering': ['month', 'rank', 'snack_id'],
+                'unique_together': {('month', 'snack_id')},
+            },
+        ),
+    ]
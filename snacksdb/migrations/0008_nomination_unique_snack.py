@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_nominations(apps, schema_editor):
+    """
+    Keep the first nomination of each snack in each period, and delete the rest, so
+    that the unique index can be built. Users get the deleted nominations back.
+    """
+    Nomination = apps.get_model('snacksdb', 'Nomination')
+
+    duplicates = (
+        Nomination.objects.values('period', 'snack_id')
+        .annotate(first_id=Min('id'), n=Count('id')).filter(n__gt=1).order_by()
+    )
+    for duplicate in duplicates:
+        Nomination.objects.filter(
+            period=duplicate['period'], snack_id=duplicate['snack_id']
+        ).exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snacksdb', '0007_monthsummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_nominations, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='nomination',
+            unique_together={('period', 'snack_id')},
+        ),
+        # The unique index covers the same columns.
+        migrations.RemoveIndex(
+            model_name='nomination',
+            name='nomination_period_snack_idx',
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('snacksdb', '0008_nomination_unique_snack'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='nomination',
+            name='snack_id',
+            field=models.PositiveIntegerField(blank=True, help_text='ID of the nominated snack, or empty while the nomination is pending.', null=True, verbose_name='Snack ID'),
+        ),
+        migrations.CreateModel(
+            name='SnackSuggestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(help_text='The name of the suggested snack.', max_length=200)),
+                ('location', models.CharField(help_text='The name of the purchase location.', max_length=50)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=8, help_text='The latitude, in degrees, of the purchase location.', max_digits=10, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=8, help_text='The longitude, in degrees, of the purchase location.', max_digits=11, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('submitted', 'Submitted'), ('duplicate', 'Duplicate'), ('rejected', 'Rejected'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='The number of times the suggestion has been submitted.')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, help_text='When the suggestion may next be submitted.')),
+                ('last_error', models.TextField(blank=True, help_text='Why the last submission failed, if it did.')),
+                ('snack_id', models.PositiveIntegerField(blank=True, help_text='ID of the snack the suggestion became, once submitted.', null=True, verbose_name='Snack ID')),
+                ('nomination', models.OneToOneField(blank=True, help_text='The nomination waiting on this suggestion, until it is resolved.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='suggestion', to='snacksdb.Nomination')),
+                ('user', models.ForeignKey(help_text='User who suggested the snack.', on_delete=django.db.models.deletion.CASCADE, related_name='snack_suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='snacksuggestion',
+            index=models.Index(fields=['status', 'next_attempt'], name='suggestion_status_next_idx'),
+        ),
+    ]
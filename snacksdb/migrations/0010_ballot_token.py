@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snacksdb', '0009_snacksuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ballot',
+            name='token',
+            field=models.UUIDField(blank=True, editable=False, help_text='Identifies a vote that was buffered before it was saved.', null=True, unique=True),
+        ),
+    ]
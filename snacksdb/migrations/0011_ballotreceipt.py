@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snacksdb', '0010_ballot_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BallotReceipt',
+            fields=[
+                ('token', models.UUIDField(help_text="The buffered vote's token, which its Ballot is saved with.", primary_key=True, serialize=False)),
+                ('period', models.PositiveIntegerField(db_index=True, help_text='Year and month the vote was cast in, as YYYYMM.')),
+            ],
+        ),
+    ]
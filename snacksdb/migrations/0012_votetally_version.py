@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snacksdb', '0011_ballotreceipt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='votetally',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented each time the total changes.'),
+        ),
+    ]
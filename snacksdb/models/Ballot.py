@@ -2,10 +2,20 @@
 
 __author__ = 'zach.mott@gmail.com'
 
-from django.db import models
+import collections
+import logging
+
+from django.conf import settings
+from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 
+from snacksdb.utils import ballot_buffer, board_version, get_period, tally_channel, vote_ledger
+
 from .SnacksDBBase import SnacksDBBase
+from .VoteTally import VoteTally
+
+
+logger = logging.getLogger(__name__)
 
 
 class Ballot(SnacksDBBase):
@@ -21,7 +31,134 @@ class Ballot(SnacksDBBase):
         verbose_name=_('Snack ID'),
         help_text=_('ID of the snack being voted for.')
     )
+    token = models.UUIDField(
+        null=True, blank=True, unique=True, editable=False,
+        help_text=_('Identifies a vote that was buffered before it was saved.')
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['period', 'user'], name='ballot_period_user_idx'),
+            models.Index(fields=['period', 'snack_id'], name='ballot_period_snack_idx'),
+        ]
 
     def __str__(self):
         tmpl = "{self.user.username} => {self.snack_id} on {self.created:%Y-%m-%d %H:%M:%S}"
         return tmpl.format(self=self)
+
+    @classmethod
+    def cast(cls, user, snack_id):
+        """
+        Spend one of the user's votes for this month on the given snack. Return the
+        new Ballot, or None if the user doesn't have any votes left this month.
+
+        With settings.VOTE_BUFFER_ENABLED, the vote is appended to the ballot buffer (see
+        Ballot.buffer), and the Ballot returned is unsaved; 'manage.py flush_ballots' saves it.
+        """
+        # Imported here, because VoteQuota counts Ballots.
+        from .VoteQuota import VoteQuota
+
+        with transaction.atomic():
+            if not VoteQuota.consume(user):
+                return None
+
+            if settings.VOTE_BUFFER_ENABLED:
+                return cls.buffer(user, [snack_id])[0]
+
+            return cls.objects.create(user=user, snack_id=snack_id)
+
+    @classmethod
+    def cast_many(cls, user, choices):
+        """
+        Spend several of the user's votes for this month at once. 'choices' maps snack
+        IDs to the number of votes for each. Return the new Ballots, or None (casting
+        none of them) if the user doesn't have that many votes left this month.
+
+        The quota is checked once, and the Ballots are written with one bulk INSERT,
+        all in one transaction.
+        """
+        from .VoteQuota import VoteQuota
+
+        choices = sorted((int(snack_id), count) for snack_id, count in choices.items() if count)
+        total = sum(count for snack_id, count in choices)
+        if not total:
+            return []
+
+        with transaction.atomic():
+            if not VoteQuota.consume(user, amount=total):
+                return None
+
+            if settings.VOTE_BUFFER_ENABLED:
+                return cls.buffer(
+                    user, [snack_id for snack_id, count in choices for i in range(count)]
+                )
+
+            period = get_period()
+            ballots = [
+                cls(user=user, snack_id=snack_id, period=period)
+                for snack_id, count in choices for i in range(count)
+            ]
+            cls.objects.bulk_create(ballots)
+
+            # bulk_create skips Ballot.save and its signals; do their work in bulk instead.
+            for snack_id, count in choices:
+                VoteTally.increment(period, snack_id, count)
+
+            transaction.on_commit(lambda: cls.announce_votes(user.pk, period, choices, total))
+
+        return ballots
+
+    @staticmethod
+    def announce_votes(user_pk, period, choices, total):
+        """
+        Let the user's balance, the vote board and the tally stream know about votes
+        that were cast in bulk.
+        """
+        vote_ledger.spend(user_pk, period, amount=total)
+        board_version.bump(period)
+
+        if settings.VOTE_STREAM_ENABLED:
+            for snack_id, count in choices:
+                tally_channel.publish_tally(period, snack_id)
+
+    @classmethod
+    def buffer(cls, user, snack_ids):
+        """
+        Buffer one vote for each of the given snack IDs, and return them as unsaved
+        Ballots. Call this from within the transaction that spends the votes: they're
+        buffered, all together, before it commits, and flushed only if it does (see
+        BallotBuffer.accept). If they can't be buffered, they're saved in it instead.
+        """
+        period = get_period()
+        votes = [ballot_buffer.make_vote(user.pk, snack_id, period) for snack_id in snack_ids]
+
+        try:
+            ballot_buffer.accept(votes)
+        except OSError:
+            logger.exception("Couldn't buffer %d vote(s); saving them directly.", len(votes))
+
+            ballots = ballot_buffer.write_votes(votes)
+            choices = sorted(collections.Counter(ballot.snack_id for ballot in ballots).items())
+            transaction.on_commit(
+                lambda: cls.announce_votes(user.pk, period, choices, len(ballots))
+            )
+            return ballots
+
+        # Ballot.save's signals don't fire until the votes are flushed, so do their
+        # work now: the user's balance and the board change straight away.
+        transaction.on_commit(lambda: vote_ledger.spend(user.pk, period, amount=len(votes)))
+        transaction.on_commit(lambda: board_version.bump(period))
+
+        return [ballot_buffer.to_ballot(cls, vote) for vote in votes]
+
+    def save(self, *pos, **kw):
+        """
+        Record the vote in its snack's VoteTally in the same transaction that creates it.
+        """
+        adding = self._state.adding
+
+        with transaction.atomic():
+            super().save(*pos, **kw)
+
+            if adding:
+                VoteTally.increment(self.period, self.snack_id)
@@ -0,0 +1,24 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class BallotReceipt(models.Model):
+    """
+    Model that records that a buffered vote's transaction committed. Ballot.buffer
+    appends the vote to the ballot buffer and saves its receipt in the transaction
+    that spends it; the flusher only saves buffered votes that have receipts, and
+    deletes each receipt as it saves its Ballot. See snacksdb.utils.BallotBuffer.
+    """
+    token = models.UUIDField(
+        primary_key=True, help_text=_("The buffered vote's token, which its Ballot is saved with.")
+    )
+    period = models.PositiveIntegerField(
+        db_index=True, help_text=_('Year and month the vote was cast in, as YYYYMM.')
+    )
+
+    def __str__(self):
+        return "Buffered vote {self.token} in {self.period}".format(self=self)
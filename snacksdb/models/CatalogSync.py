@@ -0,0 +1,67 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+
+class CatalogSync(models.Model):
+    """
+    Model that records the health of the local snack catalog mirror, which
+    snacksdb.utils.CatalogMirror keeps in step with the Snack Food API. There's
+    one row, created by the first sync.
+    """
+    MIRROR_ID = 1
+
+    last_attempt = models.DateTimeField(
+        null=True, blank=True, help_text=_('When the mirror last tried to sync.')
+    )
+    last_success = models.DateTimeField(
+        null=True, blank=True, help_text=_('When the mirror last synced successfully.')
+    )
+    last_error = models.TextField(
+        blank=True, help_text=_('Why the last sync failed, if it did.')
+    )
+    failures = models.PositiveIntegerField(
+        default=0, help_text=_('The number of syncs that have failed since the last success.')
+    )
+    snacks = models.PositiveIntegerField(
+        default=0, help_text=_('The number of snacks in the catalog at the last success.')
+    )
+    created = models.PositiveIntegerField(
+        default=0, help_text=_('The number of snacks the last success added.')
+    )
+    updated = models.PositiveIntegerField(
+        default=0, help_text=_('The number of snacks the last success changed.')
+    )
+    removed = models.PositiveIntegerField(
+        default=0, help_text=_('The number of snacks the last success removed.')
+    )
+
+    def __str__(self):
+        return "Catalog last synced {self.last_success}".format(self=self)
+
+    @classmethod
+    def get(cls):
+        """
+        Return the mirror's record, creating it if it doesn't exist yet.
+        """
+        return cls.objects.get_or_create(id=cls.MIRROR_ID)[0]
+
+    @classmethod
+    def get_last_success(cls):
+        """
+        Return when the mirror last synced successfully, or None if it never has.
+        """
+        return cls.objects.filter(id=cls.MIRROR_ID).values_list('last_success', flat=True).first()
+
+    def get_lag(self, now=None):
+        """
+        Return how long ago the mirror last synced successfully, as a
+        timedelta, or None if it never has.
+        """
+        if self.last_success is None:
+            return None
+        return (now or timezone.now()) - self.last_success
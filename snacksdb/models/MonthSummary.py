@@ -0,0 +1,109 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+
+from django.db import models, transaction
+from django.db.models import Count
+from django.utils.translation import ugettext_lazy as _
+
+from .Ballot import Ballot
+from .Nomination import Nomination
+from .SnackSummary import SnackSummary
+
+
+class MonthSummary(models.Model):
+    """
+    Model that holds the final results of a month that's been closed (see the
+    'close_month' management command), so that past months' results can be read
+    without aggregating their Ballots and Nominations. Each snack that was
+    nominated or voted for has a SnackSummary.
+    """
+    period = models.PositiveIntegerField(
+        unique=True, help_text=_('Year and month of the results, as YYYYMM.')
+    )
+    closed = models.DateTimeField(auto_now=True, help_text=_('When the month was closed.'))
+    votes = models.PositiveIntegerField(
+        default=0, help_text=_('The number of votes cast during the month.')
+    )
+    voters = models.PositiveIntegerField(
+        default=0, help_text=_('The number of users who voted during the month.')
+    )
+    nominations = models.PositiveIntegerField(
+        default=0, help_text=_('The number of nominations made during the month.')
+    )
+
+    class Meta:
+        ordering = ['-period']
+        verbose_name_plural = _('month summaries')
+
+    def __str__(self):
+        return "Results for {self.period}".format(self=self)
+
+    @property
+    def first_day(self):
+        """
+        The first day of the month, as a date.
+        """
+        return datetime.date(self.period // 100, self.period % 100, 1)
+
+    @classmethod
+    def close(cls, period, snack_names=None):
+        """
+        Snapshot the given YYYYMM period's vote totals and nominations into a
+        MonthSummary and its SnackSummaries, replacing any earlier snapshot, and
+        return the MonthSummary. 'snack_names' maps snack IDs to their names;
+        snacks that it doesn't name are summarized without one.
+        """
+        snack_names = snack_names or {}
+
+        ballots = Ballot.objects.in_period(period)
+        # Pending nominations haven't got a snack to count towards yet.
+        nominations = Nomination.objects.in_period(period).filter(snack_id__isnull=False)
+
+        votes_by_snack = dict(
+            ballots.values('snack_id').annotate(n=Count('id')).values_list('snack_id', 'n')
+        )
+        nominations_by_snack = dict(
+            nominations.values('snack_id').annotate(n=Count('id')).values_list('snack_id', 'n')
+        )
+
+        # Rank snacks by votes, then by nominations; ties share a rank.
+        snack_ids = sorted(
+            set(votes_by_snack) | set(nominations_by_snack),
+            key=lambda snack_id: (
+                -votes_by_snack.get(snack_id, 0), -nominations_by_snack.get(snack_id, 0), snack_id
+            )
+        )
+
+        snacks = []
+        for snack_id in snack_ids:
+            votes = votes_by_snack.get(snack_id, 0)
+            rank = len(snacks) + 1
+            if snacks and snacks[-1].votes == votes:
+                rank = snacks[-1].rank
+
+            snacks.append(SnackSummary(
+                snack_id=snack_id,
+                name=snack_names.get(snack_id, ''),
+                votes=votes,
+                nominations=nominations_by_snack.get(snack_id, 0),
+                rank=rank,
+            ))
+
+        with transaction.atomic():
+            summary, created = cls.objects.update_or_create(period=period, defaults={
+                'votes': sum(votes_by_snack.values()),
+                'voters': ballots.values('user').distinct().count(),
+                'nominations': sum(nominations_by_snack.values()),
+            })
+
+            if not created:
+                summary.snacks.all().delete()
+
+            for snack in snacks:
+                snack.month = summary
+            SnackSummary.objects.bulk_create(snacks, batch_size=500)
+
+        return summary
@@ -2,58 +2,72 @@
 
 __author__ = 'zach.mott@gmail.com'
 
-from django.conf import settings
-from django.core.cache import cache
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils.translation import ugettext_lazy as _
 
+from snacksdb.utils import nomination_ledger
+
 from .SnacksDBBase import SnacksDBBase
 
 
 class Nomination(SnacksDBBase):
     """
     Model that represents the snacks a user has nominated.
-    Users are allowed to suggest one snack per calendar month.
-    """
-    MONTHLY_NOMINATIONS_KEY_TMPL = "monthly_nominations_{user_pk}"
-    MONTHLY_NOMINATIONS_TTL = 60 * 5
+    Users are allowed to suggest one snack per calendar month,
+    and each snack can be nominated once per calendar month.
 
+    A nomination of a brand new snack is pending (it has no snack_id) until its
+    SnackSuggestion has been submitted to the snack source.
+    """
     user = models.ForeignKey(
         'auth.User', on_delete=models.CASCADE,
         related_name='nominations', help_text=_('User who made the nomination.')
     )
     snack_id = models.PositiveIntegerField(
-        verbose_name=_('Snack ID'),
-        help_text=_('ID of the nominated snack.'),
+        null=True, blank=True, verbose_name=_('Snack ID'),
+        help_text=_('ID of the nominated snack, or empty while the nomination is pending.'),
     )
 
+    class Meta:
+        # The unique index on (period, snack_id) also serves lookups by period and snack.
+        # NULLs never collide in it, so pending nominations don't conflict.
+        unique_together = [('period', 'snack_id')]
+        indexes = [
+            models.Index(fields=['period', 'user'], name='nomination_period_user_idx'),
+        ]
+
     def __str__(self):
-        tmpl = ("{self.user.username} nominated snack {self.snack_id} "
-                "on {self.created:%Y-%m-%d %H:%M:%S}")
+        if self.pending:
+            tmpl = ("{self.user.username} nominated a new snack "
+                    "on {self.created:%Y-%m-%d %H:%M:%S} (pending)")
+        else:
+            tmpl = ("{self.user.username} nominated snack {self.snack_id} "
+                    "on {self.created:%Y-%m-%d %H:%M:%S}")
         return tmpl.format(self=self)
 
+    @property
+    def pending(self):
+        return self.snack_id is None
+
     @classmethod
-    def get_monthly_nomination_cache_key(cls, user_pk):
+    def nominate(cls, user, snack_id):
         """
-        Return the cache key used to store the given user's monthly nomination count.
+        Nominate the given snack on the user's behalf. Return the new Nomination,
+        or None if the snack has already been nominated this month.
+
+        The database's unique index decides, in the INSERT itself, so two users
+        nominating the same snack at once can't both succeed.
         """
-        return cls.MONTHLY_NOMINATIONS_KEY_TMPL.format(user_pk=user_pk)
+        try:
+            # Use a savepoint, so that a duplicate doesn't break the caller's transaction.
+            with transaction.atomic():
+                return cls.objects.create(user=user, snack_id=snack_id)
+        except IntegrityError:
+            return None
 
     @classmethod
     def remaining_in_month(cls, user):
         """
         Return the number of additional nominations the user has left this month.
         """
-        if user.is_anonymous:
-            return 0
-
-        cache_key = cls.get_monthly_nomination_cache_key(user.pk)
-        cached_value = cache.get(cache_key)
-
-        if cached_value is None:
-            user_nominations = cls.objects.this_month().filter(user=user)
-            nominations_left = max(0, settings.NOMINATIONS_PER_MONTH - user_nominations.count())
-            cache.set(cache_key, nominations_left, cls.MONTHLY_NOMINATIONS_TTL)
-            cached_value = nominations_left
-
-        return cached_value
+        return nomination_ledger.remaining(user)
@@ -0,0 +1,105 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+from snacksdb.utils import SnackRecord
+
+
+class Snack(models.Model):
+    """
+    Model that holds a snack catalog locally, for snacksdb.utils.LocalSnackSource.
+    Snacks convert to and from SnackRecords, and the dictionaries described in
+    AbstractSnackSource.list.
+    """
+    # Format of 'lastPurchaseDate' in snack dictionaries, e.g. 5/24/2018.
+    DATE_FORMAT = '%m/%d/%Y'
+
+    name = models.CharField(max_length=200, unique=True, help_text=_('The name of the snack.'))
+    optional = models.BooleanField(
+        default=True, help_text=_('Whether the snack must be voted for to be purchased.')
+    )
+    purchase_locations = models.CharField(
+        max_length=500, blank=True, help_text=_('Where the snack can be purchased.')
+    )
+    purchase_count = models.PositiveIntegerField(
+        default=0, help_text=_('The number of times the snack has been purchased.')
+    )
+    last_purchase_date = models.DateField(
+        null=True, blank=True, help_text=_('When the snack was last purchased.')
+    )
+    latitude = models.DecimalField(
+        max_digits=10, decimal_places=8, null=True, blank=True,
+        help_text=_('The latitude, in degrees, of the purchase location.')
+    )
+    longitude = models.DecimalField(
+        max_digits=11, decimal_places=8, null=True, blank=True,
+        help_text=_('The longitude, in degrees, of the purchase location.')
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.name
+
+    def to_record(self):
+        """
+        Return this snack as a SnackRecord.
+        """
+        last_purchase_date = None
+        if self.last_purchase_date:
+            last_purchase_date = '{d.month}/{d.day}/{d.year}'.format(d=self.last_purchase_date)
+
+        return SnackRecord(
+            id=self.id,
+            name=self.name,
+            optional=self.optional,
+            purchase_locations=self.purchase_locations,
+            purchase_count=self.purchase_count,
+            last_purchase_date=last_purchase_date,
+        )
+
+    def to_dict(self):
+        """
+        Return this snack as a dictionary, as described in AbstractSnackSource.list.
+        """
+        return self.to_record().to_dict()
+
+    @classmethod
+    def from_record(cls, snack):
+        """
+        Return an unsaved Snack built from a SnackRecord. Raise
+        ValueError if its last purchase date is malformed.
+        """
+        last_purchase_date = None
+        if snack.last_purchase_date:
+            try:
+                last_purchase_date = datetime.datetime.strptime(
+                    snack.last_purchase_date, cls.DATE_FORMAT
+                ).date()
+            except (TypeError, ValueError) as e:
+                raise ValueError("Malformed snack {snack!r}: {e}".format(snack=snack, e=e))
+
+        return cls(
+            id=snack.id,
+            name=snack.name,
+            optional=snack.optional,
+            purchase_locations=snack.purchase_locations,
+            purchase_count=snack.purchase_count,
+            last_purchase_date=last_purchase_date,
+        )
+
+    @classmethod
+    def from_dict(cls, snack):
+        """
+        Return an unsaved Snack built from a dictionary, as described in
+        AbstractSnackSource.list. Raise ValueError if the dictionary is malformed.
+        """
+        return cls.from_record(SnackRecord.from_dict(snack))
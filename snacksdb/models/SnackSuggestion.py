@@ -0,0 +1,168 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+
+from django.db import connection, IntegrityError, models, transaction
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+
+class SnackSuggestion(models.Model):
+    """
+    Model for the outbox of new snacks that users have nominated, which wait
+    here (with a pending Nomination) until a worker submits them to the snack
+    source. See snacksdb.utils.SuggestionOutbox and 'manage.py drain_suggestions'.
+    """
+    PENDING = 'pending'
+    SUBMITTED = 'submitted'
+    DUPLICATE = 'duplicate'
+    REJECTED = 'rejected'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, _('Pending')),
+        (SUBMITTED, _('Submitted')),
+        (DUPLICATE, _('Duplicate')),
+        (REJECTED, _('Rejected')),
+        (FAILED, _('Failed')),
+    ]
+
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+    user = models.ForeignKey(
+        'auth.User', on_delete=models.CASCADE,
+        related_name='snack_suggestions', help_text=_('User who suggested the snack.')
+    )
+    nomination = models.OneToOneField(
+        'snacksdb.Nomination', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='suggestion',
+        help_text=_('The nomination waiting on this suggestion, until it is resolved.')
+    )
+    name = models.CharField(max_length=200, help_text=_('The name of the suggested snack.'))
+    location = models.CharField(
+        max_length=50, help_text=_('The name of the purchase location.')
+    )
+    latitude = models.DecimalField(
+        max_digits=10, decimal_places=8, null=True, blank=True,
+        help_text=_('The latitude, in degrees, of the purchase location.')
+    )
+    longitude = models.DecimalField(
+        max_digits=11, decimal_places=8, null=True, blank=True,
+        help_text=_('The longitude, in degrees, of the purchase location.')
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(
+        default=0, help_text=_('The number of times the suggestion has been submitted.')
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now, help_text=_('When the suggestion may next be submitted.')
+    )
+    last_error = models.TextField(
+        blank=True, help_text=_('Why the last submission failed, if it did.')
+    )
+    snack_id = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name=_('Snack ID'),
+        help_text=_('ID of the snack the suggestion became, once submitted.')
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt'], name='suggestion_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return "{self.user.username} suggested {self.name} ({self.status})".format(self=self)
+
+    @classmethod
+    def enqueue(cls, user, name, location, latitude=None, longitude=None):
+        """
+        Record a pending Nomination of a new snack on the user's behalf,
+        and queue its suggestion for submission. Return the SnackSuggestion.
+        """
+        from snacksdb.models import Nomination
+
+        with transaction.atomic():
+            nomination = Nomination.objects.create(user=user, snack_id=None)
+            return cls.objects.create(
+                user=user, nomination=nomination, name=name, location=location,
+                latitude=latitude, longitude=longitude,
+            )
+
+    @classmethod
+    def claim(cls, limit, lease):
+        """
+        Return up to 'limit' pending suggestions that are due for submission, and
+        put off their next attempt for 'lease' seconds so that other workers pass
+        them over in the meantime. If a worker dies holding a claim, the suggestions
+        become due again once their lease runs out.
+        """
+        now = timezone.now()
+
+        with transaction.atomic():
+            due = cls.objects.select_for_update(
+                skip_locked=connection.features.has_select_for_update_skip_locked
+            ).filter(status=cls.PENDING, next_attempt__lte=now).order_by('next_attempt')
+            ids = list(due.values_list('id', flat=True)[:limit])
+
+            cls.objects.filter(id__in=ids).update(
+                next_attempt=now + datetime.timedelta(seconds=lease)
+            )
+
+        return list(cls.objects.filter(id__in=ids).select_related('nomination', 'user'))
+
+    def link(self, snack_id, status=SUBMITTED):
+        """
+        Record that the suggestion became (or turned out to be) the given snack,
+        and nominate it with the pending Nomination. If someone else nominated the
+        snack first, the pending Nomination is given back instead.
+        """
+        from snacksdb.models import Nomination
+
+        self.snack_id = snack_id
+        nomination, self.nomination = self.nomination, None
+
+        with transaction.atomic():
+            if nomination is not None:
+                try:
+                    # Use a savepoint, so that a duplicate doesn't break the transaction.
+                    with transaction.atomic():
+                        nomination.snack_id = snack_id
+                        nomination.save()
+                        self.nomination = nomination
+                except IntegrityError:
+                    # Deleting through the model refunds the user's nomination.
+                    Nomination.objects.get(id=nomination.id).delete()
+                    status = self.DUPLICATE
+
+            self.status = status
+            self.last_error = ''
+            self.save()
+
+    def resolve(self, status, error=''):
+        """
+        Close the suggestion without a snack, and give the user back the pending
+        Nomination, so that they can nominate something else.
+        """
+        with transaction.atomic():
+            if self.nomination is not None:
+                self.nomination.delete()
+                self.nomination = None
+
+            self.status = status
+            self.last_error = error
+            self.save()
+
+    def retry(self, error, max_attempts, backoff):
+        """
+        Schedule another attempt after exponential backoff (backoff * 2 ** n seconds,
+        after n + 1 attempts), or give up after 'max_attempts'.
+        """
+        if self.attempts >= max_attempts:
+            return self.resolve(self.FAILED, error)
+
+        delay = backoff * 2 ** (self.attempts - 1)
+        self.next_attempt = timezone.now() + datetime.timedelta(seconds=delay)
+        self.last_error = error
+        self.save()
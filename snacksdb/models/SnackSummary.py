@@ -0,0 +1,41 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class SnackSummary(models.Model):
+    """
+    Model that holds a snack's final results for a closed month. See MonthSummary.
+    The snack's name is copied from the catalog, which may since have changed.
+    """
+    month = models.ForeignKey(
+        'snacksdb.MonthSummary', on_delete=models.CASCADE,
+        related_name='snacks', help_text=_('The month these results belong to.')
+    )
+    snack_id = models.PositiveIntegerField(
+        verbose_name=_('Snack ID'),
+        help_text=_('ID of the snack being summarized.')
+    )
+    name = models.CharField(
+        max_length=200, blank=True, help_text=_('The name of the snack when the month closed.')
+    )
+    votes = models.PositiveIntegerField(
+        default=0, help_text=_('The number of votes the snack received during the month.')
+    )
+    nominations = models.PositiveIntegerField(
+        default=0, help_text=_('The number of times the snack was nominated during the month.')
+    )
+    rank = models.PositiveIntegerField(
+        help_text=_("The snack's place by votes, starting at 1. Snacks with equal votes tie.")
+    )
+
+    class Meta:
+        ordering = ['month', 'rank', 'snack_id']
+        unique_together = [('month', 'snack_id')]
+        verbose_name_plural = _('snack summaries')
+
+    def __str__(self):
+        return "{self.month.period}: #{self.rank} {self.snack_id} => {self.votes}".format(self=self)
@@ -3,7 +3,9 @@
 __author__ = 'zach.mott@gmail.com'
 
 from django.db import models
-from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from snacksdb.utils import get_period
 
 
 class SnacksDBBaseQuerySet(models.QuerySet):
@@ -12,21 +14,28 @@ class SnacksDBBaseQuerySet(models.QuerySet):
         Return all of the records that have been created
         since the beginning of this calendar month.
         """
-        beginning_of_the_month = timezone.now().replace(
-            day=1, hour=0, minute=0,
-            second=0, microsecond=0
-        )
+        return self.in_period(get_period())
 
-        return self.filter(created__gte=beginning_of_the_month)
+    def in_period(self, period):
+        """
+        Return all of the records that were created during the given YYYYMM period.
+        """
+        return self.filter(period=period)
 
 
 class SnacksDBBase(models.Model):
     """
-    Base class for models used by the snacksdb app. Provides 'created' and 'modified'
-    attributes, as well as cls.objects.this_month manager method.
+    Base class for models used by the snacksdb app. Provides 'created', 'modified'
+    and 'period' attributes, as well as cls.objects.this_month and cls.objects.in_period
+    manager methods. Subclasses should index 'period' alongside the columns they're
+    most often filtered by.
     """
     created = models.DateTimeField(auto_now_add=True)
     modified = models.DateTimeField(auto_now=True)
+    period = models.PositiveIntegerField(
+        default=get_period, editable=False,
+        help_text=_('Year and month of creation in local time, as YYYYMM.')
+    )
 
     objects = SnacksDBBaseQuerySet.as_manager()
 
@@ -0,0 +1,84 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils.translation import ugettext_lazy as _
+
+from snacksdb.utils import get_period
+
+from .Ballot import Ballot
+
+
+class VoteQuota(models.Model):
+    """
+    Model that holds the number of votes a user has left to cast in a period.
+    Votes are spent with a single conditional UPDATE, so concurrent requests
+    from the same user can never overspend their quota, and requests from
+    different users never wait on each other.
+
+    A user's quota is created from settings.VOTES_PER_MONTH when they first vote
+    in a period; changing the setting doesn't affect quotas that already exist.
+    """
+    user = models.ForeignKey(
+        'auth.User', on_delete=models.CASCADE,
+        related_name='vote_quotas', help_text=_('User whose votes are counted.')
+    )
+    period = models.PositiveIntegerField(help_text=_('Year and month of the quota, as YYYYMM.'))
+    remaining = models.PositiveIntegerField(
+        help_text=_('Number of votes the user has left to cast during the period.')
+    )
+
+    class Meta:
+        unique_together = [('user', 'period')]
+
+    def __str__(self):
+        return "{self.user.username} has {self.remaining} vote(s) left in {self.period}".format(
+            self=self
+        )
+
+    @classmethod
+    def consume(cls, user, amount=1, period=None):
+        """
+        Atomically spend 'amount' of the user's votes for the period, which defaults
+        to the current one. Return True if the user had enough votes left, or False
+        (spending nothing) if they didn't. Call this from within the transaction that
+        records the votes, so that they're refunded if recording them fails.
+        """
+        period = period or get_period()
+        quota = cls.objects.filter(user=user, period=period, remaining__gte=amount)
+
+        if quota.update(remaining=F('remaining') - amount):
+            return True
+
+        if cls.objects.filter(user=user, period=period).exists():
+            return False
+
+        # This is the user's first vote of the period. Create their quota and try again.
+        cls.initialize(user, period)
+        return bool(quota.update(remaining=F('remaining') - amount))
+
+    @classmethod
+    def initialize(cls, user, period):
+        """
+        Create the user's quota for the period, less any Ballots they've already cast.
+        """
+        cast = Ballot.objects.in_period(period).filter(user=user).count()
+        remaining = max(0, settings.VOTES_PER_MONTH - cast)
+
+        try:
+            # Use a savepoint, so that losing a race to create
+            # the quota doesn't break the caller's transaction.
+            with transaction.atomic():
+                cls.objects.create(user=user, period=period, remaining=remaining)
+        except IntegrityError:
+            pass
+
+    @classmethod
+    def refund(cls, user_id, period, amount=1):
+        """
+        Give 'amount' votes back to the user for the given period, e.g. when a Ballot is deleted.
+        """
+        cls.objects.filter(user_id=user_id, period=period).update(remaining=F('remaining') + amount)
@@ -0,0 +1,73 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils.translation import ugettext_lazy as _
+
+from snacksdb.utils import get_period
+
+
+class VoteTally(models.Model):
+    """
+    Model that holds the total number of votes each snack has received in a period.
+    Tallies are maintained as Ballots are cast, so that reading a month's totals
+    doesn't require aggregating all of that month's Ballots. Each change to a
+    tally also increments its version, which orders totals read at different times.
+    See the 'rebuild_vote_tallies' management command to detect and repair drift.
+    """
+    period = models.PositiveIntegerField(help_text=_('Year and month of the tally, as YYYYMM.'))
+    snack_id = models.PositiveIntegerField(
+        verbose_name=_('Snack ID'),
+        help_text=_('ID of the snack being tallied.')
+    )
+    total = models.PositiveIntegerField(
+        default=0, help_text=_('Number of votes the snack received during the period.')
+    )
+    version = models.PositiveIntegerField(
+        default=0, help_text=_('Incremented each time the total changes.')
+    )
+
+    class Meta:
+        unique_together = [('period', 'snack_id')]
+
+    def __str__(self):
+        return "{self.period}: {self.snack_id} => {self.total}".format(self=self)
+
+    @classmethod
+    def increment(cls, period, snack_id, amount=1):
+        """
+        Atomically add 'amount' votes to the given snack's tally for the given
+        period, creating the tally if necessary. Call this from within the
+        transaction that records the votes.
+        """
+        tallies = cls.objects.filter(period=period, snack_id=snack_id)
+
+        if tallies.update(total=F('total') + amount, version=F('version') + 1):
+            return
+
+        try:
+            # Use a savepoint, so that losing a race to create
+            # the tally doesn't break the caller's transaction.
+            with transaction.atomic():
+                cls.objects.create(period=period, snack_id=snack_id, total=amount, version=1)
+        except IntegrityError:
+            tallies.update(total=F('total') + amount, version=F('version') + 1)
+
+    @classmethod
+    def decrement(cls, period, snack_id, amount=1):
+        """
+        Atomically remove 'amount' votes from the given snack's tally for the given period.
+        """
+        tallies = cls.objects.filter(period=period, snack_id=snack_id, total__gte=amount)
+        tallies.update(total=F('total') - amount, version=F('version') + 1)
+
+    @classmethod
+    def totals_for_period(cls, period=None):
+        """
+        Return a dictionary of {snack_id: total_votes, ...} for the
+        given period, which defaults to the current period.
+        """
+        period = period or get_period()
+        return dict(cls.objects.filter(period=period).values_list('snack_id', 'total'))
@@ -4,3 +4,11 @@ __author__ = 'zach.mott@gmail.com'
 
 from .Nomination import Nomination
 from .Ballot import Ballot
+from .BallotReceipt import BallotReceipt
+from .CatalogSync import CatalogSync
+from .MonthSummary import MonthSummary
+from .Snack import Snack
+from .SnackSuggestion import SnackSuggestion
+from .SnackSummary import SnackSummary
+from .VoteQuota import VoteQuota
+from .VoteTally import VoteTally
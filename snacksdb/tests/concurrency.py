@@ -0,0 +1,26 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import random
+import time
+
+from django.db import OperationalError, connection
+
+
+def retry_if_locked(fn, *pos, **kw):
+    """
+    Call fn(*pos, **kw), retrying it for as long as the database reports that it's
+    locked, and return its result. SQLite lets one writer in at a time, and an
+    in-memory database (like the test database) turns the others away at once
+    rather than making them wait, as a database file's busy timeout would. Other
+    databases wait for locks themselves, so fn is only retried on SQLite.
+    """
+    while True:
+        try:
+            return fn(*pos, **kw)
+        except OperationalError as e:
+            if connection.vendor != 'sqlite' or 'locked' not in str(e):
+                raise
+
+        time.sleep(random.uniform(0, 0.005))
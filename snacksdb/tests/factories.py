@@ -9,6 +9,7 @@ import factory
 from django.contrib.auth.models import User
 
 from snacksdb.models import Ballot, Nomination
+from snacksdb.utils import SnackRecord
 
 
 class SnacksDBBaseFactory(factory.DjangoModelFactory):
@@ -44,3 +45,11 @@ class NominationFactory(SnacksDBBaseFactory):
     snack_id = factory.Sequence(lambda n: 1000 + n)
     user = factory.SubFactory(UserFactory)
 
+
+class SnackRecordFactory(factory.Factory):
+    class Meta:
+        model = SnackRecord
+
+    id = factory.Sequence(lambda n: 1000 + n)
+    name = factory.Sequence(lambda n: "Snack {n}".format(n=n))
+    optional = True
@@ -0,0 +1,95 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+import os
+import shutil
+import tempfile
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from snacksdb.models import BallotReceipt, MonthSummary
+from snacksdb.tests.factories import BallotFactory, SnackRecordFactory, UserFactory
+from snacksdb.tests.sources import STATIC_SNACK_SOURCE, StaticSnackSource
+from snacksdb.utils import ballot_buffer, get_tzinfo, SnackSourceException
+
+
+@override_settings(SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE)
+class CloseMonthTestCase(TestCase):
+    """
+    Test cases for the 'close_month' management command.
+    """
+    def setUp(self):
+        when = datetime.datetime(2018, 5, 12, 12, 0, 0, tzinfo=get_tzinfo())
+        BallotFactory.make_in_the_past(when, snack_id=1001)
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('close_month', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    @mock.patch.object(StaticSnackSource, 'snacks', [SnackRecordFactory(id=1001, name='Apples')])
+    def test_close(self):
+        self.assertIn('Closed 201805: 1 vote(s)', self.call('--period', '201805'))
+        self.assertEqual(MonthSummary.objects.get(period=201805).snacks.get().name, 'Apples')
+
+        # Closing a closed month does nothing, unless asked to replace its results.
+        BallotFactory.make_in_the_past(
+            datetime.datetime(2018, 5, 13, tzinfo=get_tzinfo()), snack_id=1001
+        )
+        self.assertIn('already closed', self.call('--period', '201805'))
+        self.assertEqual(MonthSummary.objects.get(period=201805).votes, 1)
+
+        self.call('--period', '201805', '--replace')
+        self.assertEqual(MonthSummary.objects.get(period=201805).votes, 2)
+
+    @override_settings(VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FSYNC=False)
+    def test_close_buffered(self):
+        """
+        Test that votes still waiting in this machine's buffer are flushed and counted,
+        and that a month with votes waiting elsewhere isn't closed.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        with mock.patch.object(ballot_buffer, '_path', os.path.join(directory, 'ballots.jsonl')):
+            ballot_buffer.append(UserFactory().pk, 1001, 201805)
+            self.assertIn('Closed 201805: 2 vote(s)', self.call('--period', '201805'))
+
+            # A vote in another app server's buffer.
+            BallotReceipt.objects.create(token=uuid.uuid4(), period=201805)
+            with self.assertRaisesRegex(CommandError, "1 buffered vote"):
+                self.call('--period', '201805', '--replace')
+
+        self.assertEqual(MonthSummary.objects.get(period=201805).votes, 2)
+
+    @mock.patch('snacksdb.management.commands.close_month.get_period', return_value=201806)
+    def test_close_last_month(self, mock_get_period):
+        self.call()
+        self.assertTrue(MonthSummary.objects.filter(period=201805).exists())
+
+        mock_get_period.return_value = 201901
+        self.call()
+        self.assertTrue(MonthSummary.objects.filter(period=201812).exists())
+
+    def test_open_or_malformed_period(self):
+        for period in ['209912', '201813', '201800']:
+            with self.assertRaises(CommandError):
+                self.call('--period', period)
+
+        self.assertFalse(MonthSummary.objects.exists())
+
+    def test_snack_source_fails(self):
+        """
+        Test that the month is closed without snack names if the snack source fails.
+        """
+        with mock.patch.object(StaticSnackSource, 'list', side_effect=SnackSourceException('')):
+            self.call('--period', '201805')
+
+        self.assertEqual(MonthSummary.objects.get(period=201805).snacks.get().name, '')
@@ -0,0 +1,39 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from snacksdb.models import SnackSuggestion
+from snacksdb.tests.factories import SnackRecordFactory, UserFactory
+from snacksdb.tests.sources import STATIC_SNACK_SOURCE, StaticSnackSource
+
+
+@override_settings(SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE)
+class DrainSuggestionsTestCase(TestCase):
+    """
+    Test cases for the 'drain_suggestions' management command.
+    """
+    def call(self, *args):
+        out = StringIO()
+        call_command('drain_suggestions', *args, stdout=out)
+        return out.getvalue()
+
+    @mock.patch.object(StaticSnackSource, 'suggest')
+    def test_drain(self, mock_suggest):
+        mock_suggest.return_value = SnackRecordFactory(id=2001, name='Cherries')
+        suggestion = SnackSuggestion.enqueue(UserFactory(), 'Cherries', 'Safeway')
+
+        self.assertIn('Drained 1 suggestion(s): 1 submitted.', self.call('--concurrency', '2'))
+        mock_suggest.assert_called_once_with(
+            'Cherries', 'Safeway', latitude=None, longitude=None
+        )
+
+        suggestion.refresh_from_db()
+        self.assertEqual(suggestion.nomination.snack_id, 2001)
+
+        self.assertIn('Drained 0 suggestion(s): none due.', self.call())
@@ -0,0 +1,44 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from snacksdb.models import Ballot
+from snacksdb.tests.factories import UserFactory
+from snacksdb.utils import ballot_buffer, get_period
+
+
+@override_settings(VOTE_BUFFER_FSYNC=False)
+class FlushBallotsTestCase(TestCase):
+    """
+    Test cases for the 'flush_ballots' management command.
+    """
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        path_override = self.settings(VOTE_BUFFER_PATH=os.path.join(directory, 'ballots.jsonl'))
+        path_override.enable()
+        self.addCleanup(path_override.disable)
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('flush_ballots', *args, stdout=out)
+        return out.getvalue()
+
+    def test_flush(self):
+        user = UserFactory()
+        for snack_id in [1001, 1002, 1003]:
+            ballot_buffer.append(user.pk, snack_id, get_period())
+
+        self.assertIn('Flushed 3 ballot(s).', self.call('--batch-size', '2'))
+        self.assertEqual(Ballot.objects.filter(user=user).count(), 3)
+
+        self.assertIn('Flushed 0 ballot(s).', self.call())
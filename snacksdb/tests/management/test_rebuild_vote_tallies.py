@@ -0,0 +1,62 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from snacksdb.models import VoteTally
+from snacksdb.tests.factories import BallotFactory
+from snacksdb.utils import get_period, get_tzinfo
+
+
+class RebuildVoteTalliesTestCase(TestCase):
+    """
+    Test cases for the 'rebuild_vote_tallies' management command.
+    """
+    def setUp(self):
+        self.period = get_period()
+
+        BallotFactory(snack_id=1001)
+        BallotFactory(snack_id=1001)
+        BallotFactory(snack_id=1002)
+
+        when = datetime.datetime(2016, 7, 30, 12, 45, 3, tzinfo=get_tzinfo())
+        BallotFactory.make_in_the_past(when, snack_id=1001)
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('rebuild_vote_tallies', *args, stdout=out)
+        return out.getvalue()
+
+    def test_verify_clean(self):
+        self.assertIn('All tallies match', self.call('--verify'))
+
+    def test_verify_drift(self):
+        """
+        Test that --verify reports drifted tallies without repairing them.
+        """
+        VoteTally.objects.filter(period=self.period, snack_id=1001).update(total=7)
+        VoteTally.objects.create(period=self.period, snack_id=1003, total=1)
+
+        with self.assertRaises(CommandError):
+            self.call('--verify')
+
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 7, 1002: 1, 1003: 1})
+
+    def test_rebuild(self):
+        """
+        Test that rebuilding repairs drifted tallies, optionally only for some periods.
+        """
+        VoteTally.objects.update(total=9)
+
+        self.call('--period', str(self.period))
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 2, 1002: 1})
+        self.assertEqual(VoteTally.totals_for_period(201607), {1001: 9})
+
+        self.call()
+        self.assertEqual(VoteTally.totals_for_period(201607), {1001: 1})
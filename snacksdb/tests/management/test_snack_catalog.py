@@ -0,0 +1,101 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from snacksdb.models import Snack
+from snacksdb.utils import SnackAPISource, SnackRecord, SnackSourceException
+
+
+class SnackCatalogTestCase(TestCase):
+    """
+    Test cases for the 'snack_catalog' management command.
+    """
+    catalog = [
+        {'id': 1001, 'name': 'Apples', 'optional': False, 'purchaseLocations': 'Whole Foods',
+         'purchaseCount': 3, 'lastPurchaseDate': '5/4/2018'},
+        {'id': 1002, 'name': 'Bananas', 'optional': True, 'purchaseLocations': 'Safeway',
+         'purchaseCount': 0, 'lastPurchaseDate': None},
+    ]
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def call(self, *pos, **kw):
+        out = StringIO()
+        call_command('snack_catalog', *pos, stdout=out, **kw)
+        return out.getvalue()
+
+    def write_catalog(self, catalog):
+        with open(self.path, 'w') as f:
+            json.dump(catalog, f)
+
+    def test_import(self):
+        self.write_catalog(self.catalog)
+
+        out = self.call('import', self.path)
+
+        self.assertIn('2 new, 0 updated, 0 removed', out)
+        self.assertEqual([s.to_dict() for s in Snack.objects.all()], self.catalog)
+
+    def test_import_update(self):
+        """
+        Test that importing updates existing snacks in place, and that --replace
+        removes snacks that are missing from the import.
+        """
+        Snack.objects.create(id=1001, name='Apple', latitude=45)
+        Snack.objects.create(id=1003, name='Cherries')
+        self.write_catalog(self.catalog)
+
+        out = self.call('import', self.path)
+        self.assertIn('1 new, 1 updated, 0 removed', out)
+        self.assertEqual(Snack.objects.get(id=1001).name, 'Apples')
+        self.assertEqual(Snack.objects.get(id=1001).latitude, 45)
+        self.assertTrue(Snack.objects.filter(id=1003).exists())
+
+        out = self.call('import', self.path, replace=True)
+        self.assertIn('0 new, 2 updated, 1 removed', out)
+        self.assertFalse(Snack.objects.filter(id=1003).exists())
+
+    def test_import_malformed(self):
+        self.write_catalog([{'id': 1001}])
+        with self.assertRaises(CommandError):
+            self.call('import', self.path)
+
+        with open(self.path, 'w') as f:
+            f.write('not json')
+        with self.assertRaises(CommandError):
+            self.call('import', self.path)
+
+        self.assertFalse(Snack.objects.exists())
+
+    @mock.patch.object(SnackAPISource, 'list')
+    def test_import_from_api(self, mock_list):
+        mock_list.return_value = [SnackRecord.from_dict(snack) for snack in self.catalog]
+        self.call('import', from_api=True)
+        self.assertEqual(Snack.objects.count(), 2)
+
+        mock_list.side_effect = SnackSourceException('oh no!')
+        with self.assertRaises(CommandError):
+            self.call('import', from_api=True)
+
+    def test_export(self):
+        for snack in self.catalog:
+            Snack.from_dict(snack).save()
+
+        self.assertEqual(json.loads(self.call('export')), self.catalog)
+
+        self.call('export', self.path)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), self.catalog)
@@ -0,0 +1,54 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from snacksdb.models import CatalogSync, Snack
+from snacksdb.utils import SnackAPISource, SnackRecord, SnackSourceException
+
+
+@override_settings(SNACK_MIRROR_SOURCE_CLASS='snacksdb.utils.SnackAPISource.SnackAPISource')
+class SyncSnackCatalogTestCase(TestCase):
+    """
+    Test cases for the 'sync_snack_catalog' management command.
+    """
+    catalog = [SnackRecord(1001, 'Apples', True)]
+
+    def call(self, *pos, **kw):
+        out = StringIO()
+        call_command('sync_snack_catalog', *pos, stdout=out, **kw)
+        return out.getvalue()
+
+    @mock.patch.object(SnackAPISource, 'list')
+    def test_sync(self, mock_list):
+        mock_list.return_value = self.catalog
+
+        out = self.call()
+
+        self.assertIn('Synced 1 snack(s): 1 new, 0 updated, 0 removed.', out)
+        self.assertEqual(Snack.objects.count(), 1)
+
+        mock_list.side_effect = SnackSourceException('oh no!')
+        with self.assertRaises(CommandError):
+            self.call()
+
+    @override_settings(SNACK_MIRROR_MAX_STALENESS=60)
+    def test_check(self):
+        with self.assertRaisesMessage(CommandError, 'never been synced'):
+            self.call(check=True)
+
+        CatalogSync.objects.update(last_success=timezone.now())
+        self.assertIn('up to date', self.call(check=True))
+
+        an_hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        CatalogSync.objects.update(last_success=an_hour_ago, failures=3, last_error='oh no!')
+        with self.assertRaisesMessage(CommandError, '3 failure(s) since. Last error: oh no!'):
+            self.call(check=True)
@@ -0,0 +1,49 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from snacksdb.tests.factories import BallotFactory, NominationFactory, SnackRecordFactory
+from snacksdb.tests.sources import STATIC_SNACK_SOURCE, StaticSnackSource
+from snacksdb.utils import get_tzinfo, SnackSourceException
+
+
+@override_settings(SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE)
+class VoteReportTestCase(TestCase):
+    """
+    Test cases for the 'vote_report' management command.
+    """
+    def setUp(self):
+        when = datetime.datetime(2018, 5, 10, 12, 0, 0, tzinfo=get_tzinfo())
+        NominationFactory.make_in_the_past(when, snack_id=1001)
+        BallotFactory.make_in_the_past(when, snack_id=1001)
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('vote_report', *args, stdout=out)
+        return out.getvalue()
+
+    def test_csv(self):
+        self.assertEqual(self.call('votes'), 'period,snack_id,votes\n201805,1001,1\n')
+
+    @mock.patch.object(
+        StaticSnackSource, 'snacks', [SnackRecordFactory(id=1001, last_purchase_date='5/24/2018')]
+    )
+    def test_json(self):
+        self.assertEqual(json.loads(self.call('purchases', '--format', 'json')), [{
+            'snack_id': 1001, 'first_nominated': '2018-05-10',
+            'last_purchased': '2018-05-24', 'days_to_purchase': 14,
+        }])
+
+    def test_snack_source_fails(self):
+        with mock.patch.object(StaticSnackSource, 'list', side_effect=SnackSourceException('')):
+            with self.assertRaises(CommandError):
+                self.call('purchases')
@@ -0,0 +1,71 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import json
+from unittest import mock
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from snacksdb.middleware import ServerTimingMiddleware
+from snacksdb.tests.factories import SnackRecordFactory, UserFactory
+from snacksdb.tests.sources import STATIC_SNACK_SOURCE, StaticSnackSource
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True, SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE)
+class ServerTimingMiddlewareTestCase(TestCase):
+    """
+    Test cases for snacksdb.middleware.ServerTimingMiddleware.
+    """
+    view_url = reverse('snacksdb:vote')
+
+    def setUp(self):
+        self.client.force_login(UserFactory())
+
+    @mock.patch.object(StaticSnackSource, 'snacks', [SnackRecordFactory(optional=False)])
+    def test_vote(self):
+        """
+        Test that the vote page's SQL, catalog and rendering phases are reported
+        in the Server-Timing header and the log.
+        """
+        with self.assertLogs('snacksdb.timing', 'INFO') as logs:
+            response = self.client.get(self.view_url, HTTP_X_REQUEST_ID='abc-123')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Request-ID'], 'abc-123')
+
+        metrics = [m.split(';')[0] for m in response['Server-Timing'].split(', ')]
+        self.assertEqual(metrics, ['db', 'catalog', 'render', 'total'])
+
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['request_id'], 'abc-123')
+        self.assertEqual(line['path'], self.view_url)
+        self.assertEqual(line['status'], 200)
+        self.assertGreater(line['queries'], 0)
+        self.assertIn("({} queries)".format(line['queries']), response['Server-Timing'])
+        self.assertEqual(set(line['phases_ms']), {'db', 'catalog', 'render'})
+
+    def test_request_id(self):
+        """
+        Test that requests get a new ID unless the one they came with is tame.
+        """
+        with self.assertLogs('snacksdb.timing', 'INFO'):
+            generated = self.client.get(self.view_url)['X-Request-ID']
+            replaced = self.client.get(self.view_url, HTTP_X_REQUEST_ID='a b\nc')['X-Request-ID']
+
+        self.assertRegex(generated, r'^[0-9a-f]{32}$')
+        self.assertRegex(replaced, r'^[0-9a-f]{32}$')
+        self.assertNotEqual(generated, replaced)
+
+    def test_disabled(self):
+        with override_settings(REQUEST_TIMING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ServerTimingMiddleware(lambda request: None)
+
+            response = self.client.get(self.view_url)
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('X-Request-ID', response)
@@ -2,13 +2,20 @@
 
 __author__ = 'zach.mott@gmail.com'
 
-from datetime import timedelta
+import errno
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
 from unittest import mock
 
-from django.test import TestCase
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-from snacksdb.models import Ballot
-from snacksdb.tests.factories import BallotFactory
+from snacksdb.models import Ballot, BallotReceipt, VoteTally
+from snacksdb.tests.factories import BallotFactory, UserFactory
+from snacksdb.utils import ballot_buffer, get_period, get_tzinfo, vote_ledger
 
 
 class BallotTestCase(TestCase):
@@ -37,6 +44,24 @@ class BallotTestCase(TestCase):
 
         self.assertEqual(Ballot.objects.this_month().count(), len(expected_ballots))
 
+    def test_manager_in_period(self):
+        """
+        Test that records are bucketed by the local month they were created in,
+        and that the model manager's 'in_period' method returns a given bucket.
+        """
+        this_period = get_period()
+        ballot = BallotFactory()
+        self.assertEqual(ballot.period, this_period)
+
+        # 2018-06-01 03:00 UTC is still May 31st in America/Chicago.
+        when = datetime(2018, 6, 1, 3, 0, 0, tzinfo=timezone.utc)
+        BallotFactory.make_in_the_past(when)
+        BallotFactory.make_in_the_past(when.astimezone(get_tzinfo()) + timedelta(days=1))
+
+        self.assertEqual(list(Ballot.objects.in_period(this_period)), [ballot])
+        self.assertEqual(Ballot.objects.in_period(201805).count(), 1)
+        self.assertEqual(Ballot.objects.in_period(201806).count(), 1)
+
     def test___str__(self):
         ballot = BallotFactory()
         s = str(ballot)
@@ -44,3 +69,132 @@ class BallotTestCase(TestCase):
         self.assertIn(ballot.user.username, s)
         self.assertIn(str(ballot.snack_id), s)
         self.assertIn(ballot.created.strftime('%Y-%m-%d %H:%M:%S'), s)
+
+    def use_ballot_buffer(self):
+        """
+        Point the ballot buffer at a new, empty file for the rest of the test.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        path_patch = mock.patch.object(
+            ballot_buffer, '_path', os.path.join(directory, 'ballots.jsonl')
+        )
+        path_patch.start()
+        self.addCleanup(path_patch.stop)
+
+    @override_settings(VOTES_PER_MONTH=3, VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FSYNC=False)
+    def test_cast_buffered(self):
+        """
+        Test that buffered votes are spent from the quota at once, but saved when flushed,
+        and that they're buffered before the transaction that spends them commits.
+        """
+        self.use_ballot_buffer()
+        user = UserFactory()
+        callbacks = []
+
+        with mock.patch('django.db.transaction.on_commit', side_effect=callbacks.append):
+            ballots = [Ballot.cast(user, 1001 + i % 2) for i in range(4)]
+
+        self.assertEqual(len(ballot_buffer.pending()), 3)
+        self.assertEqual(BallotReceipt.objects.count(), 3)
+        for callback in callbacks:
+            callback()
+
+        self.assertIsNone(ballots.pop())
+        self.assertTrue(all(ballot.pk is None and ballot.token for ballot in ballots))
+        self.assertFalse(Ballot.objects.exists())
+        self.assertEqual(vote_ledger.count_remaining(user.pk), 0)
+
+        self.assertEqual(ballot_buffer.flush(), 3)
+
+        self.assertEqual(
+            sorted(Ballot.objects.values_list('token', flat=True)),
+            sorted(ballot.token for ballot in ballots)
+        )
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 2, 1002: 1})
+        self.assertFalse(BallotReceipt.objects.exists())
+
+    @override_settings(VOTES_PER_MONTH=3, VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FSYNC=False)
+    def test_cast_buffered_rollback(self):
+        """
+        Test that a buffered vote whose transaction rolls back is never saved, nor paid for.
+        """
+        self.use_ballot_buffer()
+        user = UserFactory()
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Ballot.cast(user, 1001)
+            raise RuntimeError('rolled back')
+
+        self.assertEqual(len(ballot_buffer.pending()), 1)
+        self.assertFalse(BallotReceipt.objects.exists())
+        self.assertEqual(vote_ledger.count_remaining(user.pk), 3)
+
+        with self.settings(VOTE_BUFFER_COMMIT_TIMEOUT=-60), self.assertLogs(level='WARNING'):
+            self.assertEqual(ballot_buffer.flush(), 0)
+
+        self.assertEqual(ballot_buffer.pending(), [])
+        self.assertFalse(Ballot.objects.exists())
+
+    @override_settings(VOTES_PER_MONTH=3)
+    def test_cast_many(self):
+        """
+        Test that several votes are cast in one transaction with one INSERT, or not at all.
+        """
+        user = UserFactory()
+        VoteTally.increment(get_period(), 1001)
+
+        self.assertIsNone(Ballot.cast_many(user, {1001: 2, 1002: 2}))
+        self.assertFalse(Ballot.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            ballots = Ballot.cast_many(user, {1001: 2, '1002': 1, 1003: 0})
+
+        self.assertEqual(sorted(ballot.snack_id for ballot in ballots), [1001, 1001, 1002])
+        table = Ballot._meta.db_table
+        inserts = [q for q in queries if q['sql'].startswith('INSERT') and table in q['sql']]
+        self.assertEqual(len(inserts), 1)
+
+        self.assertEqual(Ballot.objects.filter(user=user).count(), 3)
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 3, 1002: 1})
+        self.assertIsNone(Ballot.cast_many(user, {1003: 1}))
+        self.assertEqual(Ballot.cast_many(user, {}), [])
+
+    @override_settings(VOTES_PER_MONTH=3, VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FSYNC=False)
+    @mock.patch('django.db.transaction.on_commit', side_effect=lambda fn: fn())
+    def test_cast_many_buffered(self, mock_on_commit):
+        """
+        Test that several buffered votes are appended to the buffer all together, and
+        that if appending them fails partway, none are left in the buffer: they're
+        written to the database instead.
+        """
+        self.use_ballot_buffer()
+        user = UserFactory()
+
+        Ballot.cast_many(user, {1001: 1, 1002: 1})
+        self.assertEqual(len(ballot_buffer.pending()), 2)
+        self.assertEqual(vote_ledger.count_remaining(user.pk), 1)
+
+        # The disk fills up after the first of the votes' lines is written.
+        write, writes = os.write, []
+
+        def fill_disk(fd, data):
+            if writes:
+                raise OSError(errno.ENOSPC, 'No space left on device')
+            writes.append(data)
+            return write(fd, data[:data.index(b'\n') + 1])
+
+        other_user = UserFactory()
+        with mock.patch('os.write', side_effect=fill_disk), self.assertLogs(level='ERROR'):
+            ballots = Ballot.cast_many(other_user, {1001: 1, 1003: 2})
+
+        self.assertEqual(len(ballot_buffer.pending()), 2)
+        self.assertEqual(
+            sorted(Ballot.objects.values_list('token', flat=True)),
+            sorted(ballot.token for ballot in ballots)
+        )
+        self.assertEqual(vote_ledger.count_remaining(other_user.pk), 0)
+
+        self.assertEqual(ballot_buffer.flush(), 2)
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 2, 1002: 1, 1003: 2})
@@ -0,0 +1,70 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+
+from django.test import TestCase
+
+from snacksdb.models import MonthSummary
+from snacksdb.tests.factories import BallotFactory, NominationFactory, UserFactory
+from snacksdb.utils import get_tzinfo
+
+
+class MonthSummaryTestCase(TestCase):
+    """
+    Test cases for snacksdb.models.MonthSummary.
+    """
+    def setUp(self):
+        self.when = datetime.datetime(2018, 5, 12, 12, 0, 0, tzinfo=get_tzinfo())
+        user = UserFactory()
+
+        for snack_id in [1001, 1002, 1003]:
+            NominationFactory.make_in_the_past(self.when, snack_id=snack_id)
+        for snack_id in [1002, 1002, 1001, 1003]:
+            BallotFactory.make_in_the_past(self.when, user=user, snack_id=snack_id)
+        BallotFactory.make_in_the_past(self.when, snack_id=1003)
+
+        # Votes from other months don't count.
+        BallotFactory(snack_id=1001)
+        NominationFactory(snack_id=1004)
+
+    def test_close(self):
+        """
+        Test that closing a month snapshots its totals and ranks its snacks by votes.
+        """
+        summary = MonthSummary.close(201805, {1001: 'Apples', 1002: 'Bananas'})
+
+        self.assertEqual(summary.period, 201805)
+        self.assertEqual(summary.first_day, datetime.date(2018, 5, 1))
+        self.assertEqual((summary.votes, summary.voters, summary.nominations), (5, 2, 3))
+
+        snacks = [
+            (s.rank, s.snack_id, s.name, s.votes, s.nominations) for s in summary.snacks.all()
+        ]
+        self.assertEqual(snacks, [
+            (1, 1002, 'Bananas', 2, 1),
+            (1, 1003, '', 2, 1),
+            (3, 1001, 'Apples', 1, 1),
+        ])
+
+    def test_close_again(self):
+        """
+        Test that closing a month again replaces its results.
+        """
+        MonthSummary.close(201805)
+        BallotFactory.make_in_the_past(self.when, snack_id=1001)
+        BallotFactory.make_in_the_past(self.when, snack_id=1001)
+
+        summary = MonthSummary.close(201805)
+
+        self.assertEqual(MonthSummary.objects.count(), 1)
+        self.assertEqual(summary.votes, 7)
+        self.assertEqual(summary.snacks.count(), 3)
+        self.assertEqual(summary.snacks.first().snack_id, 1001)
+
+    def test_close_empty(self):
+        summary = MonthSummary.close(201604)
+
+        self.assertEqual((summary.votes, summary.voters, summary.nominations), (0, 0, 0))
+        self.assertFalse(summary.snacks.exists())
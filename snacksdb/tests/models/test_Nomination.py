@@ -2,14 +2,18 @@
 
 __author__ = 'zach.mott@gmail.com'
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from unittest import mock
 
 from django.core.cache import cache
 from django.contrib.auth.models import AnonymousUser
-from django.test import TestCase, override_settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
 
 from snacksdb.models import Nomination
+from snacksdb.tests.concurrency import retry_if_locked
 from snacksdb.tests.factories import NominationFactory, UserFactory
 
 
@@ -77,3 +81,48 @@ class NominationTestCase(TestCase):
 
         self.assertEqual(Nomination.remaining_in_month(user1), 4)
         self.assertEqual(Nomination.remaining_in_month(user2), 0)
+
+    def test_nominate(self):
+        """
+        Test that Nomination.nominate refuses a snack that's already been nominated
+        this month, without breaking the surrounding transaction.
+        """
+        user1 = UserFactory()
+        user2 = UserFactory()
+
+        self.assertIsNotNone(Nomination.nominate(user1, 1001))
+        self.assertIsNone(Nomination.nominate(user2, 1001))
+        self.assertIsNotNone(Nomination.nominate(user2, 1002))
+
+        self.assertEqual(
+            list(Nomination.objects.values_list('user', 'snack_id')),
+            [(user1.pk, 1001), (user2.pk, 1002)]
+        )
+
+
+class NominationConcurrencyTestCase(TransactionTestCase):
+    """
+    Stress tests for snacksdb.models.Nomination. They rely on the unique index,
+    not on row locks, so they run on SQLite too. See retry_if_locked.
+    """
+    WORKERS = 30
+
+    def test_concurrent_nominations(self):
+        """
+        Test that when many users nominate the same snack at once, exactly one succeeds.
+        """
+        users = [UserFactory() for i in range(self.WORKERS)]
+        barrier = threading.Barrier(self.WORKERS)
+
+        def nominate(user):
+            try:
+                barrier.wait()  # Release the nominations all at once.
+                return retry_if_locked(Nomination.nominate, user, 1001) is not None
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            results = list(executor.map(nominate, users))
+
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(Nomination.objects.filter(snack_id=1001).count(), 1)
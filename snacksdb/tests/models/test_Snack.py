@@ -0,0 +1,53 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+
+from django.test import TestCase
+
+from snacksdb.models import Snack
+
+
+class SnackTestCase(TestCase):
+    """
+    Test cases for snacksdb.models.Snack.
+    """
+    snack = {
+        'id': 1001,
+        'name': 'Apples',
+        'optional': True,
+        'purchaseLocations': 'Whole Foods',
+        'purchaseCount': 3,
+        'lastPurchaseDate': '5/4/2018',
+    }
+
+    def test_from_dict(self):
+        snack = Snack.from_dict(self.snack)
+
+        self.assertEqual(snack.id, 1001)
+        self.assertEqual(snack.name, 'Apples')
+        self.assertTrue(snack.optional)
+        self.assertEqual(snack.purchase_locations, 'Whole Foods')
+        self.assertEqual(snack.purchase_count, 3)
+        self.assertEqual(snack.last_purchase_date, datetime.date(2018, 5, 4))
+
+    def test_from_dict_never_purchased(self):
+        snack = Snack.from_dict(dict(self.snack, lastPurchaseDate=None, purchaseCount=None))
+
+        self.assertIsNone(snack.last_purchase_date)
+        self.assertEqual(snack.purchase_count, 0)
+
+    def test_from_dict_malformed(self):
+        with self.assertRaises(ValueError):
+            Snack.from_dict({'name': 'Apples'})
+
+        with self.assertRaises(ValueError):
+            Snack.from_dict(dict(self.snack, lastPurchaseDate='yesterday'))
+
+    def test_to_dict(self):
+        """
+        Test that snacks survive a round trip through the snack dictionary format.
+        """
+        Snack.from_dict(self.snack).save()
+        self.assertEqual(Snack.objects.get(id=1001).to_dict(), self.snack)
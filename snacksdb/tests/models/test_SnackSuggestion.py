@@ -0,0 +1,116 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from snacksdb.models import Nomination, SnackSuggestion
+from snacksdb.tests.factories import NominationFactory, UserFactory
+
+
+class SnackSuggestionTestCase(TestCase):
+    """
+    Test cases for snacksdb.models.SnackSuggestion.
+    """
+    def setUp(self):
+        self.user = UserFactory()
+
+    def enqueue(self, name='Cherries'):
+        return SnackSuggestion.enqueue(self.user, name, 'Safeway')
+
+    def test_enqueue(self):
+        """
+        Test that enqueuing a suggestion records a pending Nomination behind it.
+        """
+        suggestion = self.enqueue()
+
+        self.assertEqual(suggestion.status, SnackSuggestion.PENDING)
+        self.assertEqual(suggestion.nomination.user, self.user)
+        self.assertTrue(suggestion.nomination.pending)
+
+        # Pending nominations don't collide with each other.
+        self.enqueue('Dates')
+        self.assertEqual(Nomination.objects.filter(snack_id__isnull=True).count(), 2)
+
+    def test_claim(self):
+        """
+        Test that claiming returns only due, pending suggestions, and hides them
+        from other claims until their lease runs out.
+        """
+        due = self.enqueue()
+        self.enqueue('Dates').resolve(SnackSuggestion.REJECTED)
+        later = self.enqueue('Figs')
+        SnackSuggestion.objects.filter(id=later.id).update(
+            next_attempt=timezone.now() + timedelta(minutes=5)
+        )
+
+        self.assertEqual(SnackSuggestion.claim(10, 60), [due])
+        self.assertEqual(SnackSuggestion.claim(10, 60), [])
+
+        an_hour_from_now = timezone.now() + timedelta(hours=1)
+        with mock.patch('django.utils.timezone.now', return_value=an_hour_from_now):
+            self.assertEqual(SnackSuggestion.claim(10, 60), [due, later])
+
+    def test_link(self):
+        """
+        Test that linking a suggestion nominates its snack.
+        """
+        suggestion = self.enqueue()
+        suggestion.link(1001)
+
+        suggestion.refresh_from_db()
+        self.assertEqual(suggestion.status, SnackSuggestion.SUBMITTED)
+        self.assertEqual(suggestion.snack_id, 1001)
+        self.assertEqual(suggestion.nomination.snack_id, 1001)
+        self.assertFalse(suggestion.nomination.pending)
+
+    def test_link_nominated(self):
+        """
+        Test that linking a suggestion to a snack that someone else has already
+        nominated gives the pending Nomination back.
+        """
+        NominationFactory(snack_id=1001)
+        suggestion = self.enqueue()
+        suggestion.link(1001)
+
+        suggestion.refresh_from_db()
+        self.assertEqual(suggestion.status, SnackSuggestion.DUPLICATE)
+        self.assertEqual(suggestion.snack_id, 1001)
+        self.assertIsNone(suggestion.nomination)
+        self.assertFalse(Nomination.objects.filter(user=self.user).exists())
+
+    def test_resolve(self):
+        suggestion = self.enqueue()
+        suggestion.resolve(SnackSuggestion.REJECTED, 'Malformed suggestion.')
+
+        suggestion.refresh_from_db()
+        self.assertEqual(suggestion.status, SnackSuggestion.REJECTED)
+        self.assertEqual(suggestion.last_error, 'Malformed suggestion.')
+        self.assertIsNone(suggestion.nomination)
+        self.assertFalse(Nomination.objects.filter(user=self.user).exists())
+
+    def test_retry(self):
+        """
+        Test that retries back off exponentially, until they run out.
+        """
+        suggestion = self.enqueue()
+        now = timezone.now()
+
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            for attempts, delay in [(1, 30), (2, 60), (3, 120)]:
+                suggestion.attempts = attempts
+                suggestion.retry('oh no!', max_attempts=4, backoff=30)
+                self.assertEqual(suggestion.next_attempt, now + timedelta(seconds=delay))
+                self.assertEqual(suggestion.status, SnackSuggestion.PENDING)
+
+        suggestion.attempts = 4
+        suggestion.retry('oh no!', max_attempts=4, backoff=30)
+
+        suggestion.refresh_from_db()
+        self.assertEqual(suggestion.status, SnackSuggestion.FAILED)
+        self.assertEqual(suggestion.last_error, 'oh no!')
+        self.assertIsNone(suggestion.nomination)
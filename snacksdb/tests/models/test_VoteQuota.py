@@ -0,0 +1,94 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from snacksdb.models import Ballot, VoteQuota
+from snacksdb.tests.concurrency import retry_if_locked
+from snacksdb.tests.factories import BallotFactory, UserFactory
+from snacksdb.utils import get_period
+
+
+@override_settings(VOTES_PER_MONTH=3)
+class VoteQuotaTestCase(TestCase):
+    """
+    Test cases for snacksdb.models.VoteQuota.
+    """
+    def test_consume(self):
+        """
+        Test that VoteQuota.consume spends votes until the user runs out,
+        and never spends a partial amount.
+        """
+        user = UserFactory()
+
+        self.assertTrue(VoteQuota.consume(user, amount=2))
+        self.assertFalse(VoteQuota.consume(user, amount=2))
+        self.assertTrue(VoteQuota.consume(user))
+        self.assertFalse(VoteQuota.consume(user))
+
+        self.assertEqual(VoteQuota.objects.get(user=user, period=get_period()).remaining, 0)
+
+        # Other periods have their own quotas.
+        self.assertTrue(VoteQuota.consume(user, period=201805))
+
+    def test_consume_counts_existing_ballots(self):
+        """
+        Test that a new quota accounts for Ballots the user cast before it existed.
+        """
+        user = UserFactory()
+        BallotFactory(user=user)
+        BallotFactory(user=user)
+
+        self.assertTrue(VoteQuota.consume(user))
+        self.assertFalse(VoteQuota.consume(user))
+
+    def test_cast_and_delete(self):
+        """
+        Test that Ballot.cast respects the quota, and that deleting a Ballot refunds its vote.
+        """
+        user = UserFactory()
+        ballots = [Ballot.cast(user, 1001) for i in range(4)]
+
+        self.assertIsNone(ballots[-1])
+        self.assertEqual(Ballot.objects.filter(user=user).count(), 3)
+
+        ballots[0].delete()
+        self.assertIsNotNone(Ballot.cast(user, 1002))
+
+
+@override_settings(VOTES_PER_MONTH=3)
+class VoteQuotaConcurrencyTestCase(TransactionTestCase):
+    """
+    Stress tests for snacksdb.models.VoteQuota. They rely on VoteQuota's conditional
+    UPDATE, not on row locks, so they run on SQLite too. See retry_if_locked.
+    """
+    ATTEMPTS = 300
+    WORKERS = 30
+
+    def test_concurrent_votes(self):
+        """
+        Test that hundreds of simultaneous votes from the same
+        user never exceed that user's monthly quota.
+        """
+        user = UserFactory()
+        barrier = threading.Barrier(self.WORKERS)
+
+        def vote(i):
+            try:
+                if i < self.WORKERS:
+                    barrier.wait()  # Release the first wave of votes all at once.
+                return retry_if_locked(Ballot.cast, user, 1001 + i % 5) is not None
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            results = list(executor.map(vote, range(self.ATTEMPTS)))
+
+        self.assertEqual(results.count(True), 3)
+        self.assertEqual(Ballot.objects.filter(user=user).count(), 3)
+        self.assertEqual(VoteQuota.objects.get(user=user).remaining, 0)
@@ -0,0 +1,64 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+
+from django.test import TestCase
+
+from snacksdb.models import VoteTally
+from snacksdb.tests.factories import BallotFactory
+from snacksdb.utils import get_period, get_tzinfo
+
+
+class VoteTallyTestCase(TestCase):
+    """
+    Test cases for snacksdb.models.VoteTally.
+    """
+    def test_increment(self):
+        """
+        Test that VoteTally.increment creates missing tallies and adds to existing ones.
+        """
+        VoteTally.increment(201805, 1001)
+        VoteTally.increment(201805, 1001, amount=2)
+        VoteTally.increment(201806, 1001)
+
+        self.assertEqual(VoteTally.objects.get(period=201805, snack_id=1001).total, 3)
+        self.assertEqual(VoteTally.objects.get(period=201806, snack_id=1001).total, 1)
+
+    def test_decrement(self):
+        """
+        Test that VoteTally.decrement never takes a tally below zero.
+        """
+        VoteTally.increment(201805, 1001)
+        VoteTally.decrement(201805, 1001)
+        VoteTally.decrement(201805, 1001)
+        VoteTally.decrement(201805, 1002)
+
+        self.assertEqual(VoteTally.objects.get(period=201805, snack_id=1001).total, 0)
+        self.assertFalse(VoteTally.objects.filter(snack_id=1002).exists())
+
+    def test_ballots_maintain_tallies(self):
+        """
+        Test that creating and deleting Ballots keeps their periods' tallies up to date.
+        """
+        ballot = BallotFactory(snack_id=1001)
+        BallotFactory(snack_id=1001)
+        BallotFactory(snack_id=1002)
+
+        when = datetime.datetime(2016, 7, 30, 12, 45, 3, tzinfo=get_tzinfo())
+        BallotFactory.make_in_the_past(when, snack_id=1001)
+
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 2, 1002: 1})
+        self.assertEqual(VoteTally.totals_for_period(201607), {1001: 1})
+
+        ballot.delete()
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 1, 1002: 1})
+
+    def test_get_period(self):
+        """
+        Test that periods are computed in the configured local time zone.
+        """
+        # 2018-06-01 03:00 UTC is still May 31st in America/Chicago.
+        when = datetime.datetime(2018, 6, 1, 3, 0, 0, tzinfo=datetime.timezone.utc)
+        self.assertEqual(get_period(when), 201805)
@@ -0,0 +1,27 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from snacksdb.utils import AbstractSnackSource
+
+
+class StaticSnackSource(AbstractSnackSource):
+    """
+    Snack source that serves a fixed catalog, for tests. Use it with
+    override_settings(SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE), and
+    set StaticSnackSource.snacks (SnackRecords) and .version as the test requires.
+    """
+    snacks = []
+    version = None
+
+    def list(self):
+        return self.snacks
+
+    def suggest(self, name, location, latitude=None, longitude=None):
+        raise NotImplementedError()
+
+    def get_version(self):
+        return self.version
+
+
+STATIC_SNACK_SOURCE = 'snacksdb.tests.sources.StaticSnackSource'
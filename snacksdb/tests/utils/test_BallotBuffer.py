@@ -0,0 +1,254 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import errno
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from snacksdb.models import Ballot, BallotReceipt, VoteTally
+from snacksdb.tests.factories import NominationFactory, UserFactory
+from snacksdb.utils import BallotBuffer, get_period
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'ballot_buffer_tests': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ballot_buffer_tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class BallotBufferTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.BallotBuffer.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        self.buffer = BallotBuffer(
+            os.path.join(self.directory, 'var', 'ballots.jsonl'), False, 'ballot_buffer_tests'
+        )
+        self.buffer.cache.clear()
+        self.period = get_period()
+        self.user = UserFactory()
+
+        # Votes' transactions commit at once.
+        on_commit = mock.patch('django.db.transaction.on_commit', side_effect=lambda fn: fn())
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+
+    def append(self, snack_id, user=None, period=None):
+        return self.buffer.append((user or self.user).pk, snack_id, period or self.period)
+
+    def test_pending(self):
+        """
+        Test that buffered votes are counted, from the cache, until they're flushed.
+        """
+        other_user = UserFactory()
+        snack_ids = [1001, 1002, 1003]
+        tokens = [self.append(1001), self.append(1001, other_user), self.append(1002)]
+        self.append(1001, period=201805)
+
+        self.assertEqual(self.buffer.pending_totals(snack_ids=snack_ids), {1001: 2, 1002: 1})
+        self.assertEqual(self.buffer.pending_totals(201805, snack_ids), {1001: 1})
+
+        ballots = self.buffer.pending_ballots(self.user, snack_ids=snack_ids)
+        self.assertEqual([b.snack_id for b in ballots], [1001, 1002])
+        self.assertTrue(all(b.pk is None for b in ballots))
+
+        # Only nominated snacks are counted by default.
+        NominationFactory(snack_id=1001)
+        self.assertEqual(self.buffer.pending_totals(), {1001: 2})
+
+        # The files aren't read to count votes.
+        with mock.patch.object(self.buffer, 'read') as mock_read:
+            self.buffer.pending_totals(snack_ids=snack_ids)
+            self.buffer.pending_ballots(self.user, snack_ids=snack_ids)
+        mock_read.assert_not_called()
+
+        # Votes moved aside for flushing are still pending.
+        self.buffer.rotate()
+        self.append(1003)
+        self.assertEqual(
+            self.buffer.pending_totals(snack_ids=snack_ids), {1001: 2, 1002: 1, 1003: 1}
+        )
+        pending_tokens = {vote['token'] for vote in self.buffer.pending(user_id=self.user.pk)}
+        self.assertLessEqual({tokens[0].hex, tokens[2].hex}, pending_tokens)
+
+        self.buffer.flush()
+        self.assertEqual(self.buffer.pending(), [])
+        self.assertEqual(self.buffer.pending_totals(snack_ids=snack_ids), {})
+        self.assertEqual(self.buffer.pending_ballots(self.user, snack_ids=snack_ids), [])
+
+    def test_flush(self):
+        """
+        Test that flushing writes buffered votes as Ballots, in batches, and adds
+        them to the VoteTallies.
+        """
+        VoteTally.increment(self.period, 1001)
+        tokens = [self.append(1001) for i in range(3)] + [self.append(1002)]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(batch_size=2), 4)
+
+        # One INSERT per batch.
+        table = Ballot._meta.db_table
+        inserts = [q for q in queries if q['sql'].startswith('INSERT') and table in q['sql']]
+        self.assertEqual(len(inserts), 2)
+
+        self.assertEqual(
+            sorted(Ballot.objects.values_list('token', flat=True)), sorted(tokens)
+        )
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 4, 1002: 1})
+        self.assertEqual(self.buffer.get_flushing_paths(), [])
+        self.assertFalse(BallotReceipt.objects.exists())
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_flush_uncommitted(self):
+        """
+        Test that votes without receipts, whose transactions rolled back or haven't
+        committed yet, aren't written, and are dropped once they've waited too long.
+        """
+        self.append(1001)
+        vote = BallotBuffer.make_vote(self.user.pk, 1002, self.period)
+        self.buffer.append_many([vote])
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual([v['token'] for v in self.buffer.pending()], [vote['token']])
+
+        # The transaction commits after all.
+        BallotReceipt.objects.create(token=vote['token'], period=self.period)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.buffer.get_flushing_paths(), [])
+
+        vote = BallotBuffer.make_vote(self.user.pk, 1003, self.period)
+        self.buffer.append_many([vote])
+
+        with self.settings(VOTE_BUFFER_COMMIT_TIMEOUT=0), \
+                self.assertLogs('snacksdb.utils.BallotBuffer', 'WARNING'):
+            vote['accepted'] = time.time() - 1
+            self.buffer.rewrite(self.buffer.path, [vote])
+            self.assertEqual(self.buffer.flush(), 0)
+
+        self.assertEqual(self.buffer.pending(), [])
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 1, 1002: 1})
+
+    def test_flush_recovery(self):
+        """
+        Test that rerunning a flush that crashed after writing some of its
+        batches neither drops nor duplicates votes.
+        """
+        for snack_id in [1001, 1001, 1002, 1003]:
+            self.append(snack_id)
+
+        write_batch = self.buffer.write_batch
+
+        def crash_after_first_batch(votes, batches=[]):
+            if batches:
+                raise OSError('crash!')
+            batches.append(votes)
+            return write_batch(votes)
+
+        with mock.patch.object(self.buffer, 'write_batch', side_effect=crash_after_first_batch):
+            with self.assertRaises(OSError):
+                self.buffer.flush(batch_size=2)
+
+        self.assertEqual(Ballot.objects.count(), 2)
+        self.assertEqual(len(self.buffer.get_flushing_paths()), 1)
+
+        # New votes arrive before the flusher restarts.
+        self.append(1003)
+
+        self.assertEqual(self.buffer.flush(batch_size=2), 3)
+        self.assertEqual(Ballot.objects.count(), 5)
+        self.assertEqual(VoteTally.totals_for_period(), {1001: 2, 1002: 1, 1003: 2})
+
+    def test_torn_line(self):
+        """
+        Test that a vote cut short by a crash, which was never acknowledged, is skipped,
+        and that the next vote isn't lost along with it.
+        """
+        self.append(1001)
+        with open(self.buffer.path, 'ab') as f:
+            f.write(b'{"token":"c0ffee","user_id":')
+
+        self.assertEqual(len(self.buffer.pending()), 1)
+
+        token = self.append(1002)
+        with self.assertLogs('snacksdb.utils.BallotBuffer', 'WARNING'):
+            votes = self.buffer.pending()
+        self.assertEqual([vote['snack_id'] for vote in votes], [1001, 1002])
+        self.assertEqual(votes[-1]['token'], token.hex)
+
+        with self.assertLogs('snacksdb.utils.BallotBuffer', 'WARNING'):
+            self.assertEqual(self.buffer.flush(), 2)
+
+    def test_append_many_failure(self):
+        """
+        Test that votes appended together are all recorded, or none are.
+        """
+        self.append(1001)
+        votes = [BallotBuffer.make_vote(self.user.pk, 1002, self.period) for i in range(3)]
+
+        write, writes = os.write, []
+
+        def fill_disk(fd, data):
+            if writes:
+                raise OSError(errno.ENOSPC, 'No space left on device')
+            writes.append(data)
+            return write(fd, data[:data.index(b'\n') + 1])
+
+        with mock.patch('os.write', side_effect=fill_disk):
+            with self.assertRaises(OSError):
+                self.buffer.append_many(votes)
+
+        self.assertEqual([vote['snack_id'] for vote in self.buffer.pending()], [1001])
+
+        self.buffer.append_many(votes)
+        self.assertEqual(len(self.buffer.pending()), 4)
+
+    def test_flush_created(self):
+        """
+        Test that flushed Ballots are stamped with when their votes were accepted.
+        """
+        vote = BallotBuffer.make_vote(self.user.pk, 1001, self.period)
+        vote['accepted'] = time.time() - 60 * 5
+        self.buffer.accept([vote])
+        self.buffer.flush()
+
+        ballot = Ballot.objects.get()
+        self.assertAlmostEqual(ballot.created.timestamp(), vote['accepted'], places=3)
+
+    def test_append_after_rotate(self):
+        """
+        Test that a writer which opened the file before it was moved aside for
+        flushing writes to a new file, instead of one that may be gone.
+        """
+        self.append(1001)
+        stale_fd = self.buffer.open()
+        self.assertTrue(self.buffer.is_current(stale_fd))
+
+        self.buffer.rotate()
+        self.assertFalse(self.buffer.is_current(stale_fd))
+
+        # append() closes the stale file, and opens the new one.
+        open_file = self.buffer.open
+        with mock.patch.object(self.buffer, 'open', side_effect=[stale_fd, open_file()]):
+            self.append(1002)
+
+        with open(self.buffer.path) as f:
+            self.assertIn('"snack_id":1002', f.read())
+        self.assertEqual([vote['snack_id'] for vote in self.buffer.pending()], [1002, 1001])
@@ -0,0 +1,42 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import copy
+
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from snacksdb.utils import BoardSnack, SnackRecord
+
+
+class BoardSnackTestCase(SimpleTestCase):
+    """
+    Test cases for snacksdb.utils.BoardSnack.
+    """
+    def setUp(self):
+        self.record = SnackRecord(1001, 'Apples', True, 'Whole Foods', 3, '5/4/2018')
+        self.snack = BoardSnack(self.record, total_votes=2, received_vote=True)
+
+    def test_attributes(self):
+        """
+        Test that a BoardSnack reads its record's attributes, in Python and in templates.
+        """
+        self.assertEqual(self.snack.id, 1001)
+        self.assertEqual(self.snack.last_purchase_date, '5/4/2018')
+        self.assertEqual(self.snack.total_votes, 2)
+
+        with self.assertRaises(AttributeError):
+            self.snack.colour
+
+        template = Template('{{ snack.name }} ({{ snack.total_votes }})')
+        self.assertEqual(template.render(Context({'snack': self.snack})), 'Apples (2)')
+
+    def test_to_dict(self):
+        self.assertEqual(self.snack.to_dict(), dict(
+            self.record.to_dict(), total_votes=2, received_vote=True
+        ))
+
+    def test_copy(self):
+        self.assertEqual(copy.copy(self.snack), self.snack)
+        self.assertNotEqual(self.snack, BoardSnack(self.record))
@@ -0,0 +1,55 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from unittest import mock
+
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+
+from snacksdb.utils import CacheCounter
+
+
+class CacheCounterTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.CacheCounter.
+    """
+    def setUp(self):
+        self.cache = LocMemCache('cache_counter_tests', {})
+        self.cache.clear()
+        self.counter = CacheCounter(self.cache, 'counter')
+
+    @mock.patch('time.time', return_value=1527000000.0)
+    def test_counter(self, mock_time):
+        """
+        Test that counters start from the clock, once, and count up from there.
+        """
+        self.assertIsNone(self.counter.incr())
+
+        self.assertEqual(self.counter.start(), 1527000000000)
+        self.assertIsNone(self.counter.start())
+        self.assertEqual(self.counter.incr(), 1527000000001)
+        self.assertEqual(self.counter.get(), 1527000000001)
+
+        # An evicted counter starts again from the clock, past the numbers it handed out.
+        self.cache.delete('counter')
+        mock_time.return_value += 1
+        self.assertEqual(self.counter.get(), 1527000001000)
+
+    @mock.patch('time.time', return_value=1527000000.0)
+    def test_bump(self, mock_time):
+        """
+        Test that bumping a counter starts it if it isn't running.
+        """
+        self.assertEqual(self.counter.bump(), 1527000000001)
+        self.assertEqual(self.counter.bump(), 1527000000002)
+
+    def test_no_cache(self):
+        """
+        Test that a counter the cache can't hold has no value.
+        """
+        counter = CacheCounter(DummyCache('dummy', {}), 'counter')
+        self.assertIsNone(counter.get())
+        self.assertIsNone(counter.incr())
+        self.assertIsNone(counter.bump())
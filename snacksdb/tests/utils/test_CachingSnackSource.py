@@ -0,0 +1,181 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import time
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from snacksdb.utils import (
+    AbstractSnackSource, CachingSnackSource, SnackAPISource, SnackSourceException
+)
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'snack_catalog_tests': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'snack_catalog_tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class CachingSnackSourceTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.CachingSnackSource.
+    """
+    def setUp(self):
+        self.wrapped = mock.MagicMock(spec=AbstractSnackSource)
+        self.wrapped.list.return_value = [{'id': 1001, 'optional': True}]
+        self.source = CachingSnackSource(
+            source=self.wrapped, ttl=60, stale_ttl=600, cache_alias='snack_catalog_tests'
+        )
+        self.source.cache.clear()
+
+    def test___init__(self):
+        """
+        Test that CachingSnackSource wraps settings.SNACK_CACHE_SOURCE_CLASS by
+        default, and refuses to wrap itself.
+        """
+        path = 'snacksdb.utils.SnackAPISource.SnackAPISource'
+        with override_settings(SNACK_CACHE_SOURCE_CLASS=path):
+            self.assertIsInstance(CachingSnackSource().source, SnackAPISource)
+
+        path = 'snacksdb.utils.CachingSnackSource.CachingSnackSource'
+        with override_settings(SNACK_CACHE_SOURCE_CLASS=path):
+            with self.assertRaises(ImproperlyConfigured):
+                CachingSnackSource()
+
+    def test_list_cold(self):
+        """
+        Test that a cache miss fetches the catalog from the wrapped source
+        and that subsequent fresh reads are served from the cache.
+        """
+        self.assertEqual(self.source.list(), [{'id': 1001, 'optional': True}])
+        self.assertEqual(self.source.list(), [{'id': 1001, 'optional': True}])
+
+        self.wrapped.list.assert_called_once_with()
+        self.assertIsNone(self.source.refresh_thread)
+
+    def test_list_stale(self):
+        """
+        Test that a stale catalog is served immediately while a
+        single background refresh fetches a new one.
+        """
+        stale_snacks = [{'id': 1000, 'optional': False}]
+        self.source.cache.set(self.source.CATALOG_KEY, (time.time() - 120, 'stale', stale_snacks))
+
+        self.assertEqual(self.source.list(), stale_snacks)
+        self.source.refresh_thread.join()
+
+        self.wrapped.list.assert_called_once_with()
+        self.assertEqual(self.source.list(), [{'id': 1001, 'optional': True}])
+        self.assertIsNone(self.source.cache.get(self.source.REFRESH_LOCK_KEY))
+
+    def test_list_stale_refresh_in_progress(self):
+        """
+        Test that no background refresh starts while another one holds the lock.
+        """
+        stale_snacks = [{'id': 1000, 'optional': False}]
+        self.source.cache.set(self.source.CATALOG_KEY, (time.time() - 120, 'stale', stale_snacks))
+        self.source.cache.add(self.source.REFRESH_LOCK_KEY, True)
+
+        self.assertEqual(self.source.list(), stale_snacks)
+
+        self.assertIsNone(self.source.refresh_thread)
+        self.wrapped.list.assert_not_called()
+
+    def test_list_stale_refresh_failure(self):
+        """
+        Test that a failed background refresh keeps the stale catalog and releases the lock.
+        """
+        stale_snacks = [{'id': 1000, 'optional': False}]
+        self.source.cache.set(self.source.CATALOG_KEY, (time.time() - 120, 'stale', stale_snacks))
+        self.wrapped.list.side_effect = SnackSourceException('oh no!')
+
+        for i in range(2):
+            self.assertEqual(self.source.list(), stale_snacks)
+            self.source.refresh_thread.join()
+
+        self.assertEqual(self.wrapped.list.call_count, 2)
+        self.assertIsNone(self.source.cache.get(self.source.REFRESH_LOCK_KEY))
+
+    def test_get_version(self):
+        """
+        Test that the version is a hash of the cached catalog's contents.
+        """
+        self.assertIsNone(self.source.get_version())
+
+        self.source.list()
+        version = self.source.get_version()
+        self.assertIsNotNone(version)
+
+        self.source.refresh()
+        self.assertEqual(self.source.get_version(), version)
+
+        self.wrapped.list.return_value = [{'id': 1002, 'optional': True}]
+        self.source.refresh()
+        self.assertNotEqual(self.source.get_version(), version)
+
+    def test_suggest(self):
+        """
+        Test that suggesting a snack passes through to the wrapped
+        source and invalidates the cached catalog.
+        """
+        self.wrapped.suggest.return_value = {'id': 1002, 'name': 'Bananas'}
+        self.source.list()
+
+        snack = self.source.suggest('Bananas', 'Safeway')
+
+        self.assertEqual(snack, {'id': 1002, 'name': 'Bananas'})
+        self.wrapped.suggest.assert_called_once_with(
+            'Bananas', 'Safeway', latitude=None, longitude=None
+        )
+        self.assertIsNone(self.source.cache.get(self.source.CATALOG_KEY))
+
+    def test_suggest_during_refresh(self):
+        """
+        Test that a refresh that was under way when a snack was suggested doesn't
+        cache the catalog it fetched before the suggestion.
+        """
+        stale_snacks = [{'id': 1000, 'optional': False}]
+
+        def suggest_while_fetching():
+            self.source.suggest('Bananas', 'Safeway')
+            return stale_snacks
+
+        self.wrapped.list.side_effect = suggest_while_fetching
+        self.assertEqual(self.source.refresh(), stale_snacks)
+        self.assertIsNone(self.source.cache.get(self.source.CATALOG_KEY))
+
+        self.wrapped.list.side_effect = None
+        self.assertEqual(self.source.list(), [{'id': 1001, 'optional': True}])
+        self.assertEqual(self.source.list(), [{'id': 1001, 'optional': True}])
+        self.assertEqual(self.wrapped.list.call_count, 2)
+
+    def test_warm_up(self):
+        """
+        Test that warming up caches the catalog the wrapped source fetched while
+        warming up, falls back to listing it, and leaves a fresh catalog alone.
+        """
+        self.wrapped.warm_up.return_value = [{'id': 1002, 'optional': True}]
+
+        self.assertEqual(self.source.warm_up(), [{'id': 1002, 'optional': True}])
+        self.assertEqual(self.source.list(), [{'id': 1002, 'optional': True}])
+        self.assertFalse(self.wrapped.list.called)
+
+        # Another process has already warmed up the cache.
+        self.wrapped.warm_up.reset_mock()
+        self.source.warm_up()
+        self.assertFalse(self.wrapped.warm_up.called)
+
+        self.source.invalidate()
+        self.wrapped.warm_up.return_value = None
+
+        self.assertEqual(self.source.warm_up(), [{'id': 1001, 'optional': True}])
+        self.wrapped.list.assert_called_once_with()
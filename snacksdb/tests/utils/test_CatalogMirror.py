@@ -0,0 +1,109 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from snacksdb.models import CatalogSync, Snack
+from snacksdb.utils import (
+    AbstractSnackSource, CatalogMirror, LocalSnackSource, SnackAPISource, SnackRecord,
+    SnackSourceException
+)
+
+
+class CatalogMirrorTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.CatalogMirror.
+    """
+    catalog = [
+        SnackRecord(1001, 'Apples', False, 'Whole Foods', 3, '5/4/2018'),
+        SnackRecord(1002, 'Bananas', True, 'Safeway', 0, None),
+    ]
+
+    def setUp(self):
+        self.upstream = mock.MagicMock(spec=AbstractSnackSource)
+        self.upstream.list.return_value = self.catalog
+        self.mirror = CatalogMirror(source=self.upstream)
+
+    def test___init__(self):
+        """
+        Test that CatalogMirror mirrors settings.SNACK_MIRROR_SOURCE_CLASS by
+        default, and refuses to mirror the local catalog.
+        """
+        path = 'snacksdb.utils.SnackAPISource.SnackAPISource'
+        with override_settings(SNACK_MIRROR_SOURCE_CLASS=path):
+            self.assertIsInstance(CatalogMirror().source, SnackAPISource)
+
+        path = 'snacksdb.utils.MirrorSnackSource.MirrorSnackSource'
+        with override_settings(SNACK_MIRROR_SOURCE_CLASS=path):
+            with self.assertRaises(ImproperlyConfigured):
+                CatalogMirror()
+
+    def test_sync(self):
+        """
+        Test that syncing writes only the snacks that changed, and records its outcome.
+        """
+        status = self.mirror.sync()
+
+        self.assertEqual((status.created, status.updated, status.removed), (2, 0, 0))
+        self.assertEqual(LocalSnackSource().list(), self.catalog)
+        self.assertIsNotNone(CatalogSync.get_last_success())
+
+        # Nothing changed upstream, so nothing is written.
+        modified = dict(Snack.objects.values_list('id', 'modified'))
+        status = self.mirror.sync()
+        self.assertEqual((status.created, status.updated, status.removed), (0, 0, 0))
+        self.assertEqual(dict(Snack.objects.values_list('id', 'modified')), modified)
+
+        # Bananas are renamed, Apples go away, and Cherries arrive.
+        self.upstream.list.return_value = [
+            self.catalog[1]._replace(name='Plantains'),
+            SnackRecord(1003, 'Apples', True),
+        ]
+        status = self.mirror.sync()
+
+        self.assertEqual((status.created, status.updated, status.removed), (1, 1, 1))
+        self.assertEqual(status.snacks, 2)
+        self.assertEqual(
+            list(Snack.objects.values_list('id', 'name')), [(1002, 'Plantains'), (1003, 'Apples')]
+        )
+        self.assertGreater(Snack.objects.get(id=1002).modified, modified[1002])
+
+    def test_sync_failure(self):
+        """
+        Test that a failed sync leaves the mirror alone and records the failure.
+        """
+        self.mirror.sync()
+        last_success = CatalogSync.get_last_success()
+
+        self.upstream.list.side_effect = SnackSourceException('oh no!')
+        with self.assertRaises(SnackSourceException):
+            self.mirror.sync()
+
+        self.upstream.list.side_effect = None
+        self.upstream.list.return_value = [SnackRecord(1003, 'Cherries', True, '', 0, '5/32/2018')]
+        with self.assertRaises(SnackSourceException):
+            self.mirror.sync()
+
+        status = CatalogSync.get()
+        self.assertEqual(status.last_success, last_success)
+        self.assertGreater(status.last_attempt, last_success)
+        self.assertEqual(status.failures, 2)
+        self.assertIn('Malformed snack', status.last_error)
+        self.assertEqual(Snack.objects.count(), 2)
+
+        self.upstream.list.return_value = self.catalog
+        status = self.mirror.sync()
+        self.assertEqual((status.failures, status.last_error), (0, ''))
+        self.assertLess(status.get_lag(), datetime.timedelta(minutes=1))
+
+    def test_add(self):
+        self.mirror.add(self.catalog[0])
+        self.mirror.add(self.catalog[0]._replace(purchase_count=4))
+        self.mirror.add(self.catalog[1]._replace(name='Apples'))
+
+        self.assertEqual(list(Snack.objects.values_list('id', 'purchase_count')), [(1001, 4)])
@@ -0,0 +1,63 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from decimal import Decimal as D
+
+from django.test import TestCase
+
+from snacksdb.models import Snack
+from snacksdb.utils import LocalSnackSource, SnackRecord, SnackSourceException
+
+
+class LocalSnackSourceTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.LocalSnackSource.
+    """
+    def setUp(self):
+        self.source = LocalSnackSource()
+        Snack.objects.create(id=1002, name='Bananas', optional=False)
+        Snack.objects.create(id=1001, name='Apples', purchase_count=2)
+
+    def test_list(self):
+        self.assertEqual([s.name for s in self.source.list()], ['Apples', 'Bananas'])
+        self.assertEqual(self.source.list()[0], SnackRecord(
+            id=1001,
+            name='Apples',
+            optional=True,
+            purchase_locations='',
+            purchase_count=2,
+            last_purchase_date=None,
+        ))
+
+    def test_suggest(self):
+        snack = self.source.suggest('Cherries', 'Safeway', D('45.5'), D('-122.6'))
+
+        self.assertEqual(snack.name, 'Cherries')
+        self.assertEqual(snack.purchase_locations, 'Safeway')
+        self.assertTrue(snack.optional)
+        self.assertIn(snack, self.source.list())
+        self.assertEqual(Snack.objects.get(name='Cherries').latitude, D('45.5'))
+
+    def test_suggest_existing(self):
+        with self.assertRaises(SnackSourceException) as cm:
+            self.source.suggest('Apples', 'Safeway')
+
+        self.assertEqual(cm.exception.status_code, 409)
+
+    def test_get_version(self):
+        """
+        Test that the version changes whenever the catalog does.
+        """
+        version = self.source.get_version()
+        self.assertEqual(self.source.get_version(), version)
+
+        self.source.suggest('Cherries', 'Safeway')
+        self.assertNotEqual(self.source.get_version(), version)
+
+        version = self.source.get_version()
+        Snack.objects.filter(name='Cherries').delete()
+        self.assertNotEqual(self.source.get_version(), version)
+
+        Snack.objects.all().delete()
+        self.assertEqual(self.source.get_version(), '0')
@@ -0,0 +1,118 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from snacksdb.models import CatalogSync, Snack
+from snacksdb.utils import (
+    AbstractSnackSource, CatalogMirror, MirrorSnackSource, SnackRecord, SnackSourceException
+)
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'snack_mirror_tests': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'snack_mirror_tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class MirrorSnackSourceTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.MirrorSnackSource.
+    """
+    def setUp(self):
+        self.upstream = mock.MagicMock(spec=AbstractSnackSource)
+        self.upstream.list.return_value = [SnackRecord(1001, 'Apples', True)]
+        self.source = MirrorSnackSource(
+            mirror=CatalogMirror(source=self.upstream), max_staleness=60,
+            cache_alias='snack_mirror_tests'
+        )
+        self.source.cache.clear()
+
+    def test_list(self):
+        """
+        Test that a fresh mirror is served without asking upstream, and that
+        a stale one is synced first.
+        """
+        self.assertEqual([s.name for s in self.source.list()], ['Apples'])
+        self.assertEqual(self.upstream.list.call_count, 1)
+
+        self.upstream.list.return_value = [SnackRecord(1002, 'Bananas', True)]
+        self.assertEqual([s.name for s in self.source.list()], ['Apples'])
+        self.assertEqual(self.upstream.list.call_count, 1)
+
+        an_hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        CatalogSync.objects.update(last_success=an_hour_ago)
+
+        self.assertEqual([s.name for s in self.source.list()], ['Bananas'])
+        self.assertEqual(self.upstream.list.call_count, 2)
+
+    def test_list_sync_failure(self):
+        """
+        Test that a stale mirror is served if syncing it fails, but that
+        a mirror that has never been synced isn't.
+        """
+        self.upstream.list.side_effect = SnackSourceException('oh no!')
+        with self.assertRaises(SnackSourceException):
+            self.source.list()
+
+        Snack.objects.create(id=1001, name='Apples')
+        CatalogSync.objects.update(last_success=timezone.now() - datetime.timedelta(hours=1))
+
+        with self.assertLogs('snacksdb.utils.MirrorSnackSource', 'WARNING'):
+            self.assertEqual([s.name for s in self.source.list()], ['Apples'])
+
+        # Only one request at a time syncs the mirror.
+        self.source.cache.add(MirrorSnackSource.SYNC_LOCK_KEY, True)
+        self.upstream.list.reset_mock()
+        self.source.list()
+        self.assertFalse(self.upstream.list.called)
+
+    @mock.patch('time.sleep')
+    def test_list_first_sync_in_progress(self, mock_sleep):
+        """
+        Test that a mirror that has never been synced isn't served while another
+        request syncs it: the request waits for that sync, or fails.
+        """
+        self.source.cache.add(MirrorSnackSource.SYNC_LOCK_KEY, True)
+
+        # The other request's sync finishes while this one waits.
+        def finish_sync(seconds):
+            Snack.objects.create(id=1001, name='Apples')
+            CatalogSync.objects.create(id=CatalogSync.MIRROR_ID, last_success=timezone.now())
+            self.source.cache.delete(MirrorSnackSource.SYNC_LOCK_KEY)
+
+        mock_sleep.side_effect = finish_sync
+        self.assertEqual([s.name for s in self.source.list()], ['Apples'])
+        self.assertFalse(self.upstream.list.called)
+
+        # The other request's sync fails, or takes too long.
+        CatalogSync.objects.all().delete()
+        self.source.cache.add(MirrorSnackSource.SYNC_LOCK_KEY, True)
+        mock_sleep.side_effect = None
+
+        with mock.patch('time.monotonic', side_effect=[0, 0, MirrorSnackSource.SYNC_WAIT]):
+            with self.assertRaises(SnackSourceException):
+                self.source.list()
+        self.assertFalse(self.upstream.list.called)
+
+    def test_suggest(self):
+        self.upstream.suggest.return_value = SnackRecord(1002, 'Bananas', True)
+
+        snack = self.source.suggest('Bananas', 'Safeway')
+
+        self.assertEqual(snack.name, 'Bananas')
+        self.upstream.suggest.assert_called_once_with(
+            'Bananas', 'Safeway', latitude=None, longitude=None
+        )
+        self.assertTrue(Snack.objects.filter(id=1002, name='Bananas').exists())
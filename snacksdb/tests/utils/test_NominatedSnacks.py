@@ -0,0 +1,116 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from snacksdb.tests.factories import NominationFactory, UserFactory
+from snacksdb.utils import NominatedSnacks, nominated_snacks
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'nominated_snacks_tests': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'nominated_snacks_tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class NominatedSnacksTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.NominatedSnacks.
+    """
+    def setUp(self):
+        self.nominated_snacks = NominatedSnacks(cache_alias='nominated_snacks_tests')
+        self.nominated_snacks.cache.clear()
+
+    def test_get(self):
+        """
+        Test that a set is loaded from the database on a miss, cached, and
+        scoped to its period.
+        """
+        NominationFactory(snack_id=1001)
+        NominationFactory(snack_id=1002, period=201805)
+
+        self.assertEqual(self.nominated_snacks.get(), {1001})
+
+        # Cached sets are served without going back to the database.
+        NominationFactory(snack_id=1003)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.nominated_snacks.get(), {1001})
+
+        self.assertEqual(self.nominated_snacks.get(period=201805), {1002})
+
+    def test_add(self):
+        """
+        Test that adding a snack updates a cached set, but doesn't create one.
+        """
+        self.nominated_snacks.add(1001)
+        self.assertIsNone(self.nominated_snacks.cache.get(self.nominated_snacks.get_cache_key()))
+
+        NominationFactory(snack_id=1001)
+        self.assertEqual(self.nominated_snacks.get(), {1001})
+        NominationFactory(snack_id=1002)
+        self.nominated_snacks.add(1002)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.nominated_snacks.get(), {1001, 1002})
+
+    def test_add_contended(self):
+        """
+        Test that an update that can't take the lock drops the set instead.
+        """
+        NominationFactory(snack_id=1001)
+        self.nominated_snacks.get()
+        NominationFactory(snack_id=1002)
+
+        cache_key = self.nominated_snacks.get_cache_key()
+        lock_key = self.nominated_snacks.LOCK_KEY_TMPL.format(cache_key=cache_key)
+        self.nominated_snacks.cache.set(lock_key, 1)
+        self.nominated_snacks.add(1002)
+
+        self.assertIsNone(self.nominated_snacks.cache.get(cache_key))
+        self.assertEqual(self.nominated_snacks.get(), {1001, 1002})
+
+    def test_get_racing_add(self):
+        """
+        Test that a set loaded before a nomination was saved isn't cached without it.
+        """
+        NominationFactory(snack_id=1001)
+        load = self.nominated_snacks.load
+
+        def load_then_nominate(period=None):
+            snack_ids = load(period)
+            NominationFactory(snack_id=1002)
+            self.nominated_snacks.add(1002)
+            return snack_ids
+
+        with mock.patch.object(self.nominated_snacks, 'load', side_effect=load_then_nominate):
+            self.assertEqual(self.nominated_snacks.get(), {1001})
+
+        self.assertIsNone(self.nominated_snacks.cache.get(self.nominated_snacks.get_cache_key()))
+        self.assertEqual(self.nominated_snacks.get(), {1001, 1002})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.nominated_snacks.get(), {1001, 1002})
+
+    @mock.patch('django.db.transaction.on_commit', side_effect=lambda fn: fn())
+    def test_signals(self, mock_on_commit):
+        """
+        Test that saving and deleting Nominations keeps the cached set up to date.
+        """
+        with mock.patch.object(nominated_snacks, 'cache_alias', 'nominated_snacks_tests'):
+            self.assertEqual(nominated_snacks.get(), set())
+
+            nomination = NominationFactory(snack_id='1001', user=UserFactory())
+            with self.assertNumQueries(0):
+                self.assertEqual(nominated_snacks.get(), {1001})
+
+            nomination.delete()
+            self.assertEqual(nominated_snacks.get(), set())
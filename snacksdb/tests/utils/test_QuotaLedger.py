@@ -0,0 +1,125 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, override_settings
+
+from snacksdb.models import Ballot
+from snacksdb.tests.factories import BallotFactory, NominationFactory, UserFactory
+from snacksdb.utils import ballot_buffer, nomination_ledger, vote_ledger
+from snacksdb.utils.QuotaLedger import NominationLedger, VoteLedger
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'quota_ledger_tests': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'quota_ledger_tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES, VOTES_PER_MONTH=3, NOMINATIONS_PER_MONTH=2)
+class QuotaLedgerTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.QuotaLedger.
+    """
+    def setUp(self):
+        self.vote_ledger = VoteLedger(cache_alias='quota_ledger_tests')
+        self.nomination_ledger = NominationLedger(cache_alias='quota_ledger_tests')
+        self.vote_ledger.cache.clear()
+        self.user = UserFactory()
+
+    def test_remaining_anonymous_user(self):
+        self.assertEqual(self.vote_ledger.remaining(AnonymousUser()), 0)
+
+    def test_remaining(self):
+        """
+        Test that a balance is counted from the database on a miss, cached,
+        and scoped to its period.
+        """
+        BallotFactory(user=self.user)
+        NominationFactory(user=self.user)
+
+        self.assertEqual(self.vote_ledger.remaining(self.user), 2)
+        self.assertEqual(self.nomination_ledger.remaining(self.user), 1)
+        cache_key = self.vote_ledger.get_cache_key(self.user.pk)
+        self.assertEqual(self.vote_ledger.cache.get(cache_key), 2)
+
+        # Cached balances are served without going back to the database.
+        BallotFactory(user=self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.vote_ledger.remaining(self.user), 2)
+
+        # Other periods have their own balances.
+        self.assertEqual(self.vote_ledger.remaining(self.user, period=201805), 3)
+
+    def test_spend_and_refund(self):
+        """
+        Test that spending and refunding adjust cached balances in place,
+        and leave uncached balances to be counted later.
+        """
+        self.vote_ledger.spend(self.user.pk)
+        self.assertIsNone(self.vote_ledger.cache.get(self.vote_ledger.get_cache_key(self.user.pk)))
+
+        self.assertEqual(self.vote_ledger.remaining(self.user), 3)
+        self.vote_ledger.spend(self.user.pk, amount=2)
+        self.assertEqual(self.vote_ledger.remaining(self.user), 1)
+        self.vote_ledger.spend(self.user.pk, amount=2)
+        self.assertEqual(self.vote_ledger.remaining(self.user), 0)
+
+        self.vote_ledger.refund(self.user.pk, amount=2)
+        self.assertEqual(self.vote_ledger.remaining(self.user), 1)
+
+    @override_settings(VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FSYNC=False)
+    def test_count_remaining_buffered(self):
+        """
+        Test that buffered votes are counted from the user's quota, once, even while
+        they're being flushed, and without reading the buffer.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        with mock.patch.object(ballot_buffer, '_path', os.path.join(directory, 'ballots.jsonl')):
+            BallotFactory(user=self.user)
+            self.assertEqual(self.vote_ledger.count_remaining(self.user.pk), 2)
+
+            Ballot.cast(self.user, 1001)
+            with mock.patch.object(ballot_buffer, 'read') as mock_read:
+                self.assertEqual(self.vote_ledger.count_remaining(self.user.pk), 1)
+            mock_read.assert_not_called()
+
+            # A flush has written the votes to the database, but not yet removed them.
+            ballot_buffer.write_batch(ballot_buffer.pending())
+            self.assertEqual(self.vote_ledger.count_remaining(self.user.pk), 1)
+
+            ballot_buffer.flush()
+            self.assertEqual(self.vote_ledger.count_remaining(self.user.pk), 1)
+
+    @mock.patch('django.db.transaction.on_commit', side_effect=lambda fn: fn())
+    def test_signals(self, mock_on_commit):
+        """
+        Test that saving and deleting Ballots and Nominations keeps cached balances up to date.
+        """
+        with mock.patch.object(vote_ledger, 'cache_alias', 'quota_ledger_tests'), \
+                mock.patch.object(nomination_ledger, 'cache_alias', 'quota_ledger_tests'):
+            self.assertEqual(vote_ledger.remaining(self.user), 3)
+            self.assertEqual(nomination_ledger.remaining(self.user), 2)
+
+            ballot = BallotFactory(user=self.user)
+            NominationFactory(user=self.user)
+            BallotFactory(user=self.user, period=201805)
+
+            self.assertEqual(vote_ledger.remaining(self.user), 2)
+            self.assertEqual(nomination_ledger.remaining(self.user), 1)
+
+            ballot.delete()
+            self.assertEqual(vote_ledger.remaining(self.user), 3)
@@ -0,0 +1,76 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import threading
+
+from django.test import SimpleTestCase
+
+from snacksdb.utils import (
+    deactivate_request_timer, get_request_timer, RequestTimer, run_in_background, time_phase
+)
+from snacksdb.utils.RequestTimer import NULL_PHASE
+
+
+class RequestTimerTestCase(SimpleTestCase):
+    """
+    Test cases for snacksdb.utils.RequestTimer.
+    """
+    def setUp(self):
+        self.timer = RequestTimer()
+        previous = self.timer.activate()
+        self.addCleanup(deactivate_request_timer, previous)
+
+    def test_time_phase(self):
+        with time_phase('catalog'):
+            pass
+        with time_phase('catalog'):
+            pass
+        with time_phase('render'):
+            pass
+
+        self.assertEqual(set(self.timer.phases), {'catalog', 'render'})
+        self.assertGreater(self.timer.phases['catalog'], 0)
+        self.assertGreaterEqual(self.timer.elapsed(), sum(self.timer.phases.values()))
+
+    def test_time_phase_inactive(self):
+        """
+        Test that time_phase does nothing when no timer is active.
+        """
+        deactivate_request_timer()
+        self.assertIsNone(get_request_timer())
+        self.assertIs(time_phase('catalog'), NULL_PHASE)
+
+        with time_phase('catalog'):
+            pass
+
+        self.assertEqual(self.timer.phases, {})
+
+    def test_other_threads(self):
+        """
+        Test that timers aren't shared between threads, unless a function is bound
+        to one, as run_in_background does.
+        """
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(get_request_timer()))
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [None])
+
+        def work():
+            with time_phase('snack-api'):
+                return get_request_timer()
+
+        self.assertIs(run_in_background(work).result(), self.timer)
+        self.assertIn('snack-api', self.timer.phases)
+
+        # The pool's thread doesn't keep the timer once it's done.
+        deactivate_request_timer()
+        self.assertIsNone(run_in_background(get_request_timer).result())
+
+    def test_time_query(self):
+        result = self.timer.time_query(lambda *pos: 'rows', 'SELECT 1', None, False, {})
+
+        self.assertEqual(result, 'rows')
+        self.assertEqual(self.timer.queries, 1)
+        self.assertIn('db', self.timer.phases)
@@ -2,11 +2,16 @@
 
 __author__ = 'zach.mott@gmail.com'
 
+import json
 from unittest import mock
 
+import requests
+
 from django.test import TestCase, override_settings
 
-from snacksdb.utils import SnackAPISource, SnackSourceException
+from snacksdb.utils import (
+    deactivate_request_timer, RequestTimer, SnackAPISource, SnackRecord, SnackSourceException
+)
 
 
 class SnackAPISourceTestCase(TestCase):
@@ -14,11 +19,17 @@ class SnackAPISourceTestCase(TestCase):
     Test cases for snacksdb.utils.SnackAPISource.
     """
     API_KEY = 'APIKEY'
+    SNACK = {
+        'id': 1001, 'name': 'Apples', 'optional': True, 'purchaseLocations': 'Giant',
+        'purchaseCount': 2, 'lastPurchaseDate': '5/24/2018',
+    }
+    CATALOG = json.dumps([SNACK]).encode()
 
     def setUp(self):
         self.get_url = SnackAPISource.DEFAULT_API_BASE + SnackAPISource.LIST_PATH
         self.post_url = SnackAPISource.DEFAULT_API_BASE + SnackAPISource.SUGGEST_PATH
         self.headers = {'Authorization': "ApiKey {key}".format(key=self.API_KEY)}
+        self.timeout = (SnackAPISource.DEFAULT_CONNECT_TIMEOUT, SnackAPISource.DEFAULT_READ_TIMEOUT)
         self.name = 'Apples'
         self.location = 'Giant'
 
@@ -51,22 +62,26 @@ class SnackAPISourceTestCase(TestCase):
         with override_settings(SNACK_BACKEND_API_KEY=api_key):
             self.assertDictEqual(SnackAPISource().headers, expected_headers)
 
-    @mock.patch('requests.get')
-    @override_settings(SNACK_BACKEND_API_BASE=None, SNACK_BACKEND_API_KEY=API_KEY)
-    def _list_error(self, status_code, mock_get):
+    @mock.patch.object(SnackAPISource, 'get_session')
+    @override_settings(
+        SNACK_BACKEND_API_BASE=None, SNACK_BACKEND_API_KEY=API_KEY, SNACK_BACKEND_LIST_RETRIES=0
+    )
+    def _list_error(self, status_code, mock_get_session):
         """
         Fake a 'list snacks' GET request, have it return the given status
         code, and return the exception it raised. Helper method for testing
         exception behavior in SnackAPISource.list.
         """
+        mock_get = mock_get_session.return_value.get
         mock_get.return_value = mock.MagicMock(status_code=status_code)
 
         with self.assertRaises(SnackSourceException) as cm:
             SnackAPISource().list()
 
         mock_get.assert_called_once()
-        mock_get.assert_called_with(self.get_url, headers=self.headers)
-        mock_get.return_value.json.assert_not_called()
+        mock_get.assert_called_with(
+            self.get_url, headers=self.headers, timeout=self.timeout, stream=False
+        )
 
         return cm.exception
 
@@ -76,10 +91,11 @@ class SnackAPISourceTestCase(TestCase):
     def test_list_not_200(self):
         self.assertIn('Unknown error', self._list_error(500).msg)
 
-    @mock.patch('requests.get')
+    @mock.patch.object(SnackAPISource, 'get_session')
     @override_settings(SNACK_BACKEND_API_BASE=None, SNACK_BACKEND_API_KEY=API_KEY)
-    def test_list_200(self, mock_get):
-        mock_get.return_value = mock.MagicMock(status_code=200)
+    def test_list_200(self, mock_get_session):
+        mock_get = mock_get_session.return_value.get
+        mock_get.return_value = mock.MagicMock(status_code=200, content=b'[]')
 
         try:
             SnackAPISource().list()
@@ -87,54 +103,221 @@ class SnackAPISourceTestCase(TestCase):
             self.fail('SnackAPISource.list should not raise an error for response code 200.')
 
         mock_get.assert_called_once()
-        mock_get.assert_called_with(self.get_url, headers=self.headers)
-        mock_get.return_value.json.assert_called_once()
-        mock_get.return_value.json.assert_called_with()
+        mock_get.assert_called_with(
+            self.get_url, headers=self.headers, timeout=self.timeout, stream=False
+        )
+        mock_get.return_value.close.assert_called_once_with()
+
+    @mock.patch.object(SnackAPISource, 'get_session')
+    def test_list_parsed(self, mock_get_session):
+        """
+        Test that SnackAPISource.list parses the catalog into SnackRecords, and
+        that a malformed catalog raises SnackSourceException.
+        """
+        response = mock_get_session.return_value.get.return_value
+        response.status_code = 200
+        response.content = self.CATALOG
+
+        snack, = SnackAPISource().list()
+
+        self.assertIsInstance(snack, SnackRecord)
+        self.assertEqual(snack.to_dict(), self.SNACK)
+        self.assertEqual(snack.last_purchase_date, '5/24/2018')
+
+        for malformed in [[{'id': 1001}], {'snacks': []}, [None]]:
+            response.content = json.dumps(malformed).encode()
+            with self.assertRaises(SnackSourceException):
+                SnackAPISource().list()
+
+        response.content = b'[{"id": 1001,'
+        with self.assertRaises(SnackSourceException):
+            SnackAPISource().list()
+
+    @mock.patch('time.monotonic')
+    @mock.patch.object(SnackAPISource, 'get_session')
+    @override_settings(SNACK_BACKEND_VERSION_TTL=60)
+    def test_get_version(self, mock_get_session, mock_monotonic):
+        """
+        Test that SnackAPISource versions the catalog it last fetched, for
+        SNACK_BACKEND_VERSION_TTL seconds.
+        """
+        response = mock_get_session.return_value.get.return_value
+        response.status_code = 200
+        response.content = self.CATALOG
+        mock_monotonic.return_value = 1000
+
+        source = SnackAPISource()
+        self.assertIsNone(source.get_version())
+
+        source.list()
+        version = source.get_version()
+        self.assertIsNotNone(version)
+
+        source.list()
+        self.assertEqual(source.get_version(), version)
+
+        response.content = json.dumps([dict(self.SNACK, purchaseCount=3)]).encode()
+        source.list()
+        self.assertNotEqual(source.get_version(), version)
+
+        mock_monotonic.return_value = 1061
+        self.assertIsNone(source.get_version())
+
+    @mock.patch.object(SnackAPISource, 'get_session')
+    def test_list_timed(self, mock_get_session):
+        """
+        Test that time spent on the Snack API counts towards the active RequestTimer.
+        """
+        mock_get_session.return_value.get.return_value = mock.MagicMock(
+            status_code=200, content=b'[]'
+        )
+        timer = RequestTimer()
+        previous = timer.activate()
+        try:
+            SnackAPISource().list()
+        finally:
+            deactivate_request_timer(previous)
+
+        self.assertIn('snack-api', timer.phases)
+
+    @mock.patch('time.sleep')
+    @mock.patch.object(SnackAPISource, 'get_session')
+    @override_settings(SNACK_BACKEND_LIST_RETRIES=2, SNACK_BACKEND_RETRY_BACKOFF=0.5)
+    def test_list_retries(self, mock_get_session, mock_sleep):
+        """
+        Test that SnackAPISource.list retries connection failures, timeouts and
+        transient upstream errors with jittered backoff, up to the configured limit.
+        """
+        unavailable = mock.MagicMock(status_code=503)
+        success = mock.MagicMock(status_code=200, content=self.CATALOG)
+        mock_get = mock_get_session.return_value.get
+        mock_get.side_effect = [requests.exceptions.ConnectionError(), unavailable, success]
+
+        self.assertEqual(SnackAPISource().list(), [SnackRecord.from_dict(self.SNACK)])
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
 
-    @mock.patch('requests.post')
+        # Responses that are retried release their connections.
+        unavailable.close.assert_called_once_with()
+
+        # Each delay is drawn from [0, backoff * 2 ** attempt].
+        for attempt, call in enumerate(mock_sleep.call_args_list):
+            self.assertGreaterEqual(call[0][0], 0)
+            self.assertLessEqual(call[0][0], 0.5 * (2 ** attempt))
+
+        # Give up once the retries are exhausted.
+        mock_get.reset_mock()
+        mock_get.side_effect = requests.exceptions.ReadTimeout()
+
+        with self.assertRaises(SnackSourceException) as cm:
+            SnackAPISource().list()
+
+        self.assertIn("Couldn't reach the Snack API", cm.exception.msg)
+        self.assertEqual(mock_get.call_count, 3)
+
+    @mock.patch('time.sleep')
+    @mock.patch.object(SnackAPISource, 'get_session')
+    @override_settings(SNACK_BACKEND_LIST_RETRIES=2)
+    def test_warm_up(self, mock_get_session, mock_sleep):
+        """
+        Test that warming up lists snacks once, without retrying failures.
+        """
+        mock_get = mock_get_session.return_value.get
+        mock_get.return_value = mock.MagicMock(status_code=200, content=self.CATALOG)
+
+        self.assertEqual(SnackAPISource().warm_up(), [SnackRecord.from_dict(self.SNACK)])
+
+        mock_get.reset_mock()
+        mock_get.return_value = None
+        mock_get.side_effect = requests.exceptions.ConnectionError()
+
+        with self.assertRaises(SnackSourceException):
+            SnackAPISource().warm_up()
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertFalse(mock_sleep.called)
+
+    def test_get_session(self):
+        """
+        Test that SnackAPISource instances share one session per process.
+        """
+        session = SnackAPISource.get_session()
+
+        self.assertIsInstance(session, requests.Session)
+        self.assertIs(SnackAPISource().get_session(), session)
+
+        with mock.patch('os.getpid', return_value=-1):
+            self.assertIsNot(SnackAPISource.get_session(), session)
+
+    @mock.patch.object(SnackAPISource, 'get_session')
     @override_settings(SNACK_BACKEND_API_BASE=None, SNACK_BACKEND_API_KEY=API_KEY)
-    def _post_error(self, status_code, mock_post):
+    def _post_error(self, status_code, mock_get_session):
         """
         Fake a 'nominate snack' POST request, have it return the given status
         code, and return the exception it raised. Helper method for testing
         exception behavior in SnackAPISource.suggest.
         """
+        mock_post = mock_get_session.return_value.post
         mock_post.return_value = mock.MagicMock(status_code=status_code)
 
         with self.assertRaises(SnackSourceException) as cm:
             SnackAPISource().suggest(self.name, self.location)
 
         mock_post.assert_called_once()
-        mock_post.assert_called_with(self.get_url, headers=self.headers, json={
-            'name': self.name,
-            'location': self.location,
-        })
-        mock_post.return_value.json.assert_not_called()
+        mock_post.assert_called_with(
+            self.get_url, headers=self.headers, timeout=self.timeout,
+            json={'name': self.name, 'location': self.location}
+        )
 
         return cm.exception
 
     def test_suggest_400(self):
-        self.assertIn('Malformed suggestion', self._post_error(400).msg)
+        error = self._post_error(400)
+        self.assertIn('Malformed suggestion', error.msg)
+        self.assertEqual(error.status_code, 400)
 
     def test_suggest_401(self):
-        self.assertIn('Access denied', self._post_error(401).msg)
+        error = self._post_error(401)
+        self.assertIn('Access denied', error.msg)
+        self.assertEqual(error.status_code, 401)
 
     def test_suggest_409(self):
-        self.assertIn('snack already exists', self._post_error(409).msg)
+        error = self._post_error(409)
+        self.assertIn('snack already exists', error.msg)
+        self.assertEqual(error.status_code, 409)
 
     def test_suggest_not_200(self):
-        self.assertIn('Unknown error with Snack API', self._post_error(500).msg)
+        error = self._post_error(500)
+        self.assertIn('Unknown error with Snack API', error.msg)
+        self.assertEqual(error.status_code, 500)
+
+    @mock.patch.object(SnackAPISource, 'get_session')
+    def test_suggest_timeout(self, mock_get_session):
+        """
+        Test that SnackAPISource.suggest doesn't retry, since suggestions aren't idempotent.
+        """
+        mock_post = mock_get_session.return_value.post
+        mock_post.side_effect = requests.exceptions.ReadTimeout()
+
+        with self.assertRaises(SnackSourceException) as cm:
+            SnackAPISource().suggest(self.name, self.location)
+
+        self.assertIn("Couldn't reach the Snack API", cm.exception.msg)
+        mock_post.assert_called_once()
 
-    @mock.patch('requests.post')
+    @mock.patch.object(SnackAPISource, 'get_session')
     @override_settings(SNACK_BACKEND_API_BASE=None, SNACK_BACKEND_API_KEY=API_KEY)
-    def test_suggest_200(self, mock_post):
+    def test_suggest_200(self, mock_get_session):
         """
         Test that SnackAPISource.suggest handles permutations of 'latitude'
         and 'longitude' correctly. From the application's point of view,
         NominationForm should ensure that invalid permuations don't get
         sent to SnackAPISource.suggest.
         """
-        mock_post.return_value = mock.MagicMock(status_code=200)
+        mock_post = mock_get_session.return_value.post
+        mock_post.return_value = mock.MagicMock(
+            status_code=200, content=json.dumps(self.SNACK).encode()
+        )
 
         # 'included' indicates whether we expect latitude and
         # longitude be included with the request payload.
@@ -153,12 +336,13 @@ class SnackAPISourceTestCase(TestCase):
                 data.update(test_case)
 
             # Make the request, assert that it behaved correctly.
-            SnackAPISource().suggest(self.name, self.location, **test_case)
+            snack = SnackAPISource().suggest(self.name, self.location, **test_case)
+            self.assertEqual(snack, SnackRecord.from_dict(self.SNACK))
 
             mock_post.assert_called_once()
-            mock_post.assert_called_with(self.post_url, headers=self.headers, json=data)
-            mock_post.return_value.json.assert_called_once()
-            mock_post.return_value.json.assert_called_with()
+            mock_post.assert_called_with(
+                self.post_url, headers=self.headers, json=data, timeout=self.timeout
+            )
 
             # Reset the mocks for the next test case.
             mock_post.reset_mock()
@@ -0,0 +1,118 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import unittest
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from snacksdb.utils import SnackAPISource, SnackCatalogDecoder, SnackRecord, SnackSourceException
+
+# The module, rather than the class of the same name that snacksdb.utils exports.
+decoder_module = importlib.import_module('snacksdb.utils.SnackCatalogDecoder')
+
+
+class SnackCatalogDecoderTestCase(SimpleTestCase):
+    """
+    Test cases for snacksdb.utils.SnackCatalogDecoder.
+    """
+    CATALOG = [
+        {
+            'id': 1001, 'name': 'Apples', 'optional': True, 'purchaseLocations': 'Giant',
+            'purchaseCount': 2, 'lastPurchaseDate': '5/24/2018',
+        },
+        {'id': 1002, 'name': 'Bananas', 'optional': False, 'purchaseCount': 0},
+    ]
+
+    def setUp(self):
+        self.body = json.dumps(self.CATALOG).encode()
+        self.records = [SnackRecord.from_dict(snack) for snack in self.CATALOG]
+
+    def test___init__(self):
+        """
+        Test that the decoder picks the fastest parser installed, unless told otherwise.
+        """
+        installed = filter(SnackCatalogDecoder.is_available, SnackCatalogDecoder.PARSERS)
+        self.assertEqual(SnackCatalogDecoder().parser, next(installed))
+        self.assertEqual(SnackCatalogDecoder(parser='json').parser, 'json')
+
+        with mock.patch.object(decoder_module, 'ujson', None):
+            with self.assertRaises(ImproperlyConfigured):
+                SnackCatalogDecoder(parser='ujson')
+
+        # Streaming falls back to parsing whole bodies without ijson.
+        with mock.patch.object(decoder_module, 'ijson', None):
+            self.assertFalse(SnackCatalogDecoder(stream=True).stream)
+
+    def test_decode_catalog_body(self):
+        """
+        Test that every installed parser decodes a catalog into SnackRecords.
+        """
+        for parser in SnackCatalogDecoder.PARSERS:
+            if not SnackCatalogDecoder.is_available(parser):
+                continue
+
+            decoder = SnackCatalogDecoder(parser=parser)
+            self.assertEqual(decoder.decode_catalog_body(self.body), self.records)
+
+            for malformed in [b'', b'[{"id": 1001,', b'{"snacks": []}', b'[{"id": 1001}]']:
+                with self.assertRaises(ValueError):
+                    decoder.decode_catalog_body(malformed)
+
+    @unittest.skipUnless(SnackCatalogDecoder.is_available('ijson'), 'ijson is not installed.')
+    def test_decode_catalog_stream(self):
+        """
+        Test that a streaming decoder reads the catalog from the raw response, undoing
+        its Content-Encoding, and raises ValueError if the catalog is malformed.
+        """
+        decoder = SnackCatalogDecoder(stream=True)
+        self.assertTrue(decoder.stream)
+
+        response = mock.MagicMock(raw=io.BytesIO(self.body))
+        self.assertEqual(decoder.decode_catalog(response), self.records)
+        self.assertTrue(response.raw.decode_content)
+
+        fp = gzip.GzipFile(fileobj=io.BytesIO(gzip.compress(self.body)))
+        self.assertEqual(decoder.decode_catalog_stream(fp), self.records)
+
+        # Only the fields SnackRecords hold are kept from each snack.
+        catalog = [dict(snack, photos=[{'url': 'x'}], vendor={'id': 1}) for snack in self.CATALOG]
+        fp = io.BytesIO(json.dumps(catalog).encode())
+        self.assertEqual(
+            list(decoder.iter_snacks(fp)),
+            [{field: snack[field] for field in SnackRecord.API_FIELDS if field in snack}
+             for snack in self.CATALOG]
+        )
+
+        for malformed in [b'[{"id": 1001,', b'[{"id": 1001}]', b'[1001]', b'[{"id": [1001]}]']:
+            with self.assertRaises(ValueError):
+                decoder.decode_catalog_stream(io.BytesIO(malformed))
+
+    @unittest.skipUnless(SnackCatalogDecoder.is_available('ijson'), 'ijson is not installed.')
+    @mock.patch.object(SnackAPISource, 'get_session')
+    @override_settings(SNACK_BACKEND_STREAM_CATALOG=True)
+    def test_snack_api_source_stream(self, mock_get_session):
+        """
+        Test that SnackAPISource streams the catalog when configured to.
+        """
+        mock_get = mock_get_session.return_value.get
+        mock_get.return_value = mock.MagicMock(status_code=200, raw=io.BytesIO(self.body))
+
+        source = SnackAPISource()
+        self.assertEqual(source.list(), self.records)
+        self.assertTrue(mock_get.call_args[1]['stream'])
+        mock_get.return_value.close.assert_called_once_with()
+
+        # The catalog is versioned by the body that was streamed.
+        self.assertEqual(source.get_version(), hashlib.md5(self.body).hexdigest())
+
+        mock_get.return_value = mock.MagicMock(status_code=200, raw=io.BytesIO(b'[{"id"'))
+        with self.assertRaises(SnackSourceException):
+            SnackAPISource().list()
@@ -0,0 +1,48 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import pickle
+
+from django.test import SimpleTestCase
+
+from snacksdb.utils import SnackRecord
+
+
+class SnackRecordTestCase(SimpleTestCase):
+    """
+    Test cases for snacksdb.utils.SnackRecord.
+    """
+    snack = {
+        'id': 1001, 'name': 'Apples', 'optional': False, 'purchaseLocations': 'Whole Foods',
+        'purchaseCount': 3, 'lastPurchaseDate': '5/4/2018',
+    }
+
+    def test_from_dict(self):
+        record = SnackRecord.from_dict(self.snack)
+
+        self.assertEqual(record, SnackRecord(1001, 'Apples', False, 'Whole Foods', 3, '5/4/2018'))
+        self.assertEqual(record.to_dict(), self.snack)
+
+        # Only 'id', 'name' and 'optional' are required.
+        record = SnackRecord.from_dict({'id': '1002', 'name': 'Bananas', 'optional': True})
+        self.assertEqual(record, SnackRecord(1002, 'Bananas', True, '', 0, None))
+
+        for malformed in [{'id': 1003}, {'id': 'x', 'name': 'Cherries', 'optional': True}, None]:
+            with self.assertRaises(ValueError):
+                SnackRecord.from_dict(malformed)
+
+    def test_immutable(self):
+        """
+        Test that records can't be changed, so catalogs can be shared between
+        threads, and that they stay compact and cacheable.
+        """
+        record = SnackRecord.from_dict(self.snack)
+
+        with self.assertRaises(AttributeError):
+            record.name = 'Oranges'
+        with self.assertRaises(AttributeError):
+            record.total_votes = 3
+
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
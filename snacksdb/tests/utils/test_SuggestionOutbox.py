@@ -0,0 +1,84 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from unittest import mock
+
+from django.test import TestCase
+
+from snacksdb.models import Nomination, SnackSuggestion
+from snacksdb.tests.factories import SnackRecordFactory, UserFactory
+from snacksdb.utils import AbstractSnackSource, SnackSourceException, SuggestionOutbox
+
+
+class SuggestionOutboxTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.SuggestionOutbox.
+    """
+    # How the fake source answers suggestions, by name.
+    errors = {
+        'Apples': SnackSourceException('Error: That snack already exists!', status_code=409),
+        'Bananas': SnackSourceException('Error: That snack already exists!', status_code=409),
+        'Dates': SnackSourceException('Malformed suggestion.', status_code=400),
+        'Figs': SnackSourceException('Unknown error.', status_code=503),
+    }
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.source = mock.MagicMock(spec=AbstractSnackSource)
+        self.source.suggest.side_effect = self.suggest
+        self.source.list.return_value = [SnackRecordFactory(id=1001, name='Apples')]
+        self.outbox = SuggestionOutbox(self.source, concurrency=2, max_attempts=3, backoff=0)
+
+    def suggest(self, name, location, latitude=None, longitude=None):
+        if name in self.errors:
+            raise self.errors[name]
+        return SnackRecordFactory(id=2001, name=name)
+
+    def enqueue(self, name):
+        return SnackSuggestion.enqueue(self.user, name, 'Safeway')
+
+    def get_outcome(self, suggestion):
+        suggestion.refresh_from_db()
+        nomination = suggestion.nomination
+        return suggestion.status, nomination.snack_id if nomination else None
+
+    def test_drain(self):
+        suggestions = [
+            self.enqueue(name) for name in ['Apples', 'Bananas', 'Cherries', 'Dates', 'Figs']
+        ]
+
+        outcomes = self.outbox.drain()
+
+        # Figs fails twice, and is retried, then fails for good.
+        self.assertEqual(outcomes, {
+            'duplicate': 2, 'submitted': 1, 'rejected': 1, 'retry': 2, 'failed': 1
+        })
+        self.assertEqual([self.get_outcome(s) for s in suggestions], [
+            # Apples is in the catalog, so it's nominated in place of the suggestion.
+            (SnackSuggestion.DUPLICATE, 1001),
+            (SnackSuggestion.DUPLICATE, None),
+            (SnackSuggestion.SUBMITTED, 2001),
+            (SnackSuggestion.REJECTED, None),
+            (SnackSuggestion.FAILED, None),
+        ])
+        self.assertEqual(suggestions[4].attempts, 3)
+        self.assertEqual(suggestions[4].last_error, 'Unknown error.')
+        self.assertEqual(self.source.suggest.call_count, 7)
+
+        # Suggestions that didn't become nominations gave them back.
+        self.assertEqual(
+            sorted(Nomination.objects.values_list('snack_id', flat=True)), [1001, 2001]
+        )
+
+        self.assertEqual(self.outbox.drain(), {})
+
+    def test_drain_catalog_unavailable(self):
+        """
+        Test that a duplicate is resolved, even if the catalog can't be searched for it.
+        """
+        self.source.list.side_effect = SnackSourceException('oh no!')
+        suggestion = self.enqueue('Apples')
+
+        self.assertEqual(self.outbox.drain(), {'duplicate': 1})
+        self.assertEqual(self.get_outcome(suggestion), (SnackSuggestion.DUPLICATE, None))
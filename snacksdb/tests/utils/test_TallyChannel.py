@@ -0,0 +1,97 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from snacksdb.tests.factories import BallotFactory
+from snacksdb.utils import get_period, tally_channel
+from snacksdb.utils.TallyChannel import TallyChannel
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'tally_channel_tests': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tally_channel_tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES, VOTE_STREAM_CACHE_ALIAS='tally_channel_tests')
+class TallyChannelTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.TallyChannel.
+    """
+    def setUp(self):
+        tally_channel.cache.clear()
+
+    def test_publish(self):
+        """
+        Test that each change gets the next sequence number, and can be read back.
+        """
+        self.assertIsNone(tally_channel.get_sequence())
+
+        first = tally_channel.publish(201806, 1001, 3, 4)
+        second = tally_channel.publish(201806, 1002, 1)
+
+        self.assertEqual(second, first + 1)
+        self.assertEqual(tally_channel.get_sequence(), second)
+        self.assertEqual(tally_channel.read(first, second + 5), {
+            first: {'period': 201806, 'snack_id': 1001, 'total_votes': 3, 'version': 4},
+            second: {'period': 201806, 'snack_id': 1002, 'total_votes': 1, 'version': 0},
+        })
+
+    def test_publish_no_cache(self):
+        """
+        Test that publishing is a no-op when the cache can't hold the log.
+        """
+        channel = TallyChannel(cache_alias='default')
+        self.assertIsNone(channel.publish(201806, 1001, 3))
+        self.assertIsNone(channel.get_sequence())
+
+    def test_publish_tally(self):
+        for i in range(2):
+            BallotFactory(snack_id=1001)
+
+        seq = tally_channel.publish_tally(get_period(), 1001)
+        self.assertEqual(tally_channel.read(seq, seq)[seq]['total_votes'], 2)
+
+        seq = tally_channel.publish_tally(get_period(), 1002)
+        self.assertEqual(tally_channel.read(seq, seq)[seq]['total_votes'], 0)
+
+    def test_ballots_publish(self):
+        """
+        Test that casting or deleting a Ballot publishes its snack's new total,
+        when the stream is enabled.
+        """
+        callbacks = []
+
+        def commit():
+            while callbacks:
+                callbacks.pop(0)()
+
+        with mock.patch('django.db.transaction.on_commit', side_effect=callbacks.append):
+            BallotFactory(snack_id=1001)
+            commit()
+            self.assertIsNone(tally_channel.get_sequence())
+
+            with override_settings(VOTE_STREAM_ENABLED=True):
+                ballot = BallotFactory(snack_id=1001)
+                commit()
+                seq = tally_channel.get_sequence()
+                self.assertEqual(tally_channel.read(seq, seq)[seq], {
+                    'period': get_period(), 'snack_id': 1001, 'total_votes': 2, 'version': 2,
+                })
+
+                ballot.delete()
+                commit()
+
+        # A deletion lowers the total, but the version still goes up.
+        seq = tally_channel.get_sequence()
+        self.assertEqual(tally_channel.read(seq, seq)[seq]['total_votes'], 1)
+        self.assertEqual(tally_channel.read(seq, seq)[seq]['version'], 3)
@@ -0,0 +1,131 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from snacksdb.utils import TallyChannel, TallyHub
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'tally_hub_tests': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tally_hub_tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class TallyHubTestCase(SimpleTestCase):
+    """
+    Test cases for snacksdb.utils.TallyHub.
+    """
+    def setUp(self):
+        self.channel = TallyChannel(cache_alias='tally_hub_tests')
+        self.channel.cache.clear()
+        self.hub = TallyHub(self.channel)
+
+        # Poll by hand, rather than from the hub's thread.
+        patcher = mock.patch.object(TallyHub, 'start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.hub.poll()
+
+    def test_listen_from_now(self):
+        """
+        Test that clients only receive changes published after they start listening.
+        """
+        self.channel.publish(201806, 1001, 1)
+        hub = TallyHub(self.channel)
+        hub.poll()
+
+        cursor, events = hub.listen(timeout=0)
+        self.assertEqual(events, [])
+
+        seq = self.channel.publish(201806, 1001, 2)
+        hub.poll()
+
+        self.assertEqual(hub.listen(cursor, timeout=0), (seq, [
+            (seq, {'period': 201806, 'snack_id': 1001, 'total_votes': 2, 'version': 0}),
+        ]))
+        self.assertEqual(hub.listen(seq, timeout=0), (seq, []))
+
+    def test_listen_empty_channel(self):
+        """
+        Test that the first change published to an empty channel reaches clients.
+        """
+        cursor, events = self.hub.listen(timeout=0)
+        seq = self.channel.publish(201806, 1001, 1)
+        self.hub.poll()
+
+        self.assertEqual(self.hub.listen(cursor, timeout=0)[1], [
+            (seq, {'period': 201806, 'snack_id': 1001, 'total_votes': 1, 'version': 0}),
+        ])
+
+    def test_listen_wakes_up(self):
+        """
+        Test that waiting clients are woken up as soon as changes are polled.
+        """
+        cursor, events = self.hub.listen(timeout=0)
+        received = []
+
+        def listen():
+            received.append(self.hub.listen(cursor, timeout=10))
+
+        listener = threading.Thread(target=listen)
+        listener.start()
+
+        seq = self.channel.publish(201806, 1002, 4)
+        self.hub.poll()
+        listener.join(5)
+
+        self.assertFalse(listener.is_alive())
+        self.assertEqual(received, [(seq, [
+            (seq, {'period': 201806, 'snack_id': 1002, 'total_votes': 4, 'version': 0}),
+        ])])
+
+    def test_poll_late_change(self):
+        """
+        Test that a change which was numbered but not yet written is waited for
+        for one poll, and then skipped.
+        """
+        self.channel.publish(201806, 1001, 1)
+        self.hub.poll()
+        cursor, events = self.hub.listen(timeout=0)
+
+        late = self.channel.cache.incr(self.channel.SEQUENCE_KEY)
+        seq = self.channel.publish(201806, 1002, 4)
+        self.hub.poll()
+        self.assertEqual(self.hub.listen(cursor, timeout=0), (cursor, []))
+
+        self.hub.poll()
+        self.assertEqual(self.hub.listen(cursor, timeout=0)[1], [
+            (seq, {'period': 201806, 'snack_id': 1002, 'total_votes': 4, 'version': 0}),
+        ])
+        self.assertLess(late, seq)
+
+    def test_poll_out_of_order(self):
+        """
+        Test that a total published after a newer one for the same snack is dropped.
+        """
+        cursor, events = self.hub.listen(timeout=0)
+
+        newer = self.channel.publish(201806, 1001, 5, 6)
+        self.channel.publish(201806, 1001, 4, 5)
+        other = self.channel.publish(201806, 1002, 1, 1)
+        self.hub.poll()
+
+        cursor, events = self.hub.listen(cursor, timeout=0)
+        self.assertEqual([seq for seq, event in events], [newer, other])
+
+        latest = self.channel.publish(201806, 1001, 6, 7)
+        self.hub.poll()
+        self.assertEqual(self.hub.listen(cursor, timeout=0)[1], [
+            (latest, {'period': 201806, 'snack_id': 1001, 'total_votes': 6, 'version': 7}),
+        ])
@@ -0,0 +1,71 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+
+from django.test import TestCase
+
+from snacksdb.tests.factories import BallotFactory, NominationFactory, SnackRecordFactory
+from snacksdb.utils import get_tzinfo
+from snacksdb.utils.VoteAnalytics import VoteAnalytics
+
+
+class VoteAnalyticsTestCase(TestCase):
+    """
+    Test cases for snacksdb.utils.VoteAnalytics.
+    """
+    def setUp(self):
+        may = datetime.datetime(2018, 5, 10, 12, 0, 0, tzinfo=get_tzinfo())
+        june = datetime.datetime(2018, 6, 3, 12, 0, 0, tzinfo=get_tzinfo())
+
+        # May: 1001 wins outright. 1003 is nominated, but gets no votes.
+        for snack_id in [1001, 1002, 1003]:
+            NominationFactory.make_in_the_past(may, snack_id=snack_id)
+        for snack_id in [1001, 1001, 1002]:
+            BallotFactory.make_in_the_past(may, snack_id=snack_id)
+
+        # June: 1001 and 1002 tie.
+        for snack_id in [1001, 1002]:
+            NominationFactory.make_in_the_past(june, snack_id=snack_id)
+        for snack_id in [1001, 1002, 1002, 1001]:
+            BallotFactory.make_in_the_past(june, snack_id=snack_id)
+
+    def test_votes_by_month(self):
+        header, rows = VoteAnalytics(chunk_size=2).votes_by_month()
+
+        self.assertEqual(header, ['period', 'snack_id', 'votes'])
+        self.assertEqual(rows, [
+            (201805, 1001, 2), (201805, 1002, 1), (201806, 1001, 2), (201806, 1002, 2),
+        ])
+
+    def test_votes_by_month_in_range(self):
+        self.assertEqual(VoteAnalytics(since=201806).votes_by_month()[1], [
+            (201806, 1001, 2), (201806, 1002, 2),
+        ])
+        self.assertEqual(VoteAnalytics(since=201807).votes_by_month()[1], [])
+
+    def test_win_rates(self):
+        header, rows = VoteAnalytics().win_rates()
+
+        self.assertEqual(header, ['snack_id', 'months', 'wins', 'win_rate'])
+        self.assertEqual(rows, [(1001, 2, 2, 1.0), (1002, 2, 1, 0.5), (1003, 1, 0, 0.0)])
+        self.assertEqual(VoteAnalytics(since=201807).win_rates()[1], [])
+
+    def test_time_to_purchase(self):
+        catalog = [
+            SnackRecordFactory(id=1001, last_purchase_date='5/24/2018'),
+            SnackRecordFactory(id=1002, last_purchase_date='4/1/2018'),
+            SnackRecordFactory(id=1003, last_purchase_date=None),
+        ]
+        header, rows = VoteAnalytics().time_to_purchase(catalog)
+
+        self.assertEqual(
+            header, ['snack_id', 'first_nominated', 'last_purchased', 'days_to_purchase']
+        )
+        self.assertEqual(rows, [
+            (1001, datetime.date(2018, 5, 10), datetime.date(2018, 5, 24), 14),
+            # Last purchased before it was nominated.
+            (1002, datetime.date(2018, 5, 10), datetime.date(2018, 4, 1), None),
+            (1003, datetime.date(2018, 5, 10), None, None),
+        ])
@@ -2,11 +2,17 @@
 
 __author__ = 'zach.mott@gmail.com'
 
+from unittest import mock
+
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase, override_settings
 
-from snacksdb.utils import get_snack_source, SnackAPISource
+from snacksdb.tests.sources import STATIC_SNACK_SOURCE, StaticSnackSource
+from snacksdb.utils import (
+    get_snack_source, reset_snack_source, SnackAPISource, SnackSourceException,
+    warm_up_snack_source
+)
 
 
 class UtilsTestCase(TestCase):
@@ -48,3 +54,44 @@ class UtilsTestCase(TestCase):
                       "SNACK_SOURCE_CLASS refers to SnackAPISource")
 
         self.assertIsInstance(source, SnackAPISource)
+
+    @override_settings(SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE)
+    def test_snack_source_shared(self):
+        """
+        Test that get_snack_source returns one instance per process until the
+        settings change or it's reset, and a new one for an explicit path.
+        """
+        source = get_snack_source()
+
+        self.assertIsInstance(source, StaticSnackSource)
+        self.assertIs(get_snack_source(), source)
+        self.assertIsNot(get_snack_source(STATIC_SNACK_SOURCE), source)
+
+        with override_settings(SNACK_BACKEND_API_KEY='APIKEY'):
+            self.assertIsNot(get_snack_source(), source)
+            source = get_snack_source()
+
+        reset_snack_source()
+        self.assertIsNot(get_snack_source(), source)
+
+    @override_settings(SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE)
+    def test_warm_up_snack_source(self):
+        """
+        Test that warm_up_snack_source warms up the snack source only if
+        settings.SNACK_SOURCE_WARM_UP is set, and that failures are logged.
+        """
+        with mock.patch.object(StaticSnackSource, 'warm_up') as mock_warm_up:
+            with override_settings(SNACK_SOURCE_WARM_UP=False):
+                warm_up_snack_source()
+            self.assertFalse(mock_warm_up.called)
+
+            with override_settings(SNACK_SOURCE_WARM_UP=True):
+                warm_up_snack_source()
+            mock_warm_up.assert_called_once_with()
+
+            mock_warm_up.side_effect = SnackSourceException('Upstream is down.')
+            with override_settings(SNACK_SOURCE_WARM_UP=True):
+                with self.assertLogs('snacksdb.utils', 'WARNING') as cm:
+                    warm_up_snack_source()
+
+            self.assertIn('Upstream is down.', cm.output[0])
@@ -0,0 +1,119 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from snacksdb.tests.factories import (
+    BallotFactory, NominationFactory, SnackRecordFactory, UserFactory
+)
+from snacksdb.tests.sources import STATIC_SNACK_SOURCE, StaticSnackSource
+from snacksdb.utils import board_version, get_period
+from snacksdb.views.api import Board
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'board_api_tests': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'board_api_tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES, SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE)
+class BoardTestCase(TestCase):
+    """
+    Test cases for snacksdb.views.api.Board.
+    """
+    view_url = reverse('snacksdb:api-board')
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_login(self.user)
+
+        patcher = mock.patch.multiple(StaticSnackSource, version='v1', snacks=[
+            SnackRecordFactory(id=1001, name='Apples', optional=False),
+            SnackRecordFactory(id=1002, name='Bananas'),
+            SnackRecordFactory(id=1003, name='Cherries'),
+        ])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(board_version, 'cache_alias', 'board_api_tests')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        board_version.cache.clear()
+
+    def test_anonymous(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.view_url).status_code, 401)
+
+    def test_get(self):
+        NominationFactory(snack_id=1002)
+        NominationFactory(snack_id=1003)
+        BallotFactory(snack_id=1003, user=self.user)
+
+        response = self.client.get(self.view_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'period': get_period(),
+            'errors': [],
+            'mandatory_snacks': [
+                {'id': 1001, 'name': 'Apples', 'optional': False, 'purchaseLocations': '',
+                 'purchaseCount': 0, 'lastPurchaseDate': None},
+            ],
+            'optional_snacks': [
+                {'id': 1003, 'name': 'Cherries', 'optional': True, 'purchaseLocations': '',
+                 'purchaseCount': 0, 'lastPurchaseDate': None,
+                 'total_votes': 1, 'received_vote': True},
+                {'id': 1002, 'name': 'Bananas', 'optional': True, 'purchaseLocations': '',
+                 'purchaseCount': 0, 'lastPurchaseDate': None,
+                 'total_votes': 0, 'received_vote': False},
+            ],
+        })
+
+    @mock.patch('django.db.transaction.on_commit', side_effect=lambda fn: fn())
+    def test_etag(self, mock_on_commit):
+        """
+        Test that an unchanged board is answered with a 304 without being recomputed,
+        and that votes, nominations and catalog changes all change the ETag.
+        """
+        etag = self.client.get(self.view_url)['ETag']
+
+        with mock.patch.object(Board, 'get_board') as mock_get_board:
+            response = self.client.get(self.view_url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            mock_get_board.assert_not_called()
+
+        NominationFactory(snack_id=1002)
+        response = self.client.get(self.view_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        BallotFactory(snack_id=1002)
+        response = self.client.get(self.view_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        StaticSnackSource.version = 'v2'
+        response = self.client.get(self.view_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # Other users see the board annotated with their own votes, so they get their own ETag.
+        self.client.force_login(UserFactory())
+        response = self.client.get(self.view_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_no_etag_without_versions(self):
+        """
+        Test that no ETag is sent when the catalog can't be versioned.
+        """
+        StaticSnackSource.version = None
+        self.assertFalse(self.client.get(self.view_url).has_header('ETag'))
@@ -0,0 +1,89 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from snacksdb.models import Ballot
+from snacksdb.tests.factories import UserFactory
+
+
+@override_settings(VOTES_PER_MONTH=1)
+class CastVoteTestCase(TestCase):
+    """
+    Test cases for snacksdb.views.api.CastVote.
+    """
+    view_url = reverse('snacksdb:api-vote')
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_login(self.user)
+
+    def test_anonymous(self):
+        self.client.logout()
+        self.assertEqual(self.client.post(self.view_url, {'snack_id': 1001}).status_code, 401)
+
+    def test_get(self):
+        self.assertEqual(self.client.get(self.view_url).status_code, 405)
+
+    def test_post(self):
+        """
+        Test that votes can be cast with form data or JSON, until the user runs out.
+        """
+        response = self.client.post(
+            self.view_url, json.dumps({'snack_id': 1001}), content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'snack_id': 1001, 'votes_remaining': 0})
+        self.assertEqual(Ballot.objects.filter(user=self.user, snack_id=1001).count(), 1)
+
+        response = self.client.post(self.view_url, {'snack_id': 1002})
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('error', response.json())
+
+    def test_post_bad_request(self):
+        for data in [{}, {'snack_id': 'apples'}]:
+            self.assertEqual(self.client.post(self.view_url, data).status_code, 400)
+
+        response = self.client.post(self.view_url, '{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Ballot.objects.exists())
+
+    @override_settings(VOTES_PER_MONTH=3)
+    def test_post_choices(self):
+        """
+        Test that several votes can be cast in one request.
+        """
+        choices = [{'snack_id': 1002, 'count': 1}, {'snack_id': 1001, 'count': 2}]
+        response = self.client.post(
+            self.view_url, json.dumps({'choices': choices}), content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {
+            'choices': [{'snack_id': 1001, 'count': 2}, {'snack_id': 1002, 'count': 1}],
+            'votes_remaining': 0,
+        })
+        self.assertEqual(Ballot.objects.filter(user=self.user).count(), 3)
+
+        response = self.client.post(
+            self.view_url, json.dumps({'choices': choices[:1]}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_post_choices_bad_request(self):
+        invalid_choices = [
+            [], [{'snack_id': 1001}], [1001], 'apples', [{'snack_id': 1001, 'count': -1}]
+        ]
+        for choices in invalid_choices:
+            response = self.client.post(
+                self.view_url, json.dumps({'choices': choices}), content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json())
+
+        self.assertFalse(Ballot.objects.exists())
@@ -0,0 +1,35 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from snacksdb.tests.factories import BallotFactory, NominationFactory, UserFactory
+from snacksdb.utils import get_period
+
+
+@override_settings(VOTES_PER_MONTH=3, NOMINATIONS_PER_MONTH=1)
+class QuotaTestCase(TestCase):
+    """
+    Test cases for snacksdb.views.api.Quota.
+    """
+    view_url = reverse('snacksdb:api-quota')
+
+    def test_anonymous(self):
+        self.assertEqual(self.client.get(self.view_url).status_code, 401)
+
+    def test_get(self):
+        user = UserFactory()
+        self.client.force_login(user)
+        BallotFactory(user=user)
+        NominationFactory(user=user)
+
+        response = self.client.get(self.view_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'period': get_period(),
+            'votes_remaining': 2,
+            'nominations_remaining': 0,
+        })
@@ -0,0 +1,74 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from snacksdb.tests.factories import UserFactory
+from snacksdb.utils import get_period
+from snacksdb.views.api import TallyStream
+
+
+@override_settings(VOTE_STREAM_ENABLED=True)
+class TallyStreamTestCase(TestCase):
+    """
+    Test cases for snacksdb.views.api.TallyStream.
+    """
+    view_url = reverse('snacksdb:api-tally-stream')
+
+    def test_disabled(self):
+        self.client.force_login(UserFactory())
+
+        with override_settings(VOTE_STREAM_ENABLED=False):
+            self.assertEqual(self.client.get(self.view_url).status_code, 404)
+
+    def test_anonymous(self):
+        self.assertEqual(self.client.get(self.view_url).status_code, 401)
+
+    @mock.patch.object(TallyStream, 'get_hub')
+    def test_get(self, mock_get_hub):
+        """
+        Test that this month's tally changes are sent as 'tally' events, changes for
+        other months are left out, and idle streams are kept alive.
+        """
+        mock_listen = mock_get_hub.return_value.listen
+        mock_listen.side_effect = [
+            (12, [
+                (11, {'period': get_period(), 'snack_id': 1001, 'total_votes': 3, 'version': 5}),
+                (12, {'period': 201505, 'snack_id': 1002, 'total_votes': 1}),
+            ]),
+            (12, []),
+        ]
+        self.client.force_login(UserFactory())
+
+        response = self.client.get(self.view_url, HTTP_LAST_EVENT_ID='10')
+        chunks = iter(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(next(chunks), b'retry: 5000\n\n')
+        self.assertEqual(
+            next(chunks),
+            b'id: 11\nevent: tally\ndata: {"snack_id": 1001, "total_votes": 3, "version": 5}\n\n'
+        )
+        self.assertEqual(next(chunks), b': keepalive\n\n')
+
+        self.assertEqual(mock_listen.call_args_list[0][0][0], 10)
+        self.assertEqual(mock_listen.call_args_list[1][0][0], 12)
+        response.close()
+
+    @override_settings(VOTE_STREAM_MAX_AGE=0)
+    @mock.patch.object(TallyStream, 'get_hub')
+    def test_get_max_age(self, mock_get_hub):
+        """
+        Test that streams end once they're VOTE_STREAM_MAX_AGE seconds old.
+        """
+        self.client.force_login(UserFactory())
+        response = self.client.get(self.view_url)
+
+        self.assertEqual(list(response.streaming_content), [b'retry: 5000\n\n'])
+        mock_get_hub.return_value.listen.assert_not_called()
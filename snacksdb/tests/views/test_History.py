@@ -0,0 +1,44 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from snacksdb.models import MonthSummary, SnackSummary
+from snacksdb.tests.factories import UserFactory
+
+
+class HistoryTestCase(TestCase):
+    """
+    Test cases for snacksdb.views.History.
+    """
+    view_url = reverse('snacksdb:history')
+
+    def setUp(self):
+        for period in [201803, 201804, 201805]:
+            month = MonthSummary.objects.create(period=period, votes=3, voters=2, nominations=2)
+            SnackSummary.objects.create(month=month, snack_id=1001, name='Apples', votes=2, rank=1)
+            SnackSummary.objects.create(month=month, snack_id=1002, name='Bananas', votes=1, rank=2)
+
+    def test_login_required(self):
+        response = self.client.get(self.view_url)
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(RESULTS_HISTORY_PAGE_SIZE=2)
+    def test_get(self):
+        """
+        Test that the history is paginated, newest month first, in a fixed number of queries.
+        """
+        self.client.force_login(UserFactory())
+
+        # The session, the user, a count for the paginator, the months and their snacks.
+        with self.assertNumQueries(5):
+            response = self.client.get(self.view_url)
+
+        self.assertEqual([m.period for m in response.context['months']], [201805, 201804])
+        self.assertContains(response, 'Bananas')
+        self.assertContains(response, '?page=2')
+
+        response = self.client.get(self.view_url, {'page': 2})
+        self.assertEqual([m.period for m in response.context['months']], [201803])
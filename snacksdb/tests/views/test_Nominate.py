@@ -9,9 +9,9 @@ from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
-from snacksdb.models import Nomination
-from snacksdb.tests.factories import NominationFactory, UserFactory
-from snacksdb.utils import SnackSourceException, get_tzinfo
+from snacksdb.models import Nomination, SnackSuggestion
+from snacksdb.tests.factories import NominationFactory, SnackRecordFactory, UserFactory
+from snacksdb.utils import SnackAPISource, SnackSourceException, get_tzinfo
 from snacksdb.views import Nominate
 
 
@@ -27,7 +27,7 @@ class NominateTestCase(TestCase):
         # current test.
         cache.clear()
 
-    @mock.patch('snacksdb.views.Nominate.FormView.dispatch')
+    @mock.patch.object(Nominate.FormView, 'dispatch')
     def test_dispatch(self, mock_dispatch):
         view_instance = Nominate()
         mock_request = mock.MagicMock(user=UserFactory())
@@ -74,7 +74,7 @@ class NominateTestCase(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response['Location'], reverse('snacksdb:vote'))
 
-    @mock.patch('snacksdb.utils.SnackAPISource.suggest')
+    @mock.patch.object(SnackAPISource, 'suggest')
     def test_nominate_new_success(self, mock_suggest):
         """
         Test that nominating a new snack correctly invokes AbstractSnackSource.suggest,
@@ -82,7 +82,7 @@ class NominateTestCase(TestCase):
         """
         user = UserFactory()
         self.client.force_login(user)
-        mock_suggest.return_value = {'id': 1002, 'name': 'Bananas'}
+        mock_suggest.return_value = SnackRecordFactory(id=1002, name='Bananas')
         post_data = {'name': 'Bananas', 'location': 'Safeway'}
 
         nomination_qs = Nomination.objects.filter(snack_id=1002, user=user)
@@ -96,8 +96,8 @@ class NominateTestCase(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response['Location'], reverse('snacksdb:vote'))
 
-    @mock.patch('snacksdb.utils.SnackAPISource.list')
-    @mock.patch('snacksdb.utils.SnackAPISource.suggest')
+    @mock.patch.object(SnackAPISource, 'list')
+    @mock.patch.object(SnackAPISource, 'suggest')
     def test_nominate_new_failure(self, mock_suggest, mock_list):
         """
         Test that nominating a new snack with invalid form data re-renders
@@ -121,7 +121,7 @@ class NominateTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
 
     @override_settings(NOMINATIONS_PER_MONTH=5)
-    @mock.patch('snacksdb.views.Nominate.get_unnominated_snacks')
+    @mock.patch.object(Nominate, 'get_unnominated_snacks')
     def test_get_context_data(self, mock_unnominated_snacks):
         mock_unnominated_snacks.return_value = 'PARTICULARRETURNVALUE'
 
@@ -140,18 +140,18 @@ class NominateTestCase(TestCase):
         mock_unnominated_snacks.assert_called_once()
         mock_unnominated_snacks.assert_called_with()
 
-    @mock.patch('snacksdb.utils.SnackAPISource.list')
+    @mock.patch.object(SnackAPISource, 'list')
     def test_get_unnominated_snacks(self, mock_list):
         """
         Test that Nominate.get_unnominated_snacks returns a list of optional
         snacks that haven't been nominated yet this month.
         """
         view_instance = Nominate()
-        mock_list.return_value = [
-            {'id': 1001, 'optional': True},
-            {'id': 1002, 'optional': False},
-            {'id': 1003, 'optional': True},
-            {'id': 1004, 'optional': True},
+        snacks = mock_list.return_value = [
+            SnackRecordFactory(id=1001),
+            SnackRecordFactory(id=1002, optional=False),
+            SnackRecordFactory(id=1003),
+            SnackRecordFactory(id=1004),
         ]
 
         # Nominate an optional snack. This one shouldn't in the list.
@@ -162,16 +162,13 @@ class NominateTestCase(TestCase):
         NominationFactory.make_in_the_past(when, snack_id=1003)
 
         # We should only get back snacks that aren't optional and haven't been nominated this month.
-        expected_snacks = [
-            {'id': 1003, 'optional': True},
-            {'id': 1004, 'optional': True},
-        ]
+        expected_snacks = snacks[2:]
 
         self.assertEqual(view_instance.get_unnominated_snacks(), expected_snacks)
 
-    @mock.patch('snacksdb.views.Nominate.finalize_nomination')
-    @mock.patch('snacksdb.views.Nominate.form_invalid')
-    @mock.patch('snacksdb.utils.SnackAPISource.suggest')
+    @mock.patch.object(Nominate, 'finalize_nomination')
+    @mock.patch.object(Nominate, 'form_invalid')
+    @mock.patch.object(SnackAPISource, 'suggest')
     def test_form_valid(self, mock_suggest, mock_fi, mock_fn):
         view_instance = Nominate()
         view_instance.request = mock.MagicMock()
@@ -193,13 +190,34 @@ class NominateTestCase(TestCase):
         mock_fn.reset_mock()
 
         # Test that Nominate.finalize_nomination is called when no exception is raised.
-        mock_suggest.return_value = {'id': 1001, 'name': 'Apples'}
+        mock_suggest.return_value = SnackRecordFactory(id=1001, name='Apples')
         view_instance.form_valid(form)
         mock_suggest.assert_called_once()
         mock_fn.assert_called_once()
         mock_fn.assert_called_with(1001, 'Apples')
         mock_fi.assert_not_called()
 
+    @override_settings(SNACK_SUGGESTION_OUTBOX=True)
+    @mock.patch.object(SnackAPISource, 'suggest')
+    def test_form_valid_outbox(self, mock_suggest):
+        """
+        Test that with the outbox, a new snack is nominated at once, pending its
+        suggestion, without waiting on the source.
+        """
+        user = UserFactory()
+        self.client.force_login(user)
+
+        response = self.client.post(self.view_url, {'name': 'Cherries', 'location': 'Safeway'})
+
+        self.assertRedirects(response, reverse('snacksdb:vote'), fetch_redirect_response=False)
+        mock_suggest.assert_not_called()
+
+        suggestion = SnackSuggestion.objects.get()
+        self.assertEqual(suggestion.status, SnackSuggestion.PENDING)
+        self.assertEqual((suggestion.name, suggestion.location), ('Cherries', 'Safeway'))
+        self.assertEqual(suggestion.nomination.user, user)
+        self.assertTrue(suggestion.nomination.pending)
+
     def test_finalize_nomination(self):
         """
         Test that Nominate.finalize_nomination correctly creates a Nomination
@@ -217,3 +235,21 @@ class NominateTestCase(TestCase):
 
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response['Location'], reverse('snacksdb:vote'))
+
+    def test_finalize_nomination_duplicate(self):
+        """
+        Test that nominating a snack that's already been nominated this month
+        warns the user instead of recording a second nomination.
+        """
+        NominationFactory(snack_id=1001)
+        user = UserFactory()
+        self.client.force_login(user)
+
+        response = self.client.post(reverse('snacksdb:nominate'), {
+            'snack_id': "1001{delim}Apples".format(delim=Nominate.DELIMITER)
+        }, follow=True)
+
+        self.assertRedirects(response, reverse('snacksdb:vote'))
+        self.assertContains(response, 'Someone already nominated Apples')
+        self.assertFalse(Nomination.objects.filter(user=user).exists())
+        self.assertEqual(Nomination.objects.filter(snack_id=1001).count(), 1)
@@ -3,18 +3,40 @@
 __author__ = 'zach.mott@gmail.com'
 
 import datetime
+import os
+import shutil
+import tempfile
+import threading
 from unittest import mock
 
 from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from snacksdb.models import Ballot
-from snacksdb.tests.factories import BallotFactory, NominationFactory, UserFactory
-from snacksdb.utils import get_tzinfo, SnackSourceException
+from snacksdb.models import Ballot, Nomination
+from snacksdb.tests.factories import (
+    BallotFactory, NominationFactory, SnackRecordFactory, UserFactory
+)
+from snacksdb.tests.sources import STATIC_SNACK_SOURCE, StaticSnackSource
+from snacksdb.utils import (
+    ballot_buffer, BoardSnack, board_version, get_tzinfo, SnackAPISource, SnackSourceException
+)
 from snacksdb.views import Vote
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'vote_board_tests': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'vote_board_tests',
+    },
+}
+
+
 class VoteTestCase(TestCase):
     """
     Test cases for snacksdb.views.Vote.
@@ -73,14 +95,45 @@ class VoteTestCase(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response['Location'], self.view_url)
 
+    @override_settings(VOTES_PER_MONTH=3)
+    def test_post_choices(self):
+        """
+        Test that several votes can be cast in one POST, as long as the user has
+        enough votes left for all of them.
+        """
+        user = UserFactory()
+        self.client.force_login(user)
+
+        response = self.client.post(self.view_url, {'votes-1001': 2, 'votes-1002': 0})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], self.view_url)
+
+        response = self.client.post(self.view_url, {'votes-1002': 2})
+        self.assertEqual(response.status_code, 403)
+
+        self.assertEqual(
+            sorted(Ballot.objects.filter(user=user).values_list('snack_id', flat=True)),
+            [1001, 1001]
+        )
+
+    def test_post_choices_bad_request(self):
+        self.client.force_login(UserFactory())
+
+        for data in [{'votes-1001': 0}, {'votes-1001': 'two'}, {'votes-apples': 1},
+                     {'votes-1001': -1, 'votes-1002': 2}]:
+            self.assertEqual(self.client.post(self.view_url, data).status_code, 400)
+
+        self.assertFalse(Ballot.objects.exists())
+
     @override_settings(VOTES_PER_MONTH=5, NOMINATIONS_PER_MONTH=5)
-    @mock.patch('snacksdb.views.Vote.fetch_snacks')
-    def test_get_context_data(self, mock_fetch):
+    @mock.patch.object(Vote, 'start_fetching_snacks', return_value=None)
+    @mock.patch.object(Vote, 'fetch_snacks')
+    def test_get_context_data(self, mock_fetch, mock_start_fetching):
         view_instance = Vote()
         user = UserFactory()
         view_instance.request = mock.MagicMock(user=user)
-        mandatory_snacks = [{'id': 1001 + i} for i in range(3)]
-        optional_snacks = [{'id': 1001 + i} for i in range(3, 7)]
+        mandatory_snacks = [SnackRecordFactory(id=1001 + i, optional=False) for i in range(3)]
+        optional_snacks = [SnackRecordFactory(id=1001 + i) for i in range(3, 7)]
         mock_fetch.return_value = (mandatory_snacks, optional_snacks)
 
         NominationFactory(snack_id=1004, user=user)
@@ -100,14 +153,54 @@ class VoteTestCase(TestCase):
 
         self.assertEqual(context['mandatory_snacks'], mandatory_snacks)
         self.assertEqual(context['optional_snacks'], [
-            {'id': 1004, 'total_votes': 3, 'received_vote': True},
-            {'id': 1005, 'total_votes': 1, 'received_vote': True},
-            {'id': 1006, 'total_votes': 0, 'received_vote': False},
+            BoardSnack(optional_snacks[0], total_votes=3, received_vote=True),
+            BoardSnack(optional_snacks[1], total_votes=1, received_vote=True),
+            BoardSnack(optional_snacks[2], total_votes=0, received_vote=False),
         ])
         self.assertEqual(context['votes_remaining'], 2)
         self.assertEqual(context['nominations_remaining'], 3)
 
-    @mock.patch('snacksdb.utils.SnackAPISource.list')
+    def _count_context_queries(self, catalog_size):
+        """
+        Render Vote's context against a catalog of the given size, in which every
+        optional snack has been nominated and voted for, and return the number
+        of SQL queries that were issued.
+        """
+        cache.clear()
+        Nomination.objects.all().delete()  # Each snack can only be nominated once a month.
+        view_instance = Vote()
+        user = UserFactory()
+        view_instance.request = mock.MagicMock(user=user)
+
+        mandatory_snacks = [
+            SnackRecordFactory(id=1001 + i, optional=False) for i in range(catalog_size)
+        ]
+        optional_snacks = [SnackRecordFactory(id=5001 + i) for i in range(catalog_size)]
+        for snack in optional_snacks:
+            NominationFactory(snack_id=snack.id, user=user)
+            BallotFactory(snack_id=snack.id, user=user)
+
+        with mock.patch.object(Vote, 'start_fetching_snacks', return_value=None), \
+                mock.patch.object(Vote, 'fetch_snacks') as mock_fetch:
+            mock_fetch.return_value = (mandatory_snacks, optional_snacks)
+            with CaptureQueriesContext(connection) as ctx:
+                context = view_instance.get_context_data()
+
+        self.assertEqual(len(context['optional_snacks']), catalog_size)
+        return len(ctx.captured_queries)
+
+    def test_get_context_data_query_budget(self):
+        """
+        Test that Vote.get_context_data issues a small, fixed number of queries,
+        regardless of how many snacks are in the catalog.
+        """
+        small_catalog_queries = self._count_context_queries(3)
+        large_catalog_queries = self._count_context_queries(300)
+
+        self.assertEqual(small_catalog_queries, large_catalog_queries)
+        self.assertLessEqual(large_catalog_queries, 5)
+
+    @mock.patch.object(SnackAPISource, 'list')
     def test_fetch_snacks(self, mock_list):
         """
         Test that Vote.fetch_snacks returns a list of mandatory snacks and a
@@ -118,8 +211,8 @@ class VoteTestCase(TestCase):
         """
         view_instance = Vote()
         view_instance.request = mock.MagicMock()
-        mandatory_snacks = [{'id': 1001 + i, 'optional': False} for i in range(3)]
-        optional_snacks = [{'id': 1004 + i, 'optional': True} for i in range(3)]
+        mandatory_snacks = [SnackRecordFactory(id=1001 + i, optional=False) for i in range(3)]
+        optional_snacks = [SnackRecordFactory(id=1004 + i) for i in range(3)]
 
         mock_list.return_value = mandatory_snacks + optional_snacks
 
@@ -135,6 +228,108 @@ class VoteTestCase(TestCase):
         mock_list.assert_called_once()
         mock_list.assert_called_with()
 
+    @override_settings(SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE)
+    def test_start_fetching_snacks(self):
+        """
+        Test that Vote.start_fetching_snacks lists snacks in a background thread when
+        the snack source allows it and SNACK_SOURCE_CONCURRENT_FETCH is on, and
+        returns None otherwise.
+        """
+        view_instance = Vote()
+        view_instance.request = mock.MagicMock()
+        snacks = [SnackRecordFactory(id=1001, optional=False), SnackRecordFactory(id=1002)]
+        list_threads = []
+
+        def list_snacks(source):
+            list_threads.append(threading.current_thread())
+            return snacks
+
+        with mock.patch.object(StaticSnackSource, 'list', list_snacks):
+            # StaticSnackSource doesn't allow concurrent fetches by default.
+            self.assertIsNone(view_instance.start_fetching_snacks())
+
+            with mock.patch.object(StaticSnackSource, 'fetch_concurrently', True):
+                pending_snacks = view_instance.start_fetching_snacks()
+                self.assertEqual(view_instance.fetch_snacks(pending_snacks), (
+                    [snacks[0]],
+                    [snacks[1]],
+                ))
+                self.assertEqual(len(list_threads), 1)
+                self.assertIsNot(list_threads[0], threading.current_thread())
+
+                with override_settings(SNACK_SOURCE_CONCURRENT_FETCH=False):
+                    self.assertIsNone(view_instance.start_fetching_snacks())
+
+    @override_settings(SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE)
+    def test_fetch_snacks_pending_failure(self):
+        """
+        Test that a SnackSourceException raised in the background is reported the same
+        way as one raised by a direct call to the snack source.
+        """
+        view_instance = Vote()
+        view_instance.request = mock.MagicMock()
+
+        with mock.patch.object(StaticSnackSource, 'fetch_concurrently', True), \
+                mock.patch.object(StaticSnackSource, 'list') as mock_list, \
+                mock.patch.object(Vote, 'report_error') as mock_report_error:
+            mock_list.side_effect = SnackSourceException('oh no!')
+            pending_snacks = view_instance.start_fetching_snacks()
+
+            self.assertEqual(view_instance.fetch_snacks(pending_snacks), ([], []))
+            mock_report_error.assert_called_once_with('oh no!')
+
+    @override_settings(
+        CACHES=CACHES, VOTE_BOARD_CACHE_ALIAS='vote_board_tests',
+        SNACK_SOURCE_CLASS=STATIC_SNACK_SOURCE, VOTES_PER_MONTH=1
+    )
+    @mock.patch.object(StaticSnackSource, 'version', 'v1')
+    def test_get_board_fragments(self):
+        """
+        Test that the vote board is rendered once and shared by all users until the
+        board or the catalog changes, with each user's own CSRF token and vote button
+        state, and that a board built while the snack source is failing isn't cached.
+        """
+        board_version.cache.clear()
+        NominationFactory(snack_id=1002)
+        snacks = [
+            SnackRecordFactory(id=1001, name='Apples', optional=False),
+            SnackRecordFactory(id=1002, name='Bananas'),
+        ]
+
+        def get_vote_page(user):
+            self.client.force_login(user)
+            response = self.client.get(self.view_url)
+            self.assertContains(response, 'Bananas')
+            self.assertNotContains(response, Vote.CSRF_PLACEHOLDER)
+            self.assertContains(response, 'name="csrfmiddlewaretoken"')
+            return response
+
+        with mock.patch.object(StaticSnackSource, 'list', return_value=snacks) as mock_list:
+            get_vote_page(UserFactory())
+            self.assertEqual(mock_list.call_count, 1)
+
+            voter = UserFactory()
+            BallotFactory(snack_id=1002, user=voter)
+            board_version.bump()
+            self.assertContains(get_vote_page(voter), '<fieldset disabled>')
+            self.assertEqual(mock_list.call_count, 2)
+
+            response = get_vote_page(UserFactory())
+            self.assertNotContains(response, '<fieldset disabled>')
+            self.assertNotIn('optional_snacks', response.context)
+            self.assertEqual(mock_list.call_count, 2)
+
+            with mock.patch.object(StaticSnackSource, 'version', 'v2'):
+                get_vote_page(UserFactory())
+            self.assertEqual(mock_list.call_count, 3)
+
+        board_version.bump()
+        with mock.patch.object(StaticSnackSource, 'list') as mock_list:
+            mock_list.side_effect = SnackSourceException('oh no!')
+            self.client.get(self.view_url)
+            self.client.get(self.view_url)
+            self.assertEqual(mock_list.call_count, 2)
+
     def test_postprocess_optional_snacks(self):
         """
         Test that Vote.postprocess_optional_snacks annonates a list of
@@ -149,7 +344,7 @@ class VoteTestCase(TestCase):
         # Create and nominate snacks.
         for i in range(4):
             snack_id = 1001 + i
-            optional_snacks.append({'id': snack_id})
+            optional_snacks.append(SnackRecordFactory(id=snack_id))
             if snack_id != 1003:  # Don't nominate snack 1003.
                 NominationFactory(snack_id=snack_id)
 
@@ -170,35 +365,37 @@ class VoteTestCase(TestCase):
         BallotFactory.make_in_the_past(when, snack_id=1003, user=user)
         BallotFactory.make_in_the_past(when, snack_id=1004)
 
+        catalog = list(optional_snacks)
+
         self.assertListEqual(
             view_instance.postprocess_optional_snacks(optional_snacks, user_votes),
             [
-                {'id': 1001, 'total_votes': 3, 'received_vote': True},
-                {'id': 1002, 'total_votes': 2, 'received_vote': True},
-                {'id': 1004, 'total_votes': 1, 'received_vote': False},
+                BoardSnack(optional_snacks[0], total_votes=3, received_vote=True),
+                BoardSnack(optional_snacks[1], total_votes=2, received_vote=True),
+                BoardSnack(optional_snacks[3], total_votes=1, received_vote=False),
             ]
         )
 
+        # The catalog's snacks are left alone, so that they can be shared.
+        self.assertEqual(optional_snacks, catalog)
+
     def test_filter_unnominated_snacks(self):
         """
         Test that Vote.filter_unnominated_snacks removes snacks that haven't
         been nominated yet this month from the list of optional snacks.
         """
         view_instance = Vote()
-        snacks = [{'id': 1001 + i} for i in range(4)]
+        snacks = [SnackRecordFactory(id=1001 + i) for i in range(4)]
 
         # Nominate some snacks.
-        for snack_id in [1001, 1001, 1002]:
+        for snack_id in [1001, 1002]:
             NominationFactory(snack_id=snack_id)
 
         # Nominate a snack in the past.
         when = datetime.datetime(2016, 3, 4, 5, 6, 7, tzinfo=get_tzinfo())
         NominationFactory.make_in_the_past(when, snack_id=1003)
 
-        self.assertEqual(view_instance.filter_unnominated_snacks(snacks), [
-            {'id': 1001},
-            {'id': 1002},
-        ])
+        self.assertEqual(view_instance.filter_unnominated_snacks(snacks), snacks[:2])
 
     def test_count_votes_by_snack(self):
         """
@@ -224,3 +421,32 @@ class VoteTestCase(TestCase):
             1002: 1,
             1003: 1
         })
+
+    @override_settings(CACHES=CACHES, VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FSYNC=False)
+    @mock.patch('django.db.transaction.on_commit', side_effect=lambda fn: fn())
+    def test_buffered_votes(self, mock_on_commit):
+        """
+        Test that votes which haven't been flushed yet are counted, and shown as
+        the user's own.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        view_instance = Vote()
+        view_instance.request = mock.MagicMock(user=UserFactory())
+        BallotFactory(snack_id=1001, user=view_instance.request.user)
+        NominationFactory(snack_id=1001)
+        NominationFactory(snack_id=1002)
+
+        with self.settings(VOTE_BUFFER_PATH=os.path.join(directory, 'ballots.jsonl')), \
+                mock.patch.object(ballot_buffer, 'cache_alias', 'vote_board_tests'):
+            Ballot.cast(view_instance.request.user, 1002)
+            Ballot.cast(UserFactory(), 1001)
+
+            self.assertEqual(view_instance.count_votes_by_snack(), {1001: 2, 1002: 1})
+            self.assertEqual(
+                sorted(ballot.snack_id for ballot in view_instance.get_user_votes()), [1001, 1002]
+            )
+
+            ballot_buffer.flush()
+            self.assertEqual(view_instance.count_votes_by_snack(), {1001: 2, 1002: 1})
@@ -10,4 +10,9 @@ app_name = 'snacksdb'
 urlpatterns = [
     re_path(r'^vote/?$', views.Vote.as_view(), name='vote'),
     re_path(r'^nominate/?$', views.Nominate.as_view(), name='nominate'),
+    re_path(r'^history/?$', views.History.as_view(), name='history'),
+    re_path(r'^api/board/?$', views.api.Board.as_view(), name='api-board'),
+    re_path(r'^api/vote/?$', views.api.CastVote.as_view(), name='api-vote'),
+    re_path(r'^api/quota/?$', views.api.Quota.as_view(), name='api-quota'),
+    re_path(r'^api/tallies/stream/?$', views.api.TallyStream.as_view(), name='api-tally-stream'),
 ]
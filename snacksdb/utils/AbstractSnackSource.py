@@ -2,20 +2,34 @@
 
 __author__ = 'zach.mott@gmail.com'
 
+import hashlib
+import json
+
 
 class SnackSourceException(Exception):
-    def __init__(self, msg):
+    """
+    Raised by snack sources when something goes wrong. 'status_code' is the HTTP
+    status of the Snack Food API response behind the error, if there was one
+    (sources without an API of their own use the same codes for the same errors).
+    """
+    def __init__(self, msg, status_code=None):
         self.msg = msg
+        self.status_code = status_code
 
 
 class AbstractSnackSource(object):
     """
     Defines interface for pluggable snack sources.
     """
+    # Whether views may call list() from a background thread, to overlap it with their
+    # own database queries. Sources that use the database themselves should say no.
+    fetch_concurrently = False
+
     def list(self):
         """
-        Return a list of snacks that can be nominated or voted on. A snack is a
-        dictionary that looks like this:
+        Return a list of snacks that can be nominated or voted on, as SnackRecords.
+        Sources whose catalogs come as snack dictionaries, like the Snack Food API's,
+        parse them with SnackRecord.from_dict. A snack dictionary looks like this:
         {
             'id': int,
             'name': string,
@@ -25,15 +39,43 @@ class AbstractSnackSource(object):
             'lastPurchaseDate': string
         }
 
+        Callers may share the list between threads, and must not modify it.
+
         Raise SnackSourceException if anything goes wrong.
         """
         raise NotImplementedError()
 
     def suggest(self, name, location, latitude=None, longitude=None):
         """
-        Add a new snack. If successful, return a snack dictionary, as described in list().
+        Add a new snack. If successful, return it as a SnackRecord.
         The new snack should be returned in future calls to list().
 
         Raise SnackSourceException if anything goes wrong.
         """
         raise NotImplementedError()
+
+    def get_version(self):
+        """
+        Return a short string that changes whenever the catalog returned by list()
+        changes, without fetching the catalog, or None if that can't be known cheaply.
+        Callers that cache things derived from the catalog use this to invalidate them.
+        """
+        return None
+
+    @staticmethod
+    def hash_catalog(snacks):
+        """
+        Return a hash of the given catalog, for sources that version it by content.
+        """
+        return hashlib.md5(json.dumps(snacks, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def warm_up(self):
+        """
+        Prepare to serve requests, e.g. by opening connections or priming caches.
+        Called once per worker process before it handles requests, if
+        settings.SNACK_SOURCE_WARM_UP is set. Return the catalog, if warming up
+        fetched it, or None.
+
+        Warming up should be quick: raise SnackSourceException rather than retrying.
+        """
+        return None
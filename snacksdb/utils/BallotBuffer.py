@@ -0,0 +1,475 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import collections
+import datetime
+import fcntl
+import glob
+import json
+import logging
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+class BallotBuffer(object):
+    """
+    An append-only file of votes that have been accepted but not yet written to the
+    database, for settings.VOTE_BUFFER_ENABLED. Accepting a vote appends one JSON
+    line and saves a BallotReceipt (see accept), which is far cheaper at peak than
+    inserting a Ballot and updating its snack's VoteTally, a row that every vote for
+    the snack contends for. The votes of one request are appended together, or not
+    at all, before the transaction that spends them commits.
+
+    flush() moves the file aside, then writes its votes as Ballots with bulk_create,
+    VOTE_BUFFER_BATCH_SIZE at a time, adding each batch to the VoteTallies and
+    deleting its receipts in the same transaction. Only votes with receipts are
+    written, so a vote whose transaction rolled back is never saved; one that's
+    still without a receipt after VOTE_BUFFER_COMMIT_TIMEOUT seconds is dropped.
+    A vote that has a Ballot but no receipt was written by a flush that crashed
+    halfway, so the flush can simply be run again: nothing is dropped or written
+    twice. Lines cut short by a crash were never acknowledged to the voter, and are
+    skipped; the next append starts on a new line, so that it isn't lost with them.
+
+    The number of votes waiting for each snack, and from each user for each snack,
+    is kept in the cache, which every app server shares, so that pages can count
+    them without reading the file. Like QuotaLedger, the counts are a shortcut:
+    they're added when a vote's transaction commits, taken away when its Ballot is
+    written, and expire after PENDING_TTL seconds in case they drift.
+
+    Run flushes with 'manage.py flush_ballots --loop'. The file is local to the
+    machine, so each app server needs its own flusher.
+    """
+    FLUSHING_SUFFIX = '.flushing'
+    PENDING_KEY_TMPL = "ballot_buffer_pending_{period}_{snack_id}"
+    USER_PENDING_KEY_TMPL = "ballot_buffer_pending_{period}_{snack_id}_{user_id}"
+    PENDING_TTL = 60 * 60 * 24 * 62
+
+    def __init__(self, path=None, fsync=None, cache_alias='default'):
+        self._path = path
+        self._fsync = fsync
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @property
+    def path(self):
+        return self._path or settings.VOTE_BUFFER_PATH
+
+    @property
+    def fsync(self):
+        return settings.VOTE_BUFFER_FSYNC if self._fsync is None else self._fsync
+
+    @staticmethod
+    def make_vote(user_id, snack_id, period):
+        """
+        Return a new vote, with its own token, as a dictionary for accept().
+        """
+        return {
+            'token': uuid.uuid4().hex, 'user_id': user_id, 'snack_id': int(snack_id),
+            'period': period, 'accepted': time.time(),
+        }
+
+    def append(self, user_id, snack_id, period):
+        """
+        Accept a vote (see accept), and return its token, a UUID.
+        """
+        vote = self.make_vote(user_id, snack_id, period)
+        self.accept([vote])
+        return uuid.UUID(vote['token'])
+
+    def accept(self, votes):
+        """
+        Buffer the given votes (see make_vote): append them to the file, then save
+        their BallotReceipts. Call this from within the transaction that spends them,
+        so that they're flushed if, and only if, it commits. Raise OSError, having
+        buffered none of them, if they can't be appended.
+        """
+        from snacksdb.models import BallotReceipt
+
+        self.append_many(votes)
+        BallotReceipt.objects.bulk_create([
+            BallotReceipt(token=uuid.UUID(vote['token']), period=vote['period']) for vote in votes
+        ])
+
+        transaction.on_commit(lambda: self.count_pending(votes))
+
+    def append_many(self, votes):
+        """
+        Append the given votes (see make_vote) to the file, all of them or, if writing
+        them fails, none: the file is cut back to where it was before raising OSError.
+        """
+        data = self.encode(votes)
+
+        while True:
+            fd = self.open()
+            try:
+                # Writers take turns, and flush() waits for them before reading.
+                fcntl.flock(fd, fcntl.LOCK_EX)
+
+                # If a flush moved the file aside while we waited, write to a new one.
+                if self.is_current(fd):
+                    self.write(fd, data)
+                    return
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def encode(votes):
+        """
+        Return the given votes as lines of JSON.
+        """
+        return b''.join(
+            json.dumps(vote, separators=(',', ':')).encode('utf-8') + b'\n' for vote in votes
+        )
+
+    def write(self, fd, data):
+        """
+        Append data to the locked file, starting on a new line, and sync it if required.
+        """
+        size = os.fstat(fd).st_size
+
+        # Finish off a line that a crash cut short, rather than appending to it.
+        if size and os.pread(fd, 1, size - 1) != b'\n':
+            data = b'\n' + data
+
+        try:
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+            if self.fsync:
+                os.fsync(fd)
+        except OSError:
+            os.ftruncate(fd, size)
+            raise
+
+    def open(self):
+        flags = os.O_RDWR | os.O_APPEND | os.O_CREAT
+        try:
+            return os.open(self.path, flags, 0o640)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            return os.open(self.path, flags, 0o640)
+
+    def is_current(self, fd):
+        """
+        Return whether the open file is still the one at self.path.
+        """
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        opened = os.fstat(fd)
+        return (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino)
+
+    def get_flushing_paths(self):
+        """
+        Return the paths of the files that have been moved aside for flushing,
+        oldest first, including any that a crashed flush left behind.
+        """
+        return sorted(glob.glob(glob.escape(self.path) + '.*' + self.FLUSHING_SUFFIX))
+
+    def read(self, path):
+        """
+        Yield the votes in the file at 'path' as dictionaries.
+        """
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return
+
+        with f:
+            for line in f:
+                # A line without its newline was cut short, and never acknowledged.
+                if not line.endswith(b'\n'):
+                    continue
+
+                try:
+                    yield json.loads(line.decode('utf-8'))
+                except ValueError:
+                    logger.warning("Skipping unreadable line in %s: %r", path, line)
+
+    def pending(self, period=None, user_id=None):
+        """
+        Return the votes in the files that haven't been flushed yet, optionally only
+        those from the given period or user, as dictionaries. This reads every file,
+        so pages count pending votes with pending_totals and pending_ballots instead.
+        """
+        votes = collections.OrderedDict()
+
+        # Read the current file first, so that a vote moved aside in the meantime is
+        # found again in the flushing files, rather than missed; tokens tell repeats.
+        for path in [self.path] + self.get_flushing_paths():
+            for vote in self.read(path):
+                if period is not None and vote['period'] != period:
+                    continue
+                if user_id is not None and vote['user_id'] != user_id:
+                    continue
+                votes[vote['token']] = vote
+
+        return list(votes.values())
+
+    def get_pending_keys(self, votes):
+        """
+        Return a Counter of {cache_key: votes, ...} for the pending counts that the
+        given votes add to.
+        """
+        keys = collections.Counter()
+        for vote in votes:
+            keys[self.PENDING_KEY_TMPL.format(**vote)] += 1
+            keys[self.USER_PENDING_KEY_TMPL.format(**vote)] += 1
+        return keys
+
+    def count_pending(self, votes):
+        """
+        Add votes whose transaction committed to the pending counts.
+        """
+        for key, amount in self.get_pending_keys(votes).items():
+            self.cache.add(key, 0, self.PENDING_TTL)
+            try:
+                self.cache.incr(key, amount)
+            except ValueError:
+                pass  # Evicted, or the cache can't hold counts.
+
+    def uncount_pending(self, votes):
+        """
+        Take votes whose Ballots were written from the pending counts.
+        """
+        for key, amount in self.get_pending_keys(votes).items():
+            try:
+                self.cache.decr(key, amount)
+            except ValueError:
+                pass  # Not counted, or evicted.
+
+    def get_pending_counts(self, key_tmpl, period=None, snack_ids=None, **kw):
+        """
+        Return a dictionary of {snack_id: votes, ...} from the pending counts made
+        with 'key_tmpl', for the given snacks in the period, which default to the
+        current period and the snacks nominated in it.
+        """
+        from snacksdb.utils import get_period, nominated_snacks
+
+        period = period or get_period()
+        if snack_ids is None:
+            snack_ids = nominated_snacks.get(period)
+
+        keys = {key_tmpl.format(period=period, snack_id=snack_id, **kw): snack_id
+                for snack_id in snack_ids}
+        counts = self.cache.get_many(list(keys))
+
+        return {keys[key]: count for key, count in counts.items() if count > 0}
+
+    def pending_totals(self, period=None, snack_ids=None):
+        """
+        Return a dictionary of {snack_id: votes, ...} counting the votes for each
+        snack that haven't been flushed yet. See get_pending_counts.
+        """
+        return self.get_pending_counts(self.PENDING_KEY_TMPL, period, snack_ids)
+
+    def pending_ballots(self, user, period=None, snack_ids=None):
+        """
+        Return the user's votes that haven't been flushed yet as unsaved Ballots,
+        without tokens. See get_pending_counts.
+        """
+        from snacksdb.models import Ballot
+        from snacksdb.utils import get_period
+
+        period = period or get_period()
+        counts = self.get_pending_counts(
+            self.USER_PENDING_KEY_TMPL, period, snack_ids, user_id=user.pk
+        )
+
+        return [
+            Ballot(user=user, snack_id=snack_id, period=period)
+            for snack_id, count in sorted(counts.items()) for i in range(count)
+        ]
+
+    @staticmethod
+    def to_ballot(model, vote):
+        return model(
+            user_id=vote['user_id'], snack_id=vote['snack_id'], period=vote['period'],
+            token=uuid.UUID(vote['token']),
+        )
+
+    def rotate(self):
+        """
+        Move the current file aside for flushing, once the votes being written to it
+        have landed, and return the paths of every file waiting to be flushed.
+        """
+        flushing_path = "{path}.{stamp:020d}{suffix}".format(
+            path=self.path, stamp=int(time.time() * 1000000), suffix=self.FLUSHING_SUFFIX
+        )
+
+        try:
+            os.rename(self.path, flushing_path)
+        except FileNotFoundError:
+            pass  # Nobody has voted since the last flush.
+        else:
+            # Wait for writers that took the lock before the file was moved.
+            fd = os.open(flushing_path, os.O_RDONLY)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            finally:
+                os.close(fd)
+
+        return self.get_flushing_paths()
+
+    def flush(self, batch_size=None):
+        """
+        Write the buffered votes to the database, and return the number of Ballots created.
+        """
+        batch_size = batch_size or settings.VOTE_BUFFER_BATCH_SIZE
+        flushed = 0
+
+        for path in self.rotate():
+            votes = list(self.read(path))
+            totals, uncommitted = collections.Counter(), []
+
+            for start in range(0, len(votes), batch_size):
+                written, waiting = self.write_batch(votes[start:start + batch_size])
+                self.uncount_pending(written)
+                totals.update((vote['period'], vote['snack_id']) for vote in written)
+                uncommitted += waiting
+
+            # Keep the votes whose transactions may yet commit for the next flush.
+            uncommitted = self.expire(uncommitted)
+            if uncommitted:
+                self.rewrite(path, uncommitted)
+            else:
+                os.remove(path)
+            flushed += sum(totals.values())
+
+            # Until they were taken from the pending counts, the votes were counted both
+            # as pending and in the VoteTallies, so a board rendered meanwhile is stale.
+            self.announce(totals)
+
+        return flushed
+
+    def write_batch(self, votes):
+        """
+        Write the votes in a batch whose transactions committed, which is to say
+        those with BallotReceipts, as Ballots, add them to the VoteTallies, and
+        delete their receipts. Return the votes that were written, and those that
+        were neither written nor receipted: their transactions rolled back, or
+        haven't committed yet. Votes written by an earlier, interrupted flush have
+        Ballots but no receipts, and are skipped.
+        """
+        from snacksdb.models import Ballot, BallotReceipt
+
+        tokens = [uuid.UUID(vote['token']) for vote in votes]
+
+        with transaction.atomic():
+            receipts = BallotReceipt.objects.filter(token__in=tokens)
+            receipted = set(receipts.values_list('token', flat=True))
+
+            unreceipted = [token for token in tokens if token not in receipted]
+            written = set(
+                Ballot.objects.filter(token__in=unreceipted).values_list('token', flat=True)
+            ) if unreceipted else set()
+
+            committed = [vote for vote, token in zip(votes, tokens) if token in receipted]
+            waiting = [
+                vote for vote, token in zip(votes, tokens)
+                if token not in receipted and token not in written
+            ]
+
+            self.write_votes(committed)
+            receipts.delete()
+
+        return committed, waiting
+
+    def write_votes(self, votes):
+        """
+        Save the votes as Ballots, with one INSERT, add them to the VoteTallies,
+        and return the Ballots. Call this from within a transaction.
+        """
+        from snacksdb.models import Ballot, VoteTally
+
+        # bulk_create skips Ballot.save and its signals; do their work in bulk instead.
+        ballots = Ballot.objects.bulk_create([self.to_ballot(Ballot, vote) for vote in votes])
+        self.stamp_created(Ballot, votes)
+
+        totals = collections.Counter((ballot.period, ballot.snack_id) for ballot in ballots)
+        for (period, snack_id), amount in sorted(totals.items()):
+            VoteTally.increment(period, snack_id, amount)
+
+        return ballots
+
+    @staticmethod
+    def stamp_created(model, votes):
+        """
+        Set the votes' saved Ballots' 'created' to when each vote was accepted, rather
+        than when it was written, which 'auto_now_add' sets it to on INSERT. One UPDATE.
+        """
+        accepted = {
+            uuid.UUID(vote['token']):
+                datetime.datetime.fromtimestamp(vote['accepted'], timezone.utc)
+            for vote in votes
+        }
+        if not accepted:
+            return
+
+        model.objects.filter(token__in=list(accepted)).update(created=Case(
+            *[When(token=token, then=Value(when)) for token, when in accepted.items()],
+            output_field=DateTimeField()
+        ))
+
+    def expire(self, votes):
+        """
+        Return the given uncommitted votes, less those that have waited longer than
+        VOTE_BUFFER_COMMIT_TIMEOUT seconds for their transactions, which are dropped.
+        """
+        deadline = time.time() - settings.VOTE_BUFFER_COMMIT_TIMEOUT
+        waiting = [vote for vote in votes if vote['accepted'] >= deadline]
+
+        if len(waiting) < len(votes):
+            logger.warning(
+                "Dropping %d buffered vote(s) whose transactions never committed.",
+                len(votes) - len(waiting)
+            )
+
+        return waiting
+
+    def rewrite(self, path, votes):
+        """
+        Replace the file at 'path' with one holding just the given votes.
+        """
+        data = self.encode(votes)
+        temp_path = path + '.tmp'
+
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        os.replace(temp_path, path)
+
+    def announce(self, totals):
+        """
+        Let the vote board and tally stream know that the given snacks' totals moved.
+        """
+        from snacksdb.utils import board_version, tally_channel
+
+        for period in {period for period, snack_id in totals}:
+            board_version.bump(period)
+
+        if settings.VOTE_STREAM_ENABLED:
+            for period, snack_id in totals:
+                tally_channel.publish_tally(period, snack_id)
+
+
+ballot_buffer = BallotBuffer()
@@ -0,0 +1,46 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+
+class BoardSnack(object):
+    """
+    A snack as one request sees it on the vote board: a shared, immutable SnackRecord
+    plus this month's vote total and whether the user voted for it. Attributes the
+    board doesn't add are read from the record, so templates can treat a BoardSnack
+    like the snack it wraps.
+    """
+    __slots__ = ['snack', 'total_votes', 'received_vote']
+
+    def __init__(self, snack, total_votes=0, received_vote=False):
+        self.snack = snack
+        self.total_votes = total_votes
+        self.received_vote = received_vote
+
+    def __getattr__(self, name):
+        # Only called for names that aren't slots. Don't delegate special names,
+        # which copy and pickle look up before the slots are filled in.
+        if name.startswith('__') or name in self.__slots__:
+            raise AttributeError(name)
+        return getattr(self.snack, name)
+
+    def __eq__(self, other):
+        if not isinstance(other, BoardSnack):
+            return NotImplemented
+        return (self.snack, self.total_votes, self.received_vote) == (
+            other.snack, other.total_votes, other.received_vote
+        )
+
+    def __repr__(self):
+        return "BoardSnack({self.snack!r}, total_votes={self.total_votes!r}, " \
+               "received_vote={self.received_vote!r})".format(self=self)
+
+    def to_dict(self):
+        """
+        Return this snack as a dictionary in the Snack Food API's format,
+        with 'total_votes' and 'received_vote' added.
+        """
+        snack = self.snack.to_dict()
+        snack['total_votes'] = self.total_votes
+        snack['received_vote'] = self.received_vote
+        return snack
@@ -0,0 +1,54 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .CacheCounter import CacheCounter
+
+
+class BoardVersion(object):
+    """
+    A counter, kept per period, that changes whenever the vote board's votes or
+    nominations change. Views use it to tell whether a board they've already
+    rendered (or a client has already seen) is still current.
+
+    The counter is kept in settings.VOTE_BOARD_CACHE_ALIAS, alongside the rendered
+    boards it versions, so that it can't be evicted or reset apart from them. If the
+    cache can't hold the counter (e.g. DummyCache), the version is None, and
+    callers must assume the board has changed.
+    """
+    KEY_TMPL = "vote_board_version_{period}"
+    TTL = 60 * 60 * 24 * 62
+
+    def __init__(self, cache_alias=None):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias or settings.VOTE_BOARD_CACHE_ALIAS]
+
+    def get_cache_key(self, period=None):
+        from snacksdb.utils import get_period
+
+        return self.KEY_TMPL.format(period=period or get_period())
+
+    def get(self, period=None):
+        """
+        Return the board's current version for the period, which defaults to the current one.
+        """
+        return self.get_counter(period).get()
+
+    def bump(self, period=None):
+        """
+        Record that the board changed during the period.
+        """
+        # If there's no counter yet, the next get() will start a fresh one.
+        self.get_counter(period).incr()
+
+    def get_counter(self, period=None):
+        return CacheCounter(self.cache, self.get_cache_key(period), self.TTL)
+
+
+board_version = BoardVersion()
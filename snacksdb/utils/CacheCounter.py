@@ -0,0 +1,55 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import time
+
+
+class CacheCounter(object):
+    """
+    A counter kept in a cache, for handing out versions or sequence numbers.
+
+    New counters start from the clock, in milliseconds, rather than from zero, so that
+    a counter which was evicted never repeats a number handed out before the eviction.
+    """
+    def __init__(self, cache, key, timeout=None):
+        self.cache = cache
+        self.key = key
+        self.timeout = timeout
+
+    def start(self):
+        """
+        Start the counter, unless it's already running. Return the number it
+        started from, or None if it was already running.
+        """
+        start = int(time.time() * 1000)
+        return start if self.cache.add(self.key, start, self.timeout) else None
+
+    def get(self):
+        """
+        Return the counter's current value, starting it if necessary, or None
+        if the cache can't hold it.
+        """
+        self.start()
+        return self.cache.get(self.key)
+
+    def incr(self):
+        """
+        Increment the counter, and return its new value, or None if it isn't running.
+        """
+        try:
+            return self.cache.incr(self.key)
+        except ValueError:
+            return None
+
+    def bump(self):
+        """
+        Increment the counter, starting it first if it isn't running, so that its value
+        differs from any it had before. Return the new value, or None if the cache
+        can't hold it.
+        """
+        value = self.incr()
+        if value is None:
+            self.start()
+            value = self.incr()
+        return value
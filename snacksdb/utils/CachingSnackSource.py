@@ -0,0 +1,188 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.utils.translation import ugettext_lazy as _
+
+from .AbstractSnackSource import AbstractSnackSource, SnackSourceException
+from .CacheCounter import CacheCounter
+
+
+logger = logging.getLogger(__name__)
+
+
+class CachingSnackSource(AbstractSnackSource):
+    """
+    Snack source that caches the catalog of another snack source.
+
+    A cached catalog is fresh for settings.SNACK_CACHE_TTL seconds. After that,
+    it's stale, but will still be served for up to settings.SNACK_CACHE_STALE_TTL
+    more seconds while a single background thread fetches a new copy. Catalogs
+    older than that are refetched while the user waits.
+
+    invalidate() bumps the catalog's generation, and a fetch caches its catalog
+    only if the generation didn't change while it fetched, so that a refresh that
+    was already under way when a snack was suggested doesn't cache a catalog
+    without it.
+
+    N.B.: This source ignores any caching headers sent by the wrapped source.
+    Deployments that must honor them should not use it.
+    """
+    CATALOG_KEY = 'snack_catalog'
+    GENERATION_KEY = 'snack_catalog_generation'
+    REFRESH_LOCK_KEY = 'snack_catalog_refresh_lock'
+    REFRESH_LOCK_TTL = 60
+
+    DEFAULT_SOURCE_CLASS = 'snacksdb.utils.SnackAPISource.SnackAPISource'
+    DEFAULT_TTL = 60
+    DEFAULT_STALE_TTL = 60 * 10
+
+    def __init__(self, source=None, ttl=None, stale_ttl=None, cache_alias=None):
+        if source is None:
+            from snacksdb.utils import get_snack_source_class
+
+            source_class_path = getattr(
+                settings, 'SNACK_CACHE_SOURCE_CLASS', self.DEFAULT_SOURCE_CLASS
+            )
+            source_class = get_snack_source_class(source_class_path)
+
+            if issubclass(source_class, CachingSnackSource):
+                msg = _('settings.SNACK_CACHE_SOURCE_CLASS must not '
+                        'refer to CachingSnackSource.')
+                raise ImproperlyConfigured(msg)
+
+            source = source_class()
+
+        self.source = source
+        if ttl is None:
+            ttl = getattr(settings, 'SNACK_CACHE_TTL', self.DEFAULT_TTL)
+        if stale_ttl is None:
+            stale_ttl = getattr(settings, 'SNACK_CACHE_STALE_TTL', self.DEFAULT_STALE_TTL)
+
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.cache_alias = cache_alias or getattr(settings, 'SNACK_CACHE_ALIAS', 'default')
+
+        # Keep a reference to the most recent refresh thread, mainly so tests can join it.
+        self.refresh_thread = None
+
+    @property
+    def fetch_concurrently(self):
+        return self.source.fetch_concurrently
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def list(self):
+        """
+        Return the cached catalog if there is one, kicking off a background
+        refresh if it's stale. Otherwise, fetch the catalog from the wrapped source.
+        """
+        entry = self.cache.get(self.CATALOG_KEY)
+
+        if entry is None:
+            return self.refresh()
+
+        fetched_at, version, snacks = entry
+        if time.time() - fetched_at > self.ttl:
+            self.refresh_in_background()
+
+        return snacks
+
+    def suggest(self, name, location, latitude=None, longitude=None):
+        """
+        Submit the suggestion to the wrapped source, then drop the cached catalog
+        so that the new snack shows up in the next call to list().
+        """
+        snack = self.source.suggest(name, location, latitude=latitude, longitude=longitude)
+        self.invalidate()
+        return snack
+
+    def warm_up(self):
+        """
+        Warm up the wrapped source and, unless another process already has,
+        cache the catalog. Return the catalog.
+        """
+        entry = self.cache.get(self.CATALOG_KEY)
+        if entry is not None and time.time() - entry[0] <= self.ttl:
+            return entry[2]
+
+        generation = self.get_generation().get()
+        snacks = self.source.warm_up()
+        if snacks is None:
+            return self.refresh()
+
+        self.store(snacks, generation)
+        return snacks
+
+    def refresh(self):
+        """
+        Fetch the catalog from the wrapped source, cache it, and return it.
+        """
+        generation = self.get_generation().get()
+        snacks = self.source.list()
+        self.store(snacks, generation)
+
+        return snacks
+
+    def store(self, snacks, generation=None):
+        """
+        Cache the given catalog, unless 'generation', the catalog's generation when
+        it was fetched, is given and the catalog has been invalidated since.
+        """
+        if generation is not None and self.get_generation().get() != generation:
+            return
+
+        entry = (time.time(), self.hash_catalog(snacks), snacks)
+        self.cache.set(self.CATALOG_KEY, entry, self.ttl + self.stale_ttl)
+
+    def get_generation(self):
+        """
+        Return the counter that changes whenever the cached catalog is invalidated.
+        """
+        return CacheCounter(self.cache, self.GENERATION_KEY, self.ttl + self.stale_ttl)
+
+    def get_version(self):
+        """
+        Return a hash of the cached catalog, or None if there isn't one.
+        """
+        entry = self.cache.get(self.CATALOG_KEY)
+        return entry[1] if entry is not None else None
+
+    def refresh_in_background(self):
+        """
+        Refresh the catalog in a background thread, unless another
+        thread (or process) is already doing so.
+        """
+        if not self.cache.add(self.REFRESH_LOCK_KEY, True, self.REFRESH_LOCK_TTL):
+            return
+
+        self.refresh_thread = threading.Thread(target=self._background_refresh, daemon=True)
+        self.refresh_thread.start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except SnackSourceException as sse:
+            # Keep serving the stale catalog; the next stale read will try again.
+            logger.warning('Background snack catalog refresh failed: %s', sse.msg)
+        finally:
+            self.cache.delete(self.REFRESH_LOCK_KEY)
+            # The wrapped source may have touched the database from this thread.
+            connections.close_all()
+
+    def invalidate(self):
+        """
+        Drop the cached catalog, and keep fetches already under way from caching theirs.
+        """
+        self.get_generation().bump()
+        self.cache.delete(self.CATALOG_KEY)
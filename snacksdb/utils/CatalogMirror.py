@@ -0,0 +1,127 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from .AbstractSnackSource import SnackSourceException
+from .LocalSnackSource import LocalSnackSource
+
+
+class CatalogMirror(object):
+    """
+    Keeps the local Snack table in step with another snack source, usually the
+    Snack Food API, so that snacksdb.utils.MirrorSnackSource can serve the catalog
+    without making users wait on it. Each sync() fetches the upstream catalog,
+    compares it with the mirror by ID, and writes only the snacks that were added,
+    changed or removed. The outcome of each sync is recorded in CatalogSync.
+
+    Run syncs on a schedule with 'manage.py sync_snack_catalog --loop'.
+    """
+    DEFAULT_SOURCE_CLASS = 'snacksdb.utils.SnackAPISource.SnackAPISource'
+
+    # The Snack fields that SnackRecords carry, other than 'id'.
+    SYNCED_FIELDS = [
+        'name', 'optional', 'purchase_locations', 'purchase_count', 'last_purchase_date'
+    ]
+
+    def __init__(self, source=None):
+        if source is None:
+            from snacksdb.utils import get_snack_source_class
+
+            source_class_path = getattr(
+                settings, 'SNACK_MIRROR_SOURCE_CLASS', self.DEFAULT_SOURCE_CLASS
+            )
+            source_class = get_snack_source_class(source_class_path)
+
+            if issubclass(source_class, LocalSnackSource):
+                msg = _('settings.SNACK_MIRROR_SOURCE_CLASS must not refer to '
+                        'a source that reads the local catalog.')
+                raise ImproperlyConfigured(msg)
+
+            source = source_class()
+
+        self.source = source
+
+    def sync(self):
+        """
+        Bring the mirror up to date with the upstream source, record the outcome,
+        and return the CatalogSync record. Raise SnackSourceException if the
+        upstream catalog can't be fetched or applied; the mirror is left as it was.
+        """
+        from snacksdb.models import CatalogSync, Snack
+
+        status = CatalogSync.get()
+        status.last_attempt = timezone.now()
+
+        try:
+            snacks = [Snack.from_record(snack) for snack in self.source.list()]
+            status.created, status.updated, status.removed = self.apply(snacks)
+        except (SnackSourceException, ValueError, IntegrityError) as e:
+            status.failures += 1
+            status.last_error = str(getattr(e, 'msg', e))
+            status.save()
+            raise SnackSourceException(status.last_error)
+
+        status.last_success = status.last_attempt
+        status.last_error = ''
+        status.failures = 0
+        status.snacks = len(snacks)
+        status.save()
+
+        return status
+
+    def apply(self, snacks):
+        """
+        Make the mirror hold exactly the given (unsaved) Snacks, writing only the rows
+        that differ. Return the numbers of snacks created, updated and removed.
+        """
+        from snacksdb.models import Snack
+
+        upstream = {snack.id: snack for snack in snacks}
+        now = timezone.now()
+        updated = 0
+
+        with transaction.atomic():
+            mirrored = {
+                row.pop('id'): row for row in Snack.objects.values('id', *self.SYNCED_FIELDS)
+            }
+
+            # Remove snacks first, so that a new snack may reuse a removed one's name.
+            removed_ids = [snack_id for snack_id in mirrored if snack_id not in upstream]
+            if removed_ids:
+                Snack.objects.filter(id__in=removed_ids).delete()
+
+            for snack_id, snack in upstream.items():
+                if snack_id not in mirrored:
+                    continue
+
+                fields = {field: getattr(snack, field) for field in self.SYNCED_FIELDS}
+                if fields != mirrored[snack_id]:
+                    Snack.objects.filter(id=snack_id).update(modified=now, **fields)
+                    updated += 1
+
+            new_snacks = [snack for snack in snacks if snack.id not in mirrored]
+            Snack.objects.bulk_create(new_snacks, batch_size=500)
+
+        return len(new_snacks), updated, len(removed_ids)
+
+    def add(self, snack):
+        """
+        Copy a SnackRecord (e.g. a new suggestion) into the mirror now, rather
+        than waiting for the next sync. Failures are left for that sync to fix.
+        """
+        from snacksdb.models import Snack
+
+        try:
+            snack = Snack.from_record(snack)
+            with transaction.atomic():
+                Snack.objects.update_or_create(id=snack.id, defaults={
+                    field: getattr(snack, field) for field in self.SYNCED_FIELDS
+                })
+        except (ValueError, IntegrityError):
+            pass
@@ -0,0 +1,50 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils.translation import ugettext_lazy as _
+
+from .AbstractSnackSource import AbstractSnackSource, SnackSourceException
+
+
+class LocalSnackSource(AbstractSnackSource):
+    """
+    Snack source backed by the local Snack table, for deployments that don't use the
+    Snack Food API, or can't reach it. Load the catalog with the 'snack_catalog'
+    management command.
+    """
+    def list(self):
+        from snacksdb.models import Snack
+
+        return [snack.to_record() for snack in Snack.objects.all()]
+
+    def suggest(self, name, location, latitude=None, longitude=None):
+        from snacksdb.models import Snack
+
+        if Snack.objects.filter(name=name).exists():
+            raise SnackSourceException(_('Error: That snack already exists!'), status_code=409)
+
+        try:
+            with transaction.atomic():
+                snack = Snack.objects.create(
+                    name=name, purchase_locations=location,
+                    latitude=latitude, longitude=longitude,
+                )
+        except IntegrityError:
+            # Someone else suggested it first.
+            raise SnackSourceException(_('Error: That snack already exists!'), status_code=409)
+
+        return snack.to_record()
+
+    def get_version(self):
+        from snacksdb.models import Snack
+
+        catalog = Snack.objects.aggregate(count=Count('id'), modified=Max('modified'))
+        if not catalog['count']:
+            return '0'
+
+        return "{count}-{stamp}".format(
+            count=catalog['count'], stamp=int(catalog['modified'].timestamp() * 1000000)
+        )
@@ -0,0 +1,108 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from .AbstractSnackSource import SnackSourceException
+from .CatalogMirror import CatalogMirror
+from .LocalSnackSource import LocalSnackSource
+
+
+logger = logging.getLogger(__name__)
+
+
+class MirrorSnackSource(LocalSnackSource):
+    """
+    Snack source that serves the local mirror of the Snack Food API that
+    CatalogMirror keeps, so that listing snacks never waits on the API.
+
+    The mirror is trusted for settings.SNACK_MIRROR_MAX_STALENESS seconds after
+    its last successful sync. If it's older than that (e.g. the sync job has
+    stopped), one request syncs it while the user waits; if that sync fails,
+    the stale mirror is served rather than nothing. A mirror that has never been
+    synced is never served. Suggestions go upstream, and are copied into the
+    mirror straight away.
+    """
+    SYNC_LOCK_KEY = 'snack_mirror_sync_lock'
+    SYNC_LOCK_TTL = 60
+
+    # How long a request waits for another's first sync of the mirror, and how often it checks.
+    SYNC_WAIT = 10
+    SYNC_WAIT_INTERVAL = 0.1
+
+    DEFAULT_MAX_STALENESS = 60 * 15
+
+    def __init__(self, mirror=None, max_staleness=None, cache_alias=None):
+        self.mirror = mirror or CatalogMirror()
+        if max_staleness is None:
+            max_staleness = getattr(
+                settings, 'SNACK_MIRROR_MAX_STALENESS', self.DEFAULT_MAX_STALENESS
+            )
+
+        self.max_staleness = datetime.timedelta(seconds=max_staleness)
+        self.cache_alias = cache_alias or getattr(settings, 'SNACK_CACHE_ALIAS', 'default')
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def list(self):
+        from snacksdb.models import CatalogSync
+
+        last_success = CatalogSync.get_last_success()
+        if last_success is None or timezone.now() - last_success > self.max_staleness:
+            self.sync(required=last_success is None)
+
+        return super().list()
+
+    def sync(self, required=False):
+        """
+        Sync the mirror, unless another thread (or process) is already doing so.
+        Failures are logged, and raised only if the mirror is 'required' because
+        it has never been synced; in that case, if another thread is syncing
+        it, wait for that sync instead.
+        """
+        if not self.cache.add(self.SYNC_LOCK_KEY, True, self.SYNC_LOCK_TTL):
+            if required:
+                self.wait_for_first_sync()
+            return
+
+        try:
+            self.mirror.sync()
+        except SnackSourceException as sse:
+            if required:
+                raise
+            logger.warning('Snack catalog mirror is stale, and syncing it failed: %s', sse.msg)
+        finally:
+            self.cache.delete(self.SYNC_LOCK_KEY)
+
+    def wait_for_first_sync(self):
+        """
+        Wait up to SYNC_WAIT seconds for another thread's sync of a mirror that has
+        never been synced. Raise SnackSourceException if the mirror still hasn't been.
+        """
+        from snacksdb.models import CatalogSync
+
+        deadline = time.monotonic() + self.SYNC_WAIT
+        while self.cache.get(self.SYNC_LOCK_KEY) and time.monotonic() < deadline:
+            time.sleep(self.SYNC_WAIT_INTERVAL)
+
+        if CatalogSync.get_last_success() is None:
+            raise SnackSourceException(
+                _("The snack catalog hasn't been loaded yet. Try again in a moment.")
+            )
+
+    def suggest(self, name, location, latitude=None, longitude=None):
+        snack = self.mirror.source.suggest(
+            name, location, latitude=latitude, longitude=longitude
+        )
+        self.mirror.add(snack)
+        return snack
@@ -0,0 +1,114 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.apps import apps
+from django.core.cache import caches
+
+from .CacheCounter import CacheCounter
+
+
+class NominatedSnacks(object):
+    """
+    Keeps the set of snack IDs nominated in each period in the cache, so that
+    pages which need it don't query Nominations on every view.
+
+    Sets are cached under keys scoped to the period. Saving a Nomination adds its
+    snack to the cached set in place (see snacksdb.apps); a set that isn't cached,
+    or that two writers raced to update, is rebuilt from the database on the next
+    read. Each update also bumps the set's generation, and a read that rebuilds the
+    set caches it only if the generation didn't change while it loaded, so that a
+    set loaded just before a nomination was saved isn't cached without it.
+
+    Like QuotaLedger, the cache is a shortcut: the database remains the source of
+    truth, and sets expire after TTL seconds in case one drifts.
+    """
+    KEY_TMPL = "nominated_snacks_{period}"
+    LOCK_KEY_TMPL = "{cache_key}_lock"
+    GENERATION_KEY_TMPL = "{cache_key}_generation"
+    TTL = 60 * 5
+    LOCK_TTL = 5
+
+    def __init__(self, cache_alias='default'):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_cache_key(self, period=None):
+        from snacksdb.utils import get_period
+
+        return self.KEY_TMPL.format(period=period or get_period())
+
+    def get(self, period=None):
+        """
+        Return the frozenset of snack IDs nominated in the period, which defaults
+        to the current one.
+        """
+        cache_key = self.get_cache_key(period)
+        snack_ids = self.cache.get(cache_key)
+
+        if snack_ids is None:
+            generation = self.get_generation(period)
+            loaded_generation = generation.get()
+            snack_ids = self.load(period)
+
+            # Don't cache a set that may have missed an update made while it loaded,
+            # nor clobber a set that another request cached in the meantime.
+            if generation.get() == loaded_generation:
+                self.cache.add(cache_key, snack_ids, self.TTL)
+
+        return snack_ids
+
+    def load(self, period=None):
+        """
+        Read the period's nominated snack IDs from the database.
+        """
+        model = apps.get_model('snacksdb', 'Nomination')
+        nominations = model.objects.in_period(period) if period else model.objects.this_month()
+
+        nominations = nominations.filter(snack_id__isnull=False)
+        return frozenset(nominations.values_list('snack_id', flat=True))
+
+    def add(self, snack_id, period=None):
+        """
+        Add a snack to the period's cached set, if it's cached.
+        """
+        self.bump_generation(period)
+
+        cache_key = self.get_cache_key(period)
+        lock_key = self.LOCK_KEY_TMPL.format(cache_key=cache_key)
+
+        # The cache can't add to a set atomically, so updates take turns. If another
+        # update holds the lock, drop the set rather than risk losing either update.
+        if not self.cache.add(lock_key, 1, self.LOCK_TTL):
+            self.discard(period)
+            return
+
+        try:
+            snack_ids = self.cache.get(cache_key)
+            if snack_ids is not None and snack_id not in snack_ids:
+                self.cache.set(cache_key, snack_ids | {snack_id}, self.TTL)
+        finally:
+            self.cache.delete(lock_key)
+
+    def discard(self, period=None):
+        """
+        Drop the period's cached set, so that the next read rebuilds it.
+        """
+        self.bump_generation(period)
+        self.cache.delete(self.get_cache_key(period))
+
+    def get_generation(self, period=None):
+        """
+        Return the counter that changes whenever the period's set is updated.
+        """
+        generation_key = self.GENERATION_KEY_TMPL.format(cache_key=self.get_cache_key(period))
+        return CacheCounter(self.cache, generation_key, self.TTL)
+
+    def bump_generation(self, period=None):
+        self.get_generation(period).bump()
+
+
+nominated_snacks = NominatedSnacks()
@@ -0,0 +1,127 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+
+
+class QuotaLedger(object):
+    """
+    Keeps track of how many votes or nominations each user has left in a period.
+
+    Balances are cached under keys scoped to the period, so they never leak
+    across a month boundary. Writes adjust cached balances in place with atomic
+    cache decr/incr, rather than deleting them and recounting; a balance that
+    isn't cached is recounted from the database on the next read.
+
+    The database remains the source of truth: the ledger is for displaying
+    balances and turning away requests that are sure to fail, cheaply.
+    """
+    KEY_TMPL = "quota_{kind}_{period}_{user_pk}"
+    TTL = 60 * 5
+
+    kind = None              # Name of the quota, used in cache keys.
+    model_name = None        # Name of the snacksdb model that spends the quota.
+    allowance_setting = None  # Name of the setting that holds the monthly allowance.
+
+    def __init__(self, cache_alias='default'):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @property
+    def allowance(self):
+        return getattr(settings, self.allowance_setting)
+
+    def get_cache_key(self, user_pk, period=None):
+        """
+        Return the cache key used to store the given user's balance for the given period.
+        """
+        from snacksdb.utils import get_period
+
+        return self.KEY_TMPL.format(kind=self.kind, period=period or get_period(), user_pk=user_pk)
+
+    def remaining(self, user, period=None):
+        """
+        Return the number of votes or nominations the user has left in the period,
+        which defaults to the current one.
+        """
+        if user.is_anonymous:
+            return 0
+
+        cache_key = self.get_cache_key(user.pk, period)
+        balance = self.cache.get(cache_key)
+
+        if balance is None:
+            balance = self.count_remaining(user.pk, period)
+            # Don't clobber a balance that another request cached in the meantime.
+            self.cache.add(cache_key, balance, self.TTL)
+
+        return max(0, balance)
+
+    def count_remaining(self, user_pk, period=None):
+        """
+        Count the user's balance for the period from the database.
+        """
+        model = apps.get_model('snacksdb', self.model_name)
+        records = model.objects.in_period(period) if period else model.objects.this_month()
+
+        return max(0, self.allowance - records.filter(user_id=user_pk).count())
+
+    def spend(self, user_pk, period=None, amount=1):
+        """
+        Take 'amount' from the user's cached balance for the period, if it's cached.
+        """
+        try:
+            self.cache.decr(self.get_cache_key(user_pk, period), amount)
+        except ValueError:
+            pass  # Not cached. The next read will count the balance from the database.
+
+    def refund(self, user_pk, period=None, amount=1):
+        """
+        Give 'amount' back to the user's cached balance for the period, if it's cached.
+        """
+        try:
+            self.cache.incr(self.get_cache_key(user_pk, period), amount)
+        except ValueError:
+            pass  # Not cached. The next read will count the balance from the database.
+
+
+class VoteLedger(QuotaLedger):
+    kind = 'votes'
+    model_name = 'Ballot'
+    allowance_setting = 'VOTES_PER_MONTH'
+
+    def count_remaining(self, user_pk, period=None):
+        """
+        Count the user's balance for the period from the database. Buffered votes
+        aren't Ballots until they're flushed, but they're spent from the user's
+        VoteQuota when they're cast, so with the buffer, that's read instead.
+        """
+        if settings.VOTE_BUFFER_ENABLED:
+            from snacksdb.utils import get_period
+
+            quotas = apps.get_model('snacksdb', 'VoteQuota').objects.filter(
+                user_id=user_pk, period=period or get_period()
+            )
+            remaining = quotas.values_list('remaining', flat=True).first()
+
+            # A user without a quota hasn't voted in the period since it was introduced.
+            if remaining is not None:
+                return remaining
+
+        return super().count_remaining(user_pk, period)
+
+
+class NominationLedger(QuotaLedger):
+    kind = 'nominations'
+    model_name = 'Nomination'
+    allowance_setting = 'NOMINATIONS_PER_MONTH'
+
+
+vote_ledger = VoteLedger()
+nomination_ledger = NominationLedger()
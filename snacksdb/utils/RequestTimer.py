@@ -0,0 +1,124 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import threading
+import time
+
+
+_local = threading.local()
+
+
+class RequestTimer(object):
+    """
+    Adds up how long each phase of handling a request takes (e.g. SQL, the Snack
+    API, rendering), for snacksdb.middleware.ServerTimingMiddleware. The timer for
+    the request being handled is active in its thread; code times a phase with
+    time_phase(name), which does nothing if no timer is active.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+        self.lock = threading.Lock()
+
+    def add(self, name, seconds):
+        """
+        Add 'seconds' to the named phase.
+        """
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def activate(self):
+        """
+        Make this the active timer in the current thread, and return the one it replaces.
+        """
+        previous = getattr(_local, 'timer', None)
+        _local.timer = self
+        return previous
+
+    def bind(self, fn):
+        """
+        Return a function that calls fn with this timer active, so that phases timed
+        in other threads (see snacksdb.utils.run_in_background) count towards it.
+        """
+        def bound(*pos, **kw):
+            previous = self.activate()
+            try:
+                return fn(*pos, **kw)
+            finally:
+                _local.timer = previous
+
+        return bound
+
+    def time_query(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper that counts and times queries.
+        """
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.phases['db'] = self.phases.get('db', 0) + elapsed
+                self.queries += 1
+
+
+class Phase(object):
+    """
+    Context manager that adds the time spent inside it to a phase of a RequestTimer.
+    """
+    __slots__ = ['timer', 'name', 'started']
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timer.add(self.name, time.perf_counter() - self.started)
+
+
+class NullPhase(object):
+    """
+    Context manager that does nothing, for when no RequestTimer is active.
+    """
+    __slots__ = []
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_PHASE = NullPhase()
+
+
+def get_request_timer():
+    """
+    Return the RequestTimer active in this thread, or None.
+    """
+    return getattr(_local, 'timer', None)
+
+
+def deactivate_request_timer(previous=None):
+    """
+    Deactivate this thread's RequestTimer, restoring 'previous', if given.
+    """
+    _local.timer = previous
+
+
+def time_phase(name):
+    """
+    Return a context manager that adds the time spent inside it to the named
+    phase of the active RequestTimer, if there is one.
+    """
+    timer = getattr(_local, 'timer', None)
+    return NULL_PHASE if timer is None else Phase(timer, name)
@@ -2,13 +2,22 @@
 
 __author__ = 'zach.mott@gmail.com'
 
+import hashlib
+import os
+import random
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from django.conf import settings
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 
 from .AbstractSnackSource import AbstractSnackSource, SnackSourceException
+from .RequestTimer import time_phase
+from .SnackCatalogDecoder import SnackCatalogDecoder
 
 
 class SnackAPISource(AbstractSnackSource):
@@ -21,20 +30,130 @@ class SnackAPISource(AbstractSnackSource):
     LIST_PATH = '/snacks'
     SUGGEST_PATH = '/snacks'
 
+    fetch_concurrently = True
+
+    DEFAULT_CONNECT_TIMEOUT = 3.05
+    DEFAULT_READ_TIMEOUT = 10
+    DEFAULT_LIST_RETRIES = 2
+    DEFAULT_RETRY_BACKOFF = 0.25
+    DEFAULT_POOL_CONNECTIONS = 2
+    DEFAULT_POOL_MAXSIZE = 10
+    DEFAULT_VERSION_TTL = 60
+
+    # Upstream responses that indicate a transient failure worth retrying.
+    RETRY_STATUS_CODES = {502, 503, 504}
+
+    # One pooled, keep-alive session per process. See get_session().
+    _session = None
+    _session_pid = None
+    _session_lock = threading.Lock()
+
     def __init__(self, api_key=None, api_base=None):
         self.api_key = api_key or settings.SNACK_BACKEND_API_KEY
         self.api_base = api_base or getattr(settings, 'SNACK_BACKEND_API_BASE', None)
         self.api_base = self.api_base or self.DEFAULT_API_BASE
 
+        self.timeout = (
+            getattr(settings, 'SNACK_BACKEND_CONNECT_TIMEOUT', self.DEFAULT_CONNECT_TIMEOUT),
+            getattr(settings, 'SNACK_BACKEND_READ_TIMEOUT', self.DEFAULT_READ_TIMEOUT),
+        )
+        self.list_retries = getattr(
+            settings, 'SNACK_BACKEND_LIST_RETRIES', self.DEFAULT_LIST_RETRIES
+        )
+        self.retry_backoff = getattr(
+            settings, 'SNACK_BACKEND_RETRY_BACKOFF', self.DEFAULT_RETRY_BACKOFF
+        )
+        self.decoder = SnackCatalogDecoder(
+            parser=getattr(settings, 'SNACK_BACKEND_JSON_PARSER', None),
+            stream=getattr(settings, 'SNACK_BACKEND_STREAM_CATALOG', False),
+        )
+        self.version_ttl = getattr(
+            settings, 'SNACK_BACKEND_VERSION_TTL', self.DEFAULT_VERSION_TTL
+        )
+
+        # (monotonic time, hash) of the catalog this instance last fetched. See get_version().
+        self._version = None
+
     @cached_property
     def headers(self):
         return {'Authorization': "ApiKey {self.api_key}".format(self=self)}
 
-    def list(self):
+    @classmethod
+    def get_session(cls):
+        """
+        Return this process's requests.Session, creating it if necessary. The session
+        keeps connections to the Snack API alive between requests, so that each
+        request doesn't pay for a new TCP and TLS handshake.
+
+        The session is recreated after a fork, so that worker processes never
+        share sockets with their parent.
+        """
+        pid = os.getpid()
+
+        if cls._session is None or cls._session_pid != pid:
+            with cls._session_lock:
+                if cls._session is None or cls._session_pid != pid:
+                    adapter = HTTPAdapter(
+                        pool_connections=getattr(
+                            settings, 'SNACK_BACKEND_POOL_CONNECTIONS', cls.DEFAULT_POOL_CONNECTIONS
+                        ),
+                        pool_maxsize=getattr(
+                            settings, 'SNACK_BACKEND_POOL_MAXSIZE', cls.DEFAULT_POOL_MAXSIZE
+                        ),
+                    )
+                    session = requests.Session()
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+
+                    cls._session, cls._session_pid = session, pid
+
+        return cls._session
+
+    def get_retry_delay(self, attempt):
+        """
+        Return the number of seconds to wait before retrying after the given
+        (zero-indexed) attempt: exponential backoff with full jitter, so that
+        workers which failed together don't retry together.
+        """
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    def get_with_retries(self, url, retries=None, stream=False):
+        """
+        GET the given URL, retrying connection errors, timeouts and the status codes
+        in RETRY_STATUS_CODES up to 'retries' times (by default, self.list_retries).
+        Return the last response; with 'stream', its body is left to be read.
+        """
+        if retries is None:
+            retries = self.list_retries
+
+        for attempt in range(retries + 1):
+            is_last_attempt = attempt == retries
+
+            try:
+                response = self.get_session().get(
+                    url, headers=self.headers, timeout=self.timeout, stream=stream
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if is_last_attempt:
+                    raise SnackSourceException(_("Couldn't reach the Snack API. Try again later."))
+            else:
+                if is_last_attempt or response.status_code not in self.RETRY_STATUS_CODES:
+                    break
+                # Release the connection to the pool before retrying.
+                response.close()
+
+            time.sleep(self.get_retry_delay(attempt))
+
+        return response
+
+    def list(self, retries=None):
         """
         Get a list of available snacks from the Snack Food API.
+        Listing snacks is idempotent, so transient failures are retried.
         """
-        response = requests.get(self.api_base + self.LIST_PATH, headers=self.headers)
+        url = self.api_base + self.LIST_PATH
+        with time_phase('snack-api'):
+            response = self.get_with_retries(url, retries, stream=self.decoder.stream)
 
         # Handle status codes described in the documentation:
         # https://api-snacks.nerderylabs.com/v1/help/api/get-snacks.
@@ -44,33 +163,78 @@ class SnackAPISource(AbstractSnackSource):
             msg = _("Unknown error with Snack API. Maybe it's undergoing maintenance?")
             raise SnackSourceException(msg)
 
-        return response.json()
+        # The catalog is versioned by a hash of the body, taken as it's read.
+        digest = hashlib.md5()
+
+        try:
+            # A streamed body is downloaded as it's decoded, so time both together.
+            with time_phase('snack-api'):
+                snacks = self.decoder.decode_catalog(response, digest)
+        except (requests.exceptions.RequestException, OSError):
+            raise SnackSourceException(_("Couldn't reach the Snack API. Try again later."))
+        except (TypeError, ValueError):
+            raise SnackSourceException(_('Unexpected response from the Snack API.'))
+        finally:
+            response.close()
+
+        self._version = (time.monotonic(), digest.hexdigest())
+        return snacks
+
+    def get_version(self):
+        """
+        Return a hash of the catalog this instance last fetched, as the Snack API sent
+        it, or None if it hasn't fetched one in the last SNACK_BACKEND_VERSION_TTL
+        seconds, so that things cached by version notice catalog changes within that long.
+        """
+        version = self._version
+        if version is None or time.monotonic() - version[0] > self.version_ttl:
+            return None
+
+        return version[1]
+
+    def warm_up(self):
+        """
+        List snacks once, without retrying, which opens a pooled connection to the
+        Snack API (DNS, TCP and TLS included) for the first request to reuse.
+        """
+        return self.list(retries=0)
 
     def suggest(self, name, location, latitude=None, longitude=None):
         """
         Submit a snack suggestion to the Snack Food API.
+        Suggestions aren't idempotent, so they're never retried.
         """
         data = {'name': name, 'location': location}
         if latitude is not None and longitude is not None:
             data['latitude'] = float(latitude)
             data['longitude'] = float(longitude)
 
-        response = requests.post(
-            self.api_base + self.SUGGEST_PATH,
-            headers=self.headers, json=data
-        )
+        try:
+            with time_phase('snack-api'):
+                response = self.get_session().post(
+                    self.api_base + self.SUGGEST_PATH,
+                    headers=self.headers, json=data, timeout=self.timeout
+                )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            raise SnackSourceException(_("Couldn't reach the Snack API. Try again later."))
 
         # Handle status codes described in the documentation:
         # https://api-snacks.nerderylabs.com/v1/help/api/post-snacks.
         if response.status_code == 400:
-            raise SnackSourceException(_('Malformed suggestion submitted to Snack API.'))
+            msg = _('Malformed suggestion submitted to Snack API.')
+            raise SnackSourceException(msg, status_code=400)
         elif response.status_code == 401:
-            raise SnackSourceException(_('Access denied to Snack API. Check the API key.'))
+            msg = _('Access denied to Snack API. Check the API key.')
+            raise SnackSourceException(msg, status_code=401)
         elif response.status_code == 409:
-            raise SnackSourceException(_('Error: That snack already exists!'))
+            raise SnackSourceException(_('Error: That snack already exists!'), status_code=409)
         elif response.status_code != 200:
             msg = _("Unknown error with Snack API (response code {status}). "
                     "Maybe it's undergoing maintenance?")
-            raise SnackSourceException(msg.format(status=response.status_code))
+            status = response.status_code
+            raise SnackSourceException(msg.format(status=status), status_code=status)
 
-        return response.json()
+        try:
+            return self.decoder.decode_snack(response)
+        except (TypeError, ValueError):
+            raise SnackSourceException(_('Unexpected response from the Snack API.'))
@@ -0,0 +1,158 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import json
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import ugettext_lazy as _
+
+from .SnackRecord import SnackRecord
+
+# Faster JSON parsers, and a streaming one, are used if they're installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+class SnackCatalogDecoder(object):
+    """
+    Decodes Snack Food API responses into SnackRecords.
+
+    Whole responses are parsed with the fastest JSON parser installed: orjson,
+    then ujson, then the standard library's json. With 'stream' (and ijson
+    installed), catalogs are instead parsed incrementally as they're downloaded,
+    one snack at a time, keeping only the fields that SnackRecords hold; other
+    fields are skipped as they're parsed. Each snack is reduced to a SnackRecord
+    as soon as it's parsed, so peak memory holds the records but never the whole
+    body or its full tree of dictionaries. That's slower per snack, unless ijson
+    has a compiled backend, but keeps very large catalogs from spiking memory.
+
+    Parsing errors raise ValueError.
+    """
+    PARSERS = ['orjson', 'ujson', 'json']
+
+    # ijson events that carry a scalar value.
+    SCALAR_EVENTS = {'null', 'boolean', 'integer', 'double', 'number', 'string'}
+
+    def __init__(self, parser=None, stream=False):
+        if parser is None:
+            parser = next(name for name in self.PARSERS if self.is_available(name))
+        elif not self.is_available(parser):
+            msg = _("The {parser} JSON parser isn't installed.")
+            raise ImproperlyConfigured(msg.format(parser=parser))
+
+        self.parser = parser
+        self.stream = bool(stream) and ijson is not None
+
+    @staticmethod
+    def is_available(parser):
+        """
+        Return whether the named parser (or ijson, for streaming) is installed.
+        """
+        modules = {'orjson': orjson, 'ujson': ujson, 'json': json, 'ijson': ijson}
+        return modules.get(parser) is not None
+
+    def loads(self, body):
+        """
+        Parse a JSON document, as bytes.
+        """
+        if self.parser == 'orjson':
+            return orjson.loads(body)
+        if self.parser == 'ujson':
+            return ujson.loads(body)
+        return json.loads(body)
+
+    def decode_catalog(self, response, digest=None):
+        """
+        Return the list of SnackRecords in a requests.Response's JSON body. When
+        streaming, the request should have been made with stream=True. If 'digest',
+        a hashlib object, is given, it's updated with the body as it's read.
+        """
+        if self.stream:
+            # Let urllib3 undo any Content-Encoding (e.g. gzip) as ijson reads.
+            response.raw.decode_content = True
+            fp = response.raw if digest is None else _DigestReader(response.raw, digest)
+            return self.decode_catalog_stream(fp)
+
+        body = response.content
+        if digest is not None:
+            digest.update(body)
+        return self.decode_catalog_body(body)
+
+    def decode_catalog_body(self, body):
+        """
+        Return the list of SnackRecords in a JSON document, as bytes.
+        """
+        try:
+            snacks = self.loads(body)
+        except ValueError as e:
+            raise ValueError("Malformed snack catalog: {e}".format(e=e))
+
+        if not isinstance(snacks, list):
+            raise ValueError('Malformed snack catalog: expected a list of snacks.')
+
+        return [SnackRecord.from_dict(snack) for snack in snacks]
+
+    def decode_catalog_stream(self, fp):
+        """
+        Return the list of SnackRecords in a JSON document read incrementally from
+        the file-like object 'fp', holding only one snack's fields at a time.
+        """
+        try:
+            return [SnackRecord.from_dict(snack) for snack in self.iter_snacks(fp)]
+        except ijson.JSONError as e:
+            raise ValueError("Malformed snack catalog: {e}".format(e=e))
+
+    def iter_snacks(self, fp):
+        """
+        Yield a dictionary of each snack's SnackRecord.API_FIELDS, which must be
+        scalars, from the JSON document read from 'fp'. The rest of each snack's
+        fields are skipped without being built.
+        """
+        fields = {'item.' + field: field for field in SnackRecord.API_FIELDS}
+        snack = None
+
+        for prefix, event, value in ijson.parse(fp):
+            if prefix == 'item':
+                if event == 'start_map':
+                    snack = {}
+                elif event == 'end_map':
+                    yield snack
+                    snack = None
+                elif event != 'map_key':
+                    raise ValueError("Malformed snack catalog: expected a snack, got {value!r}."
+                                     .format(value=value))
+            elif prefix in fields and event in self.SCALAR_EVENTS:
+                snack[fields[prefix]] = value
+
+    def decode_snack(self, response):
+        """
+        Return the SnackRecord in a requests.Response's JSON body.
+        """
+        return SnackRecord.from_dict(self.loads(response.content))
+
+
+class _DigestReader(object):
+    """
+    A file-like object that updates a hashlib object with what's read from another.
+    """
+    def __init__(self, fp, digest):
+        self.fp = fp
+        self.digest = digest
+
+    def read(self, size=-1):
+        data = self.fp.read(size)
+        self.digest.update(data)
+        return data
@@ -0,0 +1,64 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from collections import namedtuple
+
+
+_SnackRecordBase = namedtuple('SnackRecord', [
+    'id', 'name', 'optional', 'purchase_locations', 'purchase_count', 'last_purchase_date'
+])
+
+
+class SnackRecord(_SnackRecordBase):
+    """
+    An immutable snack from a snack source's catalog. Snack sources parse their
+    catalogs into SnackRecords once per fetch, so a catalog can be cached and shared
+    between requests and threads as is. Per-request annotations, like vote totals,
+    belong in a wrapper such as snacksdb.utils.BoardSnack.
+
+    'last_purchase_date' is kept as the Snack Food API sends it (e.g. '5/24/2018').
+    """
+    __slots__ = ()
+
+    # The fields of the Snack Food API's snacks that from_dict reads.
+    API_FIELDS = (
+        'id', 'name', 'optional', 'purchaseLocations', 'purchaseCount', 'lastPurchaseDate'
+    )
+
+    def __new__(cls, id, name, optional, purchase_locations='', purchase_count=0,
+                last_purchase_date=None):
+        return super().__new__(
+            cls, id, name, optional, purchase_locations, purchase_count, last_purchase_date
+        )
+
+    @classmethod
+    def from_dict(cls, snack):
+        """
+        Return a SnackRecord parsed from a snack dictionary in the Snack Food API's
+        format (see AbstractSnackSource.list). Raise ValueError if it's malformed.
+        """
+        try:
+            return cls(
+                id=int(snack['id']),
+                name=snack['name'],
+                optional=bool(snack['optional']),
+                purchase_locations=snack.get('purchaseLocations') or '',
+                purchase_count=int(snack.get('purchaseCount') or 0),
+                last_purchase_date=snack.get('lastPurchaseDate'),
+            )
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise ValueError("Malformed snack {snack!r}: {e}".format(snack=snack, e=e))
+
+    def to_dict(self):
+        """
+        Return this snack as a dictionary in the Snack Food API's format.
+        """
+        return {
+            'id': self.id,
+            'name': self.name,
+            'optional': self.optional,
+            'purchaseLocations': self.purchase_locations,
+            'purchaseCount': self.purchase_count,
+            'lastPurchaseDate': self.last_purchase_date,
+        }
@@ -0,0 +1,140 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .AbstractSnackSource import SnackSourceException
+
+
+class SuggestionOutbox(object):
+    """
+    Submits queued SnackSuggestions to the snack source, so that users who nominate
+    a new snack don't wait on the Snack Food API. Each drain() claims the suggestions
+    that are due, submits up to 'concurrency' of them at once, and resolves each:
+
+        submitted   The source accepted the snack; the pending Nomination gets its ID.
+        duplicate   The snack already exists (409). If it's in the catalog and nobody
+                    has nominated it this month, the pending Nomination is linked to
+                    it; otherwise the user gets their nomination back.
+        rejected    The source said the suggestion was malformed (400). The user gets
+                    their nomination back.
+
+    Other failures are retried with exponential backoff, up to 'max_attempts' times,
+    after which the suggestion is marked failed and the user gets their nomination
+    back. Suggestions aren't idempotent, so a retry of a submission that timed out
+    after all is answered with a 409, and resolved as a duplicate of itself.
+
+    Drain the outbox continuously with 'manage.py drain_suggestions --loop'.
+    """
+    DEFAULT_CONCURRENCY = 4
+    DEFAULT_MAX_ATTEMPTS = 5
+    DEFAULT_RETRY_BACKOFF = 30
+    DEFAULT_BATCH_SIZE = 50
+
+    # Seconds that a claimed batch is hidden from other workers. It must outlast
+    # the batch's submissions, even if they all time out.
+    LEASE = 60 * 5
+
+    def __init__(self, source=None, concurrency=None, max_attempts=None, backoff=None,
+                 batch_size=None):
+        if source is None:
+            from snacksdb.utils import get_snack_source
+
+            source = get_snack_source()
+
+        self.source = source
+        self.concurrency = concurrency or getattr(
+            settings, 'SNACK_SUGGESTION_CONCURRENCY', self.DEFAULT_CONCURRENCY
+        )
+        self.max_attempts = max_attempts or getattr(
+            settings, 'SNACK_SUGGESTION_MAX_ATTEMPTS', self.DEFAULT_MAX_ATTEMPTS
+        )
+        self.backoff = backoff if backoff is not None else getattr(
+            settings, 'SNACK_SUGGESTION_RETRY_BACKOFF', self.DEFAULT_RETRY_BACKOFF
+        )
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+
+    def drain(self):
+        """
+        Submit every suggestion that's due, and return a Counter of their outcomes
+        ('retry' for those that will be tried again).
+        """
+        from snacksdb.models import SnackSuggestion
+
+        outcomes = collections.Counter()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                suggestions = SnackSuggestion.claim(self.batch_size, self.LEASE)
+                if not suggestions:
+                    break
+
+                # Only the requests run in the pool; the results are recorded here,
+                # so that worker threads never touch the database.
+                results = executor.map(self.submit, suggestions)
+                for suggestion, (snack, error) in zip(suggestions, results):
+                    suggestion.attempts += 1
+                    outcomes[self.record(suggestion, snack, error)] += 1
+
+        return outcomes
+
+    def submit(self, suggestion):
+        """
+        Submit the suggestion to the source. Return (snack, None) if it was
+        accepted, or (None, exception) if it wasn't.
+        """
+        try:
+            snack = self.source.suggest(
+                suggestion.name, suggestion.location,
+                latitude=suggestion.latitude, longitude=suggestion.longitude
+            )
+        except SnackSourceException as sse:
+            return None, sse
+
+        return snack, None
+
+    def record(self, suggestion, snack, error):
+        """
+        Resolve or reschedule the suggestion, given the outcome of its
+        submission, and return the name of the outcome.
+        """
+        from snacksdb.models import SnackSuggestion
+
+        if error is None:
+            suggestion.link(snack.id)
+        elif error.status_code == 409:
+            snack = self.find_snack(suggestion.name)
+            if snack is not None:
+                suggestion.link(snack.id, status=SnackSuggestion.DUPLICATE)
+            else:
+                suggestion.resolve(SnackSuggestion.DUPLICATE, str(error.msg))
+        elif error.status_code == 400:
+            suggestion.resolve(SnackSuggestion.REJECTED, str(error.msg))
+        else:
+            suggestion.retry(str(error.msg), self.max_attempts, self.backoff)
+            if suggestion.status == SnackSuggestion.PENDING:
+                return 'retry'
+
+        return suggestion.status
+
+    def find_snack(self, name):
+        """
+        Return the optional snack in the source's catalog with the given name (which
+        is compared case-insensitively), or None if there isn't one, or the catalog
+        can't be fetched.
+        """
+        try:
+            snacks = self.source.list()
+        except SnackSourceException:
+            return None
+
+        name = name.casefold()
+        for snack in snacks:
+            if snack.optional and snack.name.casefold() == name:
+                return snack
+
+        return None
@@ -0,0 +1,97 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .CacheCounter import CacheCounter
+
+
+class TallyChannel(object):
+    """
+    A log of vote tally changes, shared by every process through the cache.
+    Each change is stored under its own sequence number, and a counter holds
+    the latest sequence number, so readers can tell which changes they haven't
+    seen yet with one cache read.
+
+    Changes expire after TTL seconds; readers that fall further behind than that
+    miss them. Since each change carries a snack's new total, rather than the
+    difference, a missed change is corrected by the next one for the same snack.
+
+    Totals are read after the transactions that change them commit, so two of them
+    may be published out of order. Each carries its VoteTally's version, and readers
+    ignore a total older than one they've already seen for the same snack.
+
+    The cache must be shared between processes (e.g. memcached, or the database
+    cache) for changes to reach clients connected to other processes.
+    """
+    SEQUENCE_KEY = "vote_tally_sequence"
+    FIRST_SEQUENCE_KEY = "vote_tally_first_sequence"
+    EVENT_KEY_TMPL = "vote_tally_event_{seq}"
+    TTL = 60 * 5
+
+    def __init__(self, cache_alias=None):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias or settings.VOTE_STREAM_CACHE_ALIAS]
+
+    def get_event_key(self, seq):
+        return self.EVENT_KEY_TMPL.format(seq=seq)
+
+    def publish(self, period, snack_id, total, version=0):
+        """
+        Record that snack_id now has 'total' votes during the period, as of its tally's
+        'version', and return the change's sequence number, or None if the cache
+        can't hold the log.
+        """
+        counter = CacheCounter(self.cache, self.SEQUENCE_KEY)
+        start = counter.start()
+        if start is not None:
+            self.cache.set(self.FIRST_SEQUENCE_KEY, start + 1, None)
+
+        seq = counter.incr()
+        if seq is None:
+            return None
+
+        event = {
+            'period': period, 'snack_id': snack_id, 'total_votes': total, 'version': version
+        }
+        self.cache.set(self.get_event_key(seq), event, self.TTL)
+        return seq
+
+    def publish_tally(self, period, snack_id):
+        """
+        Publish snack_id's current VoteTally total for the period.
+        """
+        from snacksdb.models import VoteTally
+
+        tallies = VoteTally.objects.filter(period=period, snack_id=snack_id)
+        total, version = tallies.values_list('total', 'version').first() or (0, 0)
+        return self.publish(period, snack_id, total, version)
+
+    def get_sequence(self):
+        """
+        Return the sequence number of the latest change, or None if there isn't one.
+        """
+        return self.cache.get(self.SEQUENCE_KEY)
+
+    def get_first_sequence(self):
+        """
+        Return the sequence number of the first change since the counter was started,
+        or None if it isn't known. Numbers below it were never handed out.
+        """
+        return self.cache.get(self.FIRST_SEQUENCE_KEY)
+
+    def read(self, first, last):
+        """
+        Return a dictionary of {seq: event, ...} for the changes numbered first
+        through last that are still in the cache.
+        """
+        keys = {self.get_event_key(seq): seq for seq in range(first, last + 1)}
+        return {keys[key]: event for key, event in self.cache.get_many(list(keys)).items()}
+
+
+tally_channel = TallyChannel()
@@ -0,0 +1,169 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import collections
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from .TallyChannel import tally_channel
+
+
+logger = logging.getLogger(__name__)
+
+
+class TallyHub(object):
+    """
+    Fans vote tally changes out to the clients connected to this process. One
+    thread polls the TallyChannel, however many clients are listening, and keeps
+    the latest BACKLOG changes in memory; clients wait on a condition variable
+    for changes newer than the last one they've seen. Changes that were published
+    out of order, and carry an older version of a snack's total than one the hub
+    has already passed on, are dropped.
+
+    A listening client holds no database connection and does no polling of its
+    own, so under an async worker (e.g. gevent) an idle client costs little
+    more than its socket.
+    """
+    BACKLOG = 1000
+
+    def __init__(self, channel=None, poll_interval=None):
+        self.channel = channel or tally_channel
+        self.poll_interval = poll_interval
+        self.events = collections.deque(maxlen=self.BACKLOG)
+        self.last_seq = None
+        self.missing = set()
+        self.versions = {}
+        self.condition = threading.Condition()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """
+        Start polling the channel, if we aren't already.
+        """
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                # Poll once up front, so the first listeners have a starting point.
+                self.poll()
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.poll_interval or settings.VOTE_STREAM_POLL_INTERVAL)
+            try:
+                self.poll()
+            except Exception:
+                logger.warning('Polling the vote tally channel failed.', exc_info=True)
+
+    def poll(self):
+        """
+        Read changes published since the last poll and wake up any waiting clients.
+        """
+        seq = self.channel.get_sequence()
+
+        if self.last_seq is None:
+            # First poll. Nothing to catch up on; clients only want changes from here on.
+            with self.condition:
+                self.last_seq = seq or 0
+            return
+
+        if seq is None or seq <= self.last_seq:
+            return
+
+        first = max(
+            self.last_seq + 1, seq - self.BACKLOG + 1, self.channel.get_first_sequence() or 0
+        )
+        found = self.channel.read(first, seq)
+
+        # A change whose number was handed out, but which isn't in the cache yet, may
+        # still be being written. Give it until the next poll before skipping it.
+        missing = {n for n in range(first, seq + 1) if n not in found}
+        late = missing - self.missing
+        last_seq = min(late) - 1 if late else seq
+        self.missing = {n for n in missing if n > last_seq}
+
+        new_events = [
+            (n, found[n]) for n in range(first, last_seq + 1)
+            if n in found and self.is_newer(found[n])
+        ]
+
+        with self.condition:
+            self.events.extend(new_events)
+            self.last_seq = last_seq
+            self.condition.notify_all()
+
+    def is_newer(self, event):
+        """
+        Return whether the event's total is newer than any the hub has passed on for its
+        snack, and if so, remember its version.
+        """
+        key = (event['period'], event['snack_id'])
+        version = event.get('version', 0)
+
+        if version and version <= self.versions.get(key, 0):
+            return False
+
+        self.versions[key] = version
+        return True
+
+    def get_events_after(self, after):
+        """
+        Return a list of (seq, event) pairs for the buffered changes newer than 'after'.
+        """
+        events = []
+        for seq, event in reversed(self.events):
+            if seq <= after:
+                break
+            events.append((seq, event))
+
+        events.reverse()
+        return events
+
+    def listen(self, after=None, timeout=None):
+        """
+        Wait up to 'timeout' seconds for changes newer than sequence number 'after'
+        (by default, the latest one this process has seen). Return a 2-tuple of
+        (cursor, events), where events is a list of (seq, event) pairs and cursor
+        is the sequence number to pass as 'after' next time.
+        """
+        self.start()
+
+        with self.condition:
+            if after is None:
+                after = self.last_seq
+
+            events = self.get_events_after(after)
+            if not events:
+                self.condition.wait(timeout)
+                events = self.get_events_after(after)
+
+            cursor = events[-1][0] if events else max(after, self.last_seq)
+
+        return cursor, events
+
+
+_hub = None
+_hub_pid = None
+_hub_lock = threading.Lock()
+
+
+def get_tally_hub():
+    """
+    Return this process's TallyHub, creating it (again, after a fork) if need be.
+    """
+    global _hub, _hub_pid
+
+    pid = os.getpid()
+    if _hub is None or _hub_pid != pid:
+        with _hub_lock:
+            if _hub is None or _hub_pid != pid:
+                _hub = TallyHub()
+                _hub_pid = pid
+
+    return _hub
@@ -0,0 +1,197 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import datetime
+import itertools
+
+import numpy as np
+
+from django.utils import timezone
+
+
+class VoteAnalytics(object):
+    """
+    Computes trend reports over many months of Ballots and Nominations, for the
+    'vote_report' management command.
+
+    Rows are streamed out of the database with values_list(), chunk_size rows at a
+    time, straight into NumPy arrays (one column per field), and every report is a
+    vectorized group-by over those arrays: there's no Python loop over Ballots.
+    Each report returns a (header, rows) tuple, where rows is a list of tuples of
+    plain Python values, ready for CSV or JSON.
+
+    'since' and 'until' are YYYYMM periods that limit the months considered; either
+    may be None.
+    """
+    DEFAULT_CHUNK_SIZE = 10000
+
+    # Group-by keys pack a period and a snack ID into one int64.
+    KEY_SHIFT = 32
+
+    def __init__(self, since=None, until=None, chunk_size=None):
+        self.since = since
+        self.until = until
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+
+    def filter_periods(self, queryset):
+        if self.since is not None:
+            queryset = queryset.filter(period__gte=self.since)
+        if self.until is not None:
+            queryset = queryset.filter(period__lte=self.until)
+        return queryset
+
+    def load_columns(self, queryset, *fields):
+        """
+        Return the given integer fields of every row in the queryset as a tuple of
+        int64 arrays, one per field, streaming the rows rather than caching them.
+        """
+        rows = queryset.values_list(*fields).iterator(chunk_size=self.chunk_size)
+        flat = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64)
+        columns = flat.reshape(-1, len(fields))
+        return tuple(columns[:, i] for i in range(len(fields)))
+
+    def load_ballots(self):
+        """
+        Return (periods, snack_ids) for every Ballot in range.
+        """
+        from snacksdb.models import Ballot
+
+        ballots = self.filter_periods(Ballot.objects.order_by())
+        return self.load_columns(ballots, 'period', 'snack_id')
+
+    def load_nominations(self):
+        """
+        Return (periods, snack_ids, dates) for every Nomination in range, where dates
+        are the local days the nominations were made, as datetime64[D]. Pending
+        nominations are left out.
+        """
+        from snacksdb.models import Nomination
+        from snacksdb.utils import get_tzinfo
+
+        nominations = self.filter_periods(
+            Nomination.objects.filter(snack_id__isnull=False).order_by()
+        )
+        rows = nominations.values_list('period', 'snack_id', 'created')
+        columns = list(zip(*rows.iterator(chunk_size=self.chunk_size))) or [(), (), ()]
+        periods, snack_ids, created = columns
+
+        # Days are computed in local time, like periods; there are far fewer
+        # Nominations than Ballots, so converting them one by one is cheap.
+        tzinfo = get_tzinfo()
+        dates = [timezone.localtime(when, tzinfo).date() for when in created]
+
+        return (
+            np.array(periods, dtype=np.int64),
+            np.array(snack_ids, dtype=np.int64),
+            np.array(dates, dtype='datetime64[D]'),
+        )
+
+    def pack(self, periods, snack_ids):
+        return (periods << self.KEY_SHIFT) | snack_ids
+
+    def unpack(self, keys):
+        return keys >> self.KEY_SHIFT, keys & ((1 << self.KEY_SHIFT) - 1)
+
+    def count_votes(self, periods=None, snack_ids=None):
+        """
+        Return (periods, snack_ids, votes) arrays holding the number of votes each
+        snack received each month, sorted by period, then snack ID. Ballots are
+        loaded if they aren't given.
+        """
+        if periods is None:
+            periods, snack_ids = self.load_ballots()
+
+        keys, votes = np.unique(self.pack(periods, snack_ids), return_counts=True)
+        periods, snack_ids = self.unpack(keys)
+        return periods, snack_ids, votes
+
+    def votes_by_month(self):
+        """
+        Report the number of votes each snack received each month.
+        """
+        periods, snack_ids, votes = self.count_votes()
+        header = ['period', 'snack_id', 'votes']
+        return header, list(zip(periods.tolist(), snack_ids.tolist(), votes.tolist()))
+
+    def win_rates(self):
+        """
+        Report how often each snack won the months it was up for: a snack is up for
+        a month if it was nominated or voted for then, and wins the months in which
+        no snack received more votes (so ties share the win).
+        """
+        periods, snack_ids, votes = self.count_votes()
+
+        # The most votes any snack received each month, broadcast back to each snack.
+        # count_votes sorts by period, so each month's snacks are contiguous.
+        is_first = np.ones(len(periods), dtype=bool)
+        is_first[1:] = periods[1:] != periods[:-1]
+        starts = np.flatnonzero(is_first)
+        most_votes = np.maximum.reduceat(votes, starts) if len(starts) else votes
+        won = votes == np.repeat(most_votes, np.diff(np.append(starts, len(periods))))
+
+        # Snacks that were nominated but received no votes were up for the month, too.
+        nominated_periods, nominated_ids, _ = self.load_nominations()
+        up_for = np.union1d(
+            self.pack(periods, snack_ids), self.pack(nominated_periods, nominated_ids)
+        )
+
+        snacks, months = np.unique(self.unpack(up_for)[1], return_counts=True)
+        winners, wins = np.unique(snack_ids[won], return_counts=True)
+
+        snack_wins = np.zeros(len(snacks), dtype=np.int64)
+        snack_wins[np.searchsorted(snacks, winners)] = wins
+
+        header = ['snack_id', 'months', 'wins', 'win_rate']
+        rates = np.round(snack_wins / np.maximum(months, 1), 4)
+        return header, list(zip(
+            snacks.tolist(), months.tolist(), snack_wins.tolist(), rates.tolist()
+        ))
+
+    def time_to_purchase(self, catalog):
+        """
+        Report how many days passed between each snack's first nomination and its
+        purchase, given the snack catalog (a list of SnackRecords). The catalog only
+        records each snack's last purchase, so days_to_purchase is empty for snacks
+        that haven't been purchased since they were first nominated.
+        """
+        _, snack_ids, dates = self.load_nominations()
+
+        # First nomination of each snack: sort by snack, then date, and take the
+        # first of each snack's run.
+        order = np.lexsort((dates, snack_ids))
+        snack_ids, dates = snack_ids[order], dates[order]
+        is_first = np.ones(len(snack_ids), dtype=bool)
+        is_first[1:] = snack_ids[1:] != snack_ids[:-1]
+        snack_ids, first_nominated = snack_ids[is_first], dates[is_first]
+
+        purchase_dates = {
+            snack.id: self.parse_purchase_date(snack.last_purchase_date) for snack in catalog
+        }
+        last_purchased = np.array(
+            [purchase_dates.get(snack_id) for snack_id in snack_ids.tolist()],
+            dtype='datetime64[D]'
+        )
+
+        purchased = ~np.isnat(last_purchased) & (last_purchased >= first_nominated)
+        days = np.where(purchased, last_purchased - first_nominated, np.timedelta64(0, 'D'))
+        days = days.astype(np.int64)
+
+        header = ['snack_id', 'first_nominated', 'last_purchased', 'days_to_purchase']
+        return header, [
+            (snack_id, nominated, purchase, days if was_purchased else None)
+            for snack_id, nominated, purchase, days, was_purchased in zip(
+                snack_ids.tolist(), first_nominated.tolist(), last_purchased.tolist(),
+                days.tolist(), purchased.tolist()
+            )
+        ]
+
+    @staticmethod
+    def parse_purchase_date(value):
+        """
+        Return the given 'lastPurchaseDate' (e.g. 5/24/2018) as a date, or None.
+        """
+        try:
+            return datetime.datetime.strptime(value, '%m/%d/%Y').date()
+        except (TypeError, ValueError):
+            return None
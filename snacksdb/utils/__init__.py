@@ -2,38 +2,194 @@
 
 __author__ = 'zach.mott@gmail.com'
 
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytz
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.utils import timezone
 from django.utils.module_loading import import_string
 from django.utils.translation import ugettext_lazy as _
 
+# snacksdb.models imports this package, and this package's modules use the helpers
+# defined below. To avoid circular imports, modules here import snacksdb.models and
+# snacksdb.utils inside the functions that use them, never at the top level.
 from .AbstractSnackSource import AbstractSnackSource, SnackSourceException
+from .BallotBuffer import BallotBuffer, ballot_buffer
+from .BoardSnack import BoardSnack
+from .BoardVersion import BoardVersion, board_version
+from .CacheCounter import CacheCounter
+from .CachingSnackSource import CachingSnackSource
+from .CatalogMirror import CatalogMirror
+from .LocalSnackSource import LocalSnackSource
+from .MirrorSnackSource import MirrorSnackSource
+from .NominatedSnacks import NominatedSnacks, nominated_snacks
+from .QuotaLedger import QuotaLedger, nomination_ledger, vote_ledger
+from .RequestTimer import (
+    RequestTimer, deactivate_request_timer, get_request_timer, time_phase
+)
 from .SnackAPISource import SnackAPISource
+from .SnackCatalogDecoder import SnackCatalogDecoder
+from .SnackRecord import SnackRecord
+from .SuggestionOutbox import SuggestionOutbox
+from .TallyChannel import TallyChannel, tally_channel
+from .TallyHub import TallyHub, get_tally_hub
+
+
+logger = logging.getLogger(__name__)
+
+_snack_source = None
+_snack_source_path = None
+_snack_source_lock = threading.Lock()
+
+
+def get_snack_source(source_class_path=None):
+    """
+    Return this process's instance of settings.SNACK_SOURCE_CLASS, validating the
+    setting and creating the instance the first time it's needed. Snack sources
+    must therefore be safe to share between threads.
+
+    If source_class_path is given, validate and instantiate that class instead;
+    the new instance isn't shared.
+    """
+    global _snack_source, _snack_source_path
+
+    if source_class_path is not None:
+        return get_snack_source_class(source_class_path)()
+
+    # Compare paths so that a changed setting (e.g. in tests) takes effect at once.
+    path = getattr(settings, 'SNACK_SOURCE_CLASS', None)
+    if _snack_source is None or _snack_source_path != path:
+        with _snack_source_lock:
+            if _snack_source is None or _snack_source_path != path:
+                _snack_source = get_snack_source_class(path)()
+                _snack_source_path = path
+
+    return _snack_source
 
 
-def get_snack_source():
+def reset_snack_source():
     """
-    Validate settings.SNACK_SOURCE_CLASS and, if valid, return an instance thereof.
+    Discard this process's snack source, so that the next call to get_snack_source()
+    creates a new one. Call this after changing settings the source reads when it's
+    created (e.g. SNACK_BACKEND_API_KEY).
     """
+    global _snack_source, _snack_source_path
+
+    with _snack_source_lock:
+        _snack_source = _snack_source_path = None
+
+
+def warm_up_snack_source():
+    """
+    If settings.SNACK_SOURCE_WARM_UP is set, prepare this process's snack source to
+    serve requests (see AbstractSnackSource.warm_up), so that the first requests a
+    new worker handles don't pay for a cold catalog or new upstream connections.
+    Failures are logged, not raised: a worker that can't warm up still starts.
+    """
+    if not getattr(settings, 'SNACK_SOURCE_WARM_UP', False):
+        return
+
     try:
-        source_class = import_string(settings.SNACK_SOURCE_CLASS)
+        get_snack_source().warm_up()
+    except SnackSourceException as sse:
+        logger.warning("Couldn't warm up the snack source: %s", sse.msg)
+    finally:
+        # Don't hand a connection opened before the first request to a request thread.
+        connections.close_all()
+
+
+def get_snack_source_class(source_class_path=None):
+    """
+    Validate settings.SNACK_SOURCE_CLASS (or source_class_path, if given) and,
+    if valid, return the class it refers to.
+    """
+    try:
+        source_class_path = source_class_path or settings.SNACK_SOURCE_CLASS
+        source_class = import_string(source_class_path)
     except AttributeError:
         msg = _('settings.SNACK_SOURCE_CLASS must be declared and contain the dotted '
                 'path to a class which implements snacksdb.utils.AbstractSnackSource.')
         raise ImproperlyConfigured(msg)
     except ModuleNotFoundError:
         msg = _("Couldn't load settings.SNACK_SOURCE_CLASS. You gave {path}. Check the PYTHONPATH?")
-        raise ImproperlyConfigured(msg.format(path=settings.SNACK_SOURCE_CLASS))
+        raise ImproperlyConfigured(msg.format(path=source_class_path))
 
     if not issubclass(source_class, AbstractSnackSource):
         msg = _('settings.SNACK_SOURCE_CLASS must refer '
                 'to a subclass of AbstractSnackSource.')
         raise ImproperlyConfigured(msg)
 
-    return source_class()
+    return source_class
 
 
 def get_tzinfo(tz_name=None):
     return pytz.timezone(tz_name or settings.TIME_ZONE)
+
+
+def get_period(when=None):
+    """
+    Return the YYYYMM period (e.g. 201805) that contains the given datetime,
+    or the current time if none is given, in the configured local time zone.
+    """
+    when = timezone.localtime(when or timezone.now(), get_tzinfo())
+    return when.year * 100 + when.month
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def run_in_background(fn, *pos, **kw):
+    """
+    Call fn(*pos, **kw) in this process's pool of background threads, and return a
+    concurrent.futures.Future for the result. The pool has
+    settings.SNACK_SOURCE_FETCH_THREADS threads, and is recreated after a fork.
+    """
+    global _executor, _executor_pid
+
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(max_workers=settings.SNACK_SOURCE_FETCH_THREADS)
+                _executor_pid = pid
+
+    # Let phases timed in the background count towards the request's timer.
+    timer = get_request_timer()
+    if timer is not None:
+        fn = timer.bind(fn)
+
+    return _executor.submit(fn, *pos, **kw)
+
+
+def start_fetching_snacks():
+    """
+    Start fetching the snack catalog in the background, if settings.SNACK_SOURCE_CONCURRENT_FETCH
+    is set and the snack source allows it, and return a Future for it. Otherwise, return None.
+    """
+    source = get_snack_source()
+
+    if settings.SNACK_SOURCE_CONCURRENT_FETCH and source.fetch_concurrently:
+        return run_in_background(source.list)
+
+    return None
+
+
+def finish_fetching_snacks(pending_snacks=None):
+    """
+    Return the snack catalog: the result of 'pending_snacks', a Future from
+    start_fetching_snacks, if it's given, or else a fresh fetch. Raise
+    SnackSourceException if the snack source fails.
+    """
+    with time_phase('catalog'):
+        if pending_snacks is not None:
+            return pending_snacks.result()
+
+        return get_snack_source().list()
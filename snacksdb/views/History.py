@@ -0,0 +1,27 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.utils.decorators import method_decorator
+from django.views import generic
+
+from snacksdb.models import MonthSummary
+
+
+@method_decorator(login_required, name='dispatch')
+class History(generic.ListView):
+    """
+    View for browsing the results of past months, newest first. It reads only the
+    summaries that the 'close_month' management command writes, so a page costs
+    the same two queries however many Ballots the months it shows received.
+    """
+    template_name = 'snacksdb/history.html'
+    context_object_name = 'months'
+
+    def get_paginate_by(self, queryset):
+        return settings.RESULTS_HISTORY_PAGE_SIZE
+
+    def get_queryset(self):
+        return MonthSummary.objects.order_by('-period').prefetch_related('snacks')
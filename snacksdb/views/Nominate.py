@@ -2,6 +2,7 @@
 
 __author__ = 'zach.mott@gmail.com'
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
@@ -10,8 +11,11 @@ from django.utils.translation import ugettext_lazy as _
 from django.views.generic import FormView
 
 from snacksdb import forms
-from snacksdb.models import Nomination
-from snacksdb.utils import get_snack_source, SnackSourceException
+from snacksdb.models import Nomination, SnackSuggestion
+from snacksdb.utils import (
+    finish_fetching_snacks, get_snack_source, nominated_snacks, nomination_ledger,
+    SnackSourceException, start_fetching_snacks
+)
 
 
 @method_decorator(login_required, name='dispatch')
@@ -28,7 +32,7 @@ class Nominate(FormView):
     def dispatch(self, request, *pos, **kw):
         # Check to see if the user is allowed to place a nomination before rendering
         # the page. If they're not, send them back to the Vote view.
-        if Nomination.remaining_in_month(request.user) < 1:
+        if nomination_ledger.remaining(request.user) < 1:
             msg = _("Sorry, you don't have any nominations left. Try again next month!")
             messages.warning(request, msg)
             return redirect('snacksdb:vote')
@@ -47,7 +51,7 @@ class Nominate(FormView):
     def get_context_data(self, **kw):
         context = super().get_context_data(**kw)
 
-        context['nominations_remaining'] = Nomination.remaining_in_month(self.request.user)
+        context['nominations_remaining'] = nomination_ledger.remaining(self.request.user)
         context['unnominated_snacks'] = self.get_unnominated_snacks()
         context['delimiter'] = self.DELIMITER
 
@@ -57,35 +61,57 @@ class Nominate(FormView):
         """
         Return a list of all the snacks that have not yet been nominated this month.
         """
+        pending_snacks = start_fetching_snacks()
+
+        # Read this month's nominations (usually cached) while the snack source works.
+        nominated_snack_ids = nominated_snacks.get()
+
         try:
-            optional_snacks = [s for s in get_snack_source().list() if s['optional']]
+            snack_list = finish_fetching_snacks(pending_snacks)
         except SnackSourceException as sse:
             messages.error(self.request, sse.msg)
             return []
 
-        this_month = Nomination.objects.this_month()
-        nominated_snacks = this_month.values_list('snack_id', flat=True).distinct()
-
-        return [s for s in optional_snacks if s['id'] not in nominated_snacks]
+        return [s for s in snack_list if s.optional and s.id not in nominated_snack_ids]
 
     def form_valid(self, form):
         """
-        Local validation was successful. Submit the snack nomination to the Source.
+        Local validation was successful. Submit the snack nomination to the Source,
+        or with settings.SNACK_SUGGESTION_OUTBOX, queue it to be submitted later.
         """
+        if settings.SNACK_SUGGESTION_OUTBOX:
+            return self.queue_nomination(form.cleaned_data)
+
         try:
-            snack_info = get_snack_source().suggest(**form.cleaned_data)
+            snack = get_snack_source().suggest(**form.cleaned_data)
         except SnackSourceException as sse:
             messages.error(self.request, sse.msg)
             return self.form_invalid(form)  # Preserve the user's input.
 
-        return self.finalize_nomination(snack_info['id'], snack_info['name'])
+        return self.finalize_nomination(snack.id, snack.name)
+
+    def queue_nomination(self, suggestion):
+        """
+        Record a pending Nomination, queue the suggestion behind it, and
+        redirect the user back to the voting page.
+        """
+        SnackSuggestion.enqueue(self.request.user, **suggestion)
+
+        msg = _("Thanks for nominating {snack_name}! It'll be up for votes as soon as "
+                "we've added it to the snack list.")
+        messages.success(self.request, msg.format(snack_name=suggestion['name']))
+
+        return redirect('snacksdb:vote')
 
     def finalize_nomination(self, snack_id, snack_name):
         """
         Create a Nomination instance and redirect the user back to the voting page.
         """
-        # Record the nomination locally.
-        Nomination.objects.create(snack_id=snack_id, user=self.request.user)
+        # Record the nomination locally, unless someone beat the user to it.
+        if Nomination.nominate(self.request.user, snack_id) is None:
+            msg = _("Someone already nominated {snack_name} this month. Vote for it instead!")
+            messages.warning(self.request, msg.format(snack_name=snack_name))
+            return redirect('snacksdb:vote')
 
         msg = _("Thanks for nominating {snack_name}! Great suggestion!")
         messages.success(self.request, msg.format(snack_name=snack_name))
@@ -2,20 +2,28 @@
 
 __author__ = 'zach.mott@gmail.com'
 
-from operator import itemgetter
+from operator import attrgetter
 
-from django.db.models import Count
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import caches
 from django.http import HttpResponseBadRequest, HttpResponseForbidden
+from django.middleware.csrf import get_token
 from django.shortcuts import redirect
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils.decorators import method_decorator
-from django.utils.translation import ugettext_lazy as _
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language, ugettext_lazy as _
 from django.views import generic
 
-from snacksdb.models import Ballot, Nomination
-from snacksdb.utils import get_snack_source, SnackSourceException
+from snacksdb.models import Ballot, VoteTally
+from snacksdb.utils import (
+    ballot_buffer, BoardSnack, board_version, finish_fetching_snacks, get_period,
+    get_snack_source, nominated_snacks, nomination_ledger, SnackSourceException,
+    start_fetching_snacks, vote_ledger
+)
 
 
 @method_decorator(login_required, name='dispatch')
@@ -25,12 +33,26 @@ class Vote(generic.TemplateView):
     """
     template_name = 'snacksdb/vote.html'
 
+    # The parts of the page that are the same for every user. See get_board_fragments.
+    fragment_templates = {
+        'mandatory_html': 'snacksdb/partials/mandatory_snacks.html',
+        'optional_html': 'snacksdb/partials/optional_snacks.html',
+    }
+    FRAGMENT_KEY_TMPL = "vote_board_fragments_{period}_{version}_{catalog_version}_{language}"
+
+    # Stands in for the user's CSRF token in cached fragments.
+    CSRF_PLACEHOLDER = 'VOTEBOARDCSRFTOKEN'
+
+    # Whether the snack source failed while building the board, which mustn't be cached.
+    snack_source_failed = False
+
+    # Prefix of the fields that carry the number of votes for each snack, when several
+    # votes are submitted at once, e.g. 'votes-1001=2'.
+    CHOICE_PREFIX = 'votes-'
+
     def post(self, request, *pos, **kw):
-        # The UI should disallow users from placing more than their alloted
-        # votes each month, but here we enforce that restriction server-side.
-        if (settings.VOTES_PER_MONTH -
-                    Ballot.objects.this_month().filter(user=request.user).count() < 1):
-            return HttpResponseForbidden(_("Nice try! You're out of votes for the month!"))
+        if any(key.startswith(self.CHOICE_PREFIX) for key in request.POST):
+            return self.post_choices(request)
 
         # 'snack_id' and 'snack_name' are both required when submitting a vote.
         if 'snack_id' not in request.POST:
@@ -38,7 +60,8 @@ class Vote(generic.TemplateView):
         if 'snack_name' not in request.POST:
             return HttpResponseBadRequest(_('POST data must contain "snack_name".'))
 
-        Ballot.objects.create(snack_id=request.POST['snack_id'], user=request.user)
+        if not self.cast_vote(request.POST['snack_id']):
+            return HttpResponseForbidden(_("Nice try! You're out of votes for the month!"))
 
         messages.success(request, _("Got it! You voted for {snack_name}.").format(
             snack_name=request.POST['snack_name']
@@ -46,43 +69,223 @@ class Vote(generic.TemplateView):
 
         return redirect('snacksdb:vote')
 
+    def post_choices(self, request):
+        """
+        Cast several votes at once, from 'votes-<snack_id>' fields.
+        """
+        choices = [
+            (key[len(self.CHOICE_PREFIX):], value) for key, value in request.POST.items()
+            if key.startswith(self.CHOICE_PREFIX) and value
+        ]
+
+        try:
+            choices = self.clean_choices(choices)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+
+        if not self.cast_votes(choices):
+            return HttpResponseForbidden(_("Nice try! You don't have that many votes left!"))
+
+        messages.success(request, _("Got it! You cast {votes} vote(s).").format(
+            votes=sum(choices.values())
+        ))
+
+        return redirect('snacksdb:vote')
+
+    def clean_choices(self, choices):
+        """
+        Validate a list of (snack_id, count) pairs, and return a dictionary of
+        {snack_id: count, ...} for the snacks that get at least one vote. Raise
+        ValueError, with a message for the user, if the list isn't valid.
+        """
+        cleaned = {}
+
+        for snack_id, count in choices:
+            try:
+                snack_id, count = int(snack_id), int(count)
+            except (TypeError, ValueError):
+                raise ValueError(_('Snack IDs and vote counts must be integers.'))
+
+            if count < 0:
+                raise ValueError(_("Vote counts can't be negative."))
+            if count:
+                cleaned[snack_id] = cleaned.get(snack_id, 0) + count
+
+        if not cleaned:
+            raise ValueError(_('Vote for at least one snack.'))
+
+        return cleaned
+
+    def cast_votes(self, choices):
+        """
+        Cast the user's votes for several snacks, given as {snack_id: count, ...}, at
+        once. Return False, casting none of them, if they don't have that many left.
+        """
+        if vote_ledger.remaining(self.request.user) < sum(choices.values()):
+            return False
+
+        return Ballot.cast_many(self.request.user, choices) is not None
+
+    def cast_vote(self, snack_id):
+        """
+        Cast one of the user's votes for the given snack. Return False if they're out of votes.
+        """
+        # The UI should disallow users from placing more than their alloted
+        # votes each month, but here we enforce that restriction server-side.
+        # The ledger turns away users who are obviously out of votes without
+        # touching the database; Ballot.cast has the final word.
+        if vote_ledger.remaining(self.request.user) < 1:
+            return False
+
+        return Ballot.cast(self.request.user, snack_id) is not None
+
     def get_context_data(self, **kw):
         context = super().get_context_data(**kw)
 
-        user_votes = Ballot.objects.this_month().filter(user=self.request.user)
+        if settings.VOTE_STREAM_ENABLED:
+            context['tally_stream_url'] = reverse('snacksdb:api-tally-stream')
 
-        mandatory_snacks, optional_snacks = self.fetch_snacks()
-        optional_snacks = self.postprocess_optional_snacks(optional_snacks, user_votes)
-
-        context['mandatory_snacks'] = mandatory_snacks
-        context['optional_snacks'] = optional_snacks
-        context['votes_remaining'] = max(0, settings.VOTES_PER_MONTH - user_votes.count())
-        context['nominations_remaining'] = Nomination.remaining_in_month(self.request.user)
+        context.update(self.get_board_fragments(context))
+        context['votes_remaining'] = vote_ledger.remaining(self.request.user)
+        context['nominations_remaining'] = nomination_ledger.remaining(self.request.user)
 
         return context
 
-    def fetch_snacks(self):
+    def get_board_fragments(self, context=None):
+        """
+        Return a dictionary holding the vote board rendered as HTML fragments (see
+        fragment_templates), and 'optional_count', the number of optional snacks.
+
+        The fragments are the same for every user, so they're cached per period,
+        board version and catalog version, and a page view that finds them in the
+        cache skips building the board altogether. Only the user's CSRF token is
+        filled in per request. When the board is built, the dictionary also holds it.
+        """
+        cache = caches[settings.VOTE_BOARD_CACHE_ALIAS]
+        cache_key = self.get_fragment_cache_key()
+        fragments = cache.get(cache_key) if cache_key else None
+
+        if fragments is None:
+            board = self.get_board()
+            fragments = self.render_board_fragments(board, context)
+
+            if cache_key and not self.snack_source_failed:
+                cache.set(cache_key, fragments, settings.VOTE_BOARD_CACHE_TTL)
+
+            fragments = dict(fragments, **board)
+
+        # Fill in the user's CSRF token, which is letters and digits only.
+        csrf_token = get_token(self.request)
+        for name in self.fragment_templates:
+            fragments[name] = mark_safe(fragments[name].replace(self.CSRF_PLACEHOLDER, csrf_token))
+
+        return fragments
+
+    def get_fragment_cache_key(self):
+        """
+        Return the cache key for the current board's fragments, or None if the board
+        or the snack catalog can't be versioned, in which case they aren't cached.
+        """
+        period = get_period()
+        version = board_version.get(period)
+        catalog_version = get_snack_source().get_version()
+
+        if version is None or catalog_version is None:
+            return None
+
+        return self.FRAGMENT_KEY_TMPL.format(
+            period=period, version=version, catalog_version=catalog_version,
+            language=get_language()
+        )
+
+    def render_board_fragments(self, board, context=None):
+        """
+        Render the board, as returned by get_board, into fragments that any user may be
+        shown. Values from 'context' that the fragments use must not depend on the user.
+        """
+        fragment_context = dict(context or {}, csrf_token=self.CSRF_PLACEHOLDER, **board)
+        fragments = {
+            name: render_to_string(template_name, fragment_context)
+            for name, template_name in self.fragment_templates.items()
+        }
+        fragments['optional_count'] = len(board['optional_snacks'])
+
+        return fragments
+
+    def get_board(self):
+        """
+        Return a dictionary holding this month's mandatory snacks and the
+        optional snacks that can be voted for, with their vote totals.
+        """
+        pending_snacks = self.start_fetching_snacks()
+
+        # Query the database while the snack source does its work.
+        user_votes = self.get_user_votes()
+        votes_by_snack = self.count_votes_by_snack()
+        nominated_snack_ids = self.get_nominated_snack_ids()
+
+        mandatory_snacks, optional_snacks = self.fetch_snacks(pending_snacks)
+        optional_snacks = self.postprocess_optional_snacks(
+            optional_snacks, user_votes, votes_by_snack, nominated_snack_ids
+        )
+
+        return {'mandatory_snacks': mandatory_snacks, 'optional_snacks': optional_snacks}
+
+    def get_user_votes(self):
+        """
+        Return the user's Ballots for this month, including any that are still buffered.
+        """
+        user_votes = list(Ballot.objects.this_month().filter(user=self.request.user))
+
+        if settings.VOTE_BUFFER_ENABLED:
+            user_votes += ballot_buffer.pending_ballots(self.request.user)
+
+        return user_votes
+
+    def report_error(self, msg):
+        """
+        Let the user know that something went wrong.
+        """
+        messages.error(self.request, msg)
+
+    def start_fetching_snacks(self):
+        """
+        Start fetching the snack list in the background, if the snack source allows
+        it, and return a Future for it. Otherwise, return None. See
+        snacksdb.utils.start_fetching_snacks.
+        """
+        return start_fetching_snacks()
+
+    def fetch_snacks(self, pending_snacks=None):
         """
         Return a 2-tuple of snack lists: (mandatory_snacks, optional_snacks)
-        as determined by the Snack source.
+        as determined by the Snack source. If 'pending_snacks' is given, it's
+        a Future from start_fetching_snacks, and the lists come from it.
         """
         try:
-            snack_list = get_snack_source().list()
+            snack_list = finish_fetching_snacks(pending_snacks)
         except SnackSourceException as sse:
-            messages.error(self.request, sse.msg)
+            self.snack_source_failed = True
+            self.report_error(sse.msg)
             return [], []
 
-        mandatory_snacks = [s for s in snack_list if not s['optional']]
-        optional_snacks = [s for s in snack_list if s['optional']]
+        mandatory_snacks = [s for s in snack_list if not s.optional]
+        optional_snacks = [s for s in snack_list if s.optional]
 
         return mandatory_snacks, optional_snacks
 
-    def postprocess_optional_snacks(self, optional_snacks, user_votes):
+    def postprocess_optional_snacks(self, optional_snacks, user_votes,
+                                    votes_by_snack=None, nominated_snack_ids=None):
         """
         Does three things:
         1) Filter out snacks that haven't been suggested yet this month.
         2) Annotate each snack with the total number of votes it's received this month.
         3) Indicate which snacks the user has voted for this month.
+
+        Annotated snacks are returned as BoardSnacks; the catalog's SnackRecords,
+        which may be shared with other requests, aren't modified.
+
+        'votes_by_snack' and 'nominated_snack_ids' are queried if they aren't given.
         """
         new_optional_snacks = []
 
@@ -90,32 +293,44 @@ class Vote(generic.TemplateView):
         voted_snack_ids = {v.snack_id for v in user_votes}
 
         # Count total votes for each snack ID.
-        votes_by_snack = self.count_votes_by_snack()
+        if votes_by_snack is None:
+            votes_by_snack = self.count_votes_by_snack()
 
-        for snack in self.filter_unnominated_snacks(optional_snacks):  # (1)
-            snack['total_votes'] = votes_by_snack.get(snack['id'], 0)  # (2)
-            snack['received_vote'] = snack['id'] in voted_snack_ids  # (3)
-            new_optional_snacks.append(snack)
+        for snack in self.filter_unnominated_snacks(optional_snacks, nominated_snack_ids):  # (1)
+            new_optional_snacks.append(BoardSnack(
+                snack,
+                total_votes=votes_by_snack.get(snack.id, 0),  # (2)
+                received_vote=snack.id in voted_snack_ids,  # (3)
+            ))
 
-        return sorted(new_optional_snacks, key=itemgetter('total_votes'), reverse=True)
+        return sorted(new_optional_snacks, key=attrgetter('total_votes'), reverse=True)
 
-    def filter_unnominated_snacks(self, snacks):
+    def filter_unnominated_snacks(self, snacks, nominated_snack_ids=None):
         """
         Filter out snacks that haven't been suggested yet this month.
         """
-        return [
-            s for s in snacks
-            if s['id'] in Nomination.objects.this_month().values_list('snack_id', flat=True)
-        ]
+        # Fetch this month's nominated snack IDs once, rather than once per snack.
+        if nominated_snack_ids is None:
+            nominated_snack_ids = self.get_nominated_snack_ids()
+
+        return [s for s in snacks if s.id in nominated_snack_ids]
+
+    def get_nominated_snack_ids(self):
+        """
+        Return the set of snack IDs that have been nominated this month.
+        """
+        return nominated_snacks.get()
 
     def count_votes_by_snack(self):
         """
-        Count the total number of votes for each snack
-        See the docs for more information about aggregation using QuerySets:
-        https://docs.djangoproject.com/en/2.0/topics/db/aggregation/
+        Return the total number of votes for each snack this month. Totals are
+        read from VoteTally, which is kept up to date as Ballots are cast, plus
+        the votes that are still buffered.
         """
-        votes_by_snack = Ballot.objects.this_month().values('snack_id')
-        return {
-            item['snack_id']: item['total']
-            for item in votes_by_snack.annotate(total=Count('snack_id'))
-        }
+        votes_by_snack = VoteTally.totals_for_period()
+
+        if settings.VOTE_BUFFER_ENABLED:
+            for snack_id, votes in ballot_buffer.pending_totals().items():
+                votes_by_snack[snack_id] = votes_by_snack.get(snack_id, 0) + votes
+
+        return votes_by_snack
@@ -2,5 +2,7 @@
 
 __author__ = 'zach.mott@gmail.com'
 
+from .History import History
 from .Nominate import Nominate
 from .Vote import Vote
+from . import api
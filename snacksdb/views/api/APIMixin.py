@@ -0,0 +1,26 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.http import JsonResponse
+from django.utils.translation import ugettext_lazy as _
+
+
+class APIMixin(object):
+    """
+    Adapts a snacksdb view for JSON clients: anonymous users get a 401 rather than
+    a redirect to the login page, and errors are collected for the response
+    rather than flashed with django.contrib.messages.
+    """
+    def dispatch(self, request, *pos, **kw):
+        if not request.user.is_authenticated:
+            return self.error_response(_('Authentication required.'), status=401)
+
+        self.errors = []
+        return super().dispatch(request, *pos, **kw)
+
+    def report_error(self, msg):
+        self.errors.append(str(msg))
+
+    def error_response(self, msg, status=400):
+        return JsonResponse({'error': str(msg)}, status=status)
@@ -0,0 +1,59 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import hashlib
+
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from snacksdb.utils import board_version, get_period, get_snack_source
+from snacksdb.views.Vote import Vote
+
+from .APIMixin import APIMixin
+
+
+def board_etag(request, *pos, **kw):
+    """
+    Return an ETag for the user's view of the current vote board, or None if the
+    board or the snack catalog can't be versioned without recomputing them.
+    """
+    if not request.user.is_authenticated:
+        return None
+
+    period = get_period()
+    version = board_version.get(period)
+    catalog_version = get_snack_source().get_version()
+
+    if version is None or catalog_version is None:
+        return None
+
+    # The board is annotated with the user's own votes, so each user gets their own ETag.
+    tag = "{period}:{version}:{catalog_version}:{user_pk}".format(
+        period=period, version=version, catalog_version=catalog_version, user_pk=request.user.pk
+    )
+    return hashlib.md5(tag.encode('utf-8')).hexdigest()
+
+
+class Board(APIMixin, Vote):
+    """
+    JSON view of this month's mandatory snacks and the optional snacks that can be
+    voted for, with their vote totals. Supports If-None-Match, so that clients
+    polling an unchanged board get a 304 without the board being recomputed.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    @method_decorator(condition(etag_func=board_etag))
+    def get(self, request, *pos, **kw):
+        board = self.get_board()
+
+        response = JsonResponse({
+            'period': get_period(),
+            'errors': self.errors,
+            'mandatory_snacks': [snack.to_dict() for snack in board['mandatory_snacks']],
+            'optional_snacks': [snack.to_dict() for snack in board['optional_snacks']],
+        })
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,69 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import json
+
+from django.http import JsonResponse
+from django.utils.translation import ugettext_lazy as _
+
+from snacksdb.utils import vote_ledger
+from snacksdb.views.Vote import Vote
+
+from .APIMixin import APIMixin
+
+
+class CastVote(APIMixin, Vote):
+    """
+    JSON endpoint for casting votes. Accepts 'snack_id' as form data or in a JSON body,
+    to cast one vote, or a JSON body with 'choices', a list of {"snack_id": int,
+    "count": int} objects, to cast several votes in one transaction.
+    """
+    http_method_names = ['post', 'options']
+
+    def post(self, request, *pos, **kw):
+        data = request.POST
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body.decode('utf-8'))
+            except ValueError:
+                return self.error_response(_('Request body must be valid JSON.'))
+
+        if 'choices' in data:
+            return self.post_choices_json(data['choices'])
+
+        try:
+            snack_id = int(data['snack_id'])
+        except (KeyError, TypeError, ValueError):
+            return self.error_response(_('Request must contain an integer "snack_id".'))
+
+        if not self.cast_vote(snack_id):
+            return self.error_response(_("You're out of votes for the month!"), status=403)
+
+        return JsonResponse({
+            'snack_id': snack_id,
+            'votes_remaining': vote_ledger.remaining(request.user),
+        }, status=201)
+
+    def post_choices_json(self, choices):
+        try:
+            choices = self.clean_choices(
+                (choice['snack_id'], choice['count']) for choice in choices
+            )
+        except (KeyError, TypeError):
+            return self.error_response(
+                _('"choices" must be a list of objects with "snack_id" and "count".')
+            )
+        except ValueError as e:
+            return self.error_response(e)
+
+        if not self.cast_votes(choices):
+            return self.error_response(_("You don't have that many votes left!"), status=403)
+
+        return JsonResponse({
+            'choices': [
+                {'snack_id': snack_id, 'count': count}
+                for snack_id, count in sorted(choices.items())
+            ],
+            'votes_remaining': vote_ledger.remaining(self.request.user),
+        }, status=201)
@@ -0,0 +1,24 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from django.http import JsonResponse
+from django.views import generic
+
+from snacksdb.utils import get_period, nomination_ledger, vote_ledger
+
+from .APIMixin import APIMixin
+
+
+class Quota(APIMixin, generic.View):
+    """
+    JSON view of the number of votes and nominations the user has left this month.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    def get(self, request, *pos, **kw):
+        return JsonResponse({
+            'period': get_period(),
+            'votes_remaining': vote_ledger.remaining(request.user),
+            'nominations_remaining': nomination_ledger.remaining(request.user),
+        })
@@ -0,0 +1,99 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+import json
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, StreamingHttpResponse
+from django.views import generic
+
+from snacksdb.utils import get_period, get_tally_hub
+
+from .APIMixin import APIMixin
+
+
+class TallyStream(APIMixin, generic.View):
+    """
+    Server-Sent Events stream of this month's vote totals. Each time a snack's
+    total changes, clients receive a 'tally' event whose data is a JSON object
+    of {"snack_id": ..., "total_votes": ..., "version": ...}. Clients should
+    ignore a total whose version is lower than one they've already shown.
+
+    Changes come from this process's TallyHub, so a connected client costs no
+    database queries. Browsers that reconnect send the last event ID they saw,
+    and are sent the changes they missed, if this process still has them.
+    """
+    http_method_names = ['get', 'options']
+
+    # How long browsers should wait before reconnecting, in milliseconds.
+    RETRY = 5000
+
+    def dispatch(self, request, *pos, **kw):
+        if not settings.VOTE_STREAM_ENABLED:
+            raise Http404()
+
+        return super().dispatch(request, *pos, **kw)
+
+    def get(self, request, *pos, **kw):
+        response = StreamingHttpResponse(
+            self.stream(self.get_last_event_id()), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Tell nginx not to buffer the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def get_hub(self):
+        return get_tally_hub()
+
+    def get_last_event_id(self):
+        try:
+            return int(self.request.META['HTTP_LAST_EVENT_ID'])
+        except (KeyError, ValueError):
+            return None
+
+    def stream(self, cursor):
+        """
+        Yield this month's tally changes as they're published, until the stream
+        is VOTE_STREAM_MAX_AGE seconds old.
+        """
+        self.release_connections()
+
+        period = get_period()
+        hub = self.get_hub()
+        expires = time.monotonic() + settings.VOTE_STREAM_MAX_AGE
+
+        yield 'retry: {}\n\n'.format(self.RETRY)
+
+        while True:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                return
+
+            cursor, events = hub.listen(cursor, min(settings.VOTE_STREAM_KEEPALIVE, remaining))
+            events = [(seq, event) for seq, event in events if event['period'] == period]
+
+            if not events:
+                # Keep proxies from timing out idle streams.
+                yield ': keepalive\n\n'
+
+            for seq, event in events:
+                yield self.format_event(seq, event)
+
+    def format_event(self, seq, event):
+        data = {
+            'snack_id': event['snack_id'], 'total_votes': event['total_votes'],
+            'version': event.get('version', 0),
+        }
+        return 'id: {}\nevent: tally\ndata: {}\n\n'.format(seq, json.dumps(data))
+
+    def release_connections(self):
+        """
+        Close this thread's database connections, so that idle streams don't hold them.
+        """
+        for connection in connections.all():
+            if not connection.in_atomic_block:
+                connection.close()
@@ -0,0 +1,8 @@
+# vim: ts=4:sw=4:expandtabs
+
+__author__ = 'zach.mott@gmail.com'
+
+from .Board import Board
+from .CastVote import CastVote
+from .Quota import Quota
+from .TallyStream import TallyStream
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'snacksdb.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -154,10 +155,142 @@ MESSAGE_TAGS = {
 # +------------------------------------------------------------------------------------------------+
 
 SNACK_BACKEND_API_KEY = None  # Define me in local_settings.py.
+
+# Connections to the Snack API are pooled and kept alive per process.
+# Timeouts are in seconds; list() retries transient failures with jittered
+# exponential backoff (SNACK_BACKEND_RETRY_BACKOFF * 2 ** attempt, at most).
+SNACK_BACKEND_CONNECT_TIMEOUT = 3.05
+SNACK_BACKEND_READ_TIMEOUT = 10
+SNACK_BACKEND_LIST_RETRIES = 2
+SNACK_BACKEND_RETRY_BACKOFF = 0.25
+SNACK_BACKEND_POOL_CONNECTIONS = 2
+SNACK_BACKEND_POOL_MAXSIZE = 10
+
+# Catalogs are parsed with the fastest JSON parser installed (orjson, then ujson,
+# then json), unless one is named here. With SNACK_BACKEND_STREAM_CATALOG (and
+# ijson installed), list() parses the catalog as it downloads, one snack at a
+# time, which caps memory for very large catalogs. See benchmarks.catalog_decoding.
+SNACK_BACKEND_JSON_PARSER = None
+SNACK_BACKEND_STREAM_CATALOG = False
+
+# The Snack API doesn't version its catalog, so SnackAPISource versions it by the
+# hash of the last catalog each process fetched, for SNACK_BACKEND_VERSION_TTL
+# seconds afterwards. The vote board's cached fragments and the board API's ETags
+# (see VOTE_BOARD_CACHE_TTL) notice changes to the catalog within that long.
+SNACK_BACKEND_VERSION_TTL = 60
+
 VOTES_PER_MONTH = 3
 NOMINATIONS_PER_MONTH = 1
 SNACK_SOURCE_CLASS = 'snacksdb.utils.SnackAPISource.SnackAPISource'
 
+# To serve the snack catalog from the local database instead of the Snack API,
+# set SNACK_SOURCE_CLASS to 'snacksdb.utils.LocalSnackSource.LocalSnackSource',
+# and load the catalog with 'manage.py snack_catalog import'.
+
+# To serve the snack catalog from a local mirror of the Snack API, set
+# SNACK_SOURCE_CLASS to 'snacksdb.utils.MirrorSnackSource.MirrorSnackSource', and
+# run 'manage.py sync_snack_catalog --loop', which syncs the mirror every
+# SNACK_MIRROR_SYNC_INTERVAL seconds. A mirror more than SNACK_MIRROR_MAX_STALENESS
+# seconds old is synced while the user waits; 'sync_snack_catalog --check' fails
+# once that happens, for monitoring.
+SNACK_MIRROR_SOURCE_CLASS = 'snacksdb.utils.SnackAPISource.SnackAPISource'
+SNACK_MIRROR_SYNC_INTERVAL = 60
+SNACK_MIRROR_MAX_STALENESS = 60 * 15
+
+# To cache the snack catalog, set SNACK_SOURCE_CLASS to
+# 'snacksdb.utils.CachingSnackSource.CachingSnackSource' and
+# SNACK_CACHE_SOURCE_CLASS to the source whose catalog should be cached.
+# Catalogs are fresh for SNACK_CACHE_TTL seconds, then served stale for
+# up to SNACK_CACHE_STALE_TTL more seconds while they're refreshed.
+SNACK_CACHE_SOURCE_CLASS = 'snacksdb.utils.SnackAPISource.SnackAPISource'
+SNACK_CACHE_TTL = 60
+SNACK_CACHE_STALE_TTL = 60 * 10
+SNACK_CACHE_ALIAS = 'default'
+
+# With SNACK_SUGGESTION_OUTBOX, nominating a new snack doesn't wait on the snack
+# source: the user gets a pending nomination at once, and the suggestion is queued
+# for 'manage.py drain_suggestions --loop', which submits SNACK_SUGGESTION_CONCURRENCY
+# at a time every SNACK_SUGGESTION_DRAIN_INTERVAL seconds. Failed submissions are
+# retried after SNACK_SUGGESTION_RETRY_BACKOFF * 2 ** attempt seconds, up to
+# SNACK_SUGGESTION_MAX_ATTEMPTS times.
+SNACK_SUGGESTION_OUTBOX = False
+SNACK_SUGGESTION_CONCURRENCY = 4
+SNACK_SUGGESTION_DRAIN_INTERVAL = 5
+SNACK_SUGGESTION_RETRY_BACKOFF = 30
+SNACK_SUGGESTION_MAX_ATTEMPTS = 5
+
+# Views fetch the snack catalog in a background thread while they query the
+# database, when the snack source allows it. SNACK_SOURCE_FETCH_THREADS is the
+# size of each process's pool of background threads.
+SNACK_SOURCE_CONCURRENT_FETCH = True
+SNACK_SOURCE_FETCH_THREADS = 4
+
+# Each process creates one snack source and shares it between requests. With
+# SNACK_SOURCE_WARM_UP, it also fetches the catalog (opening a connection to
+# the Snack API, or filling the cache) before it handles its first request.
+SNACK_SOURCE_WARM_UP = True
+
+# The vote board, which is the same for every user, is rendered once per
+# version of the board and the snack catalog, and cached for up to
+# VOTE_BOARD_CACHE_TTL seconds in VOTE_BOARD_CACHE_ALIAS, which also holds the
+# board's version. Neither is versioned without a shared cache.
+VOTE_BOARD_CACHE_ALIAS = 'default'
+VOTE_BOARD_CACHE_TTL = 60 * 10
+
+# With VOTE_BUFFER_ENABLED, votes are spent from each user's quota and appended
+# to VOTE_BUFFER_PATH, a local file, instead of being inserted one at a time;
+# 'manage.py flush_ballots --loop' writes them to the database every
+# VOTE_BUFFER_FLUSH_INTERVAL seconds, in batches of VOTE_BUFFER_BATCH_SIZE. The
+# vote page counts buffered votes. With VOTE_BUFFER_FSYNC, each vote is synced to
+# disk before it's acknowledged, so that it survives a power failure. A buffered
+# vote whose transaction hasn't committed within VOTE_BUFFER_COMMIT_TIMEOUT
+# seconds is taken to have rolled back, and isn't written.
+VOTE_BUFFER_ENABLED = False
+VOTE_BUFFER_PATH = os.path.join(BASE_DIR, 'var', 'ballots.jsonl')
+VOTE_BUFFER_FSYNC = True
+VOTE_BUFFER_BATCH_SIZE = 500
+VOTE_BUFFER_FLUSH_INTERVAL = 1
+VOTE_BUFFER_COMMIT_TIMEOUT = 60
+
+# The number of closed months per page of results history. See the
+# 'close_month' management command, which closes last month by default.
+RESULTS_HISTORY_PAGE_SIZE = 6
+
+# /snacks/api/tallies/stream pushes vote totals to the vote page as they change
+# (Server-Sent Events). Each process polls VOTE_STREAM_CACHE_ALIAS for changes
+# every VOTE_STREAM_POLL_INTERVAL seconds, so that cache must be shared between
+# processes. Streams are long-lived: serve them from async (e.g. gevent) workers.
+# Idle streams get a comment every VOTE_STREAM_KEEPALIVE seconds, and are closed
+# after VOTE_STREAM_MAX_AGE seconds, whereupon browsers reconnect.
+VOTE_STREAM_ENABLED = False
+VOTE_STREAM_CACHE_ALIAS = 'default'
+VOTE_STREAM_POLL_INTERVAL = 0.5
+VOTE_STREAM_KEEPALIVE = 15
+VOTE_STREAM_MAX_AGE = 60 * 5
+
+# Time each request's phases (SQL, the Snack API, rendering) and report them in a
+# Server-Timing header and a JSON line on the 'snacksdb.timing' logger. The
+# request ID comes from REQUEST_ID_HEADER, if the front end sets it.
+REQUEST_TIMING_ENABLED = False
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'snacksdb.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # +------------------------------------------------------------------------------------------------+
 # |                                                                                                |
 # |                 local_settings.py; don't declare anything after this banner!                   |
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "snafoo.settings")
 
 application = get_wsgi_application()
+
+# Get the snack source ready before this process accepts requests.
+# See settings.SNACK_SOURCE_WARM_UP.
+from snacksdb.utils import warm_up_snack_source  # NOQA
+
+warm_up_snack_source()